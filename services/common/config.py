@@ -3,7 +3,7 @@ Configuration for all bga-backend services.
 """
 
 import os
-from datetime import datetime
+from datetime import date
 from pathlib import Path
 from typing import Any
 
@@ -38,12 +38,77 @@ db_host = get_secret("DB_HOST")
 db_name = get_secret("DB_NAME")
 
 db_url = f"postgresql+psycopg2://{db_user}:{db_password}@{db_host}/{db_name}"
+db_async_url = f"postgresql+asyncpg://{db_user}:{db_password}@{db_host}/{db_name}"
+
+# Database Connection Pool
+db_pool_size = int(get_secret("DB_POOL_SIZE", 5))
+db_max_overflow = int(get_secret("DB_MAX_OVERFLOW", 10))
+db_pool_timeout = float(get_secret("DB_POOL_TIMEOUT", 30))
+db_pool_recycle = int(get_secret("DB_POOL_RECYCLE", 1800))
+db_pool_pre_ping = get_secret("DB_POOL_PRE_PING", "true").lower() in (
+    "1",
+    "true",
+    "yes",
+)
+db_statement_timeout_ms = int(get_secret("DB_STATEMENT_TIMEOUT_MS", 30000))
+db_connect_timeout = float(get_secret("DB_CONNECT_TIMEOUT", 10))
+
+# Database Read Replicas, as a comma-separated list of hosts
+db_replica_hosts = [
+    host.strip()
+    for host in get_secret("DB_REPLICA_HOSTS", "").split(",")
+    if host.strip()
+]
+db_replica_urls = [
+    f"postgresql+psycopg2://{db_user}:{db_password}@{host}/{db_name}"
+    for host in db_replica_hosts
+]
+db_replica_async_urls = [
+    f"postgresql+asyncpg://{db_user}:{db_password}@{host}/{db_name}"
+    for host in db_replica_hosts
+]
+db_replica_max_lag = float(get_secret("DB_REPLICA_MAX_LAG", 30))
+db_replica_check_seconds = float(get_secret("DB_REPLICA_CHECK_SECONDS", 10))
+
+# Web API Configuration Options
+api_default_page_size = int(get_secret("API_DEFAULT_PAGE_SIZE", 100))
+api_max_page_size = int(get_secret("API_MAX_PAGE_SIZE", 500))
+api_max_batch_size = int(get_secret("API_MAX_BATCH_SIZE", 1000))
+api_export_batch_size = int(get_secret("API_EXPORT_BATCH_SIZE", 5000))
+# Exports streaming at once per worker, each holding a primary connection until it ends
+api_max_concurrent_exports = int(get_secret("API_MAX_CONCURRENT_EXPORTS", 2))
+api_cache_max_age = int(get_secret("API_CACHE_MAX_AGE", 300))
+data_version_poll_seconds = float(get_secret("DATA_VERSION_POLL_SECONDS", 30))
+# Query result cache: "memory" (per worker) or "sqlite" (shared by workers on the host)
+api_cache_backend = get_secret("API_CACHE_BACKEND", "memory")
+api_cache_path = get_secret("API_CACHE_PATH", "/tmp/bga_query_cache.sqlite3")
+api_cache_max_entries = int(get_secret("API_CACHE_MAX_ENTRIES", 1024))
+api_cache_max_bytes = int(get_secret("API_CACHE_MAX_BYTES", 64 * 1024 * 1024))
 
 # BoardGameGeek.com Login Credentials
 bgg_username = get_secret("BGG_USERNAME")
 bgg_password = get_secret("BGG_PASSWORD")
 
 # Pipeline Configuration Options
-data_path = Path(get_secret("DATA_PATH", "/data")) / datetime.now().strftime("%Y/%m/%d")
-if _top_k_only := get_secret("TOP_K_ONLY"):
-    top_k_only = int(_top_k_only)
+data_root = Path(get_secret("DATA_PATH", "/data"))
+# Catalogue snapshot files, written by the pipeline and mapped by the web service
+snapshot_path = Path(get_secret("SNAPSHOT_PATH", data_root / "snapshots"))
+snapshot_retention = int(get_secret("SNAPSHOT_RETENTION", 3))
+
+
+def get_run_path(run_date: date) -> Path:
+    """
+    Get the data directory of the pipeline run for the given date.
+
+    :param run_date: Date of the pipeline run.
+
+    :return Path: Run directory, in the form DATA_PATH/YYYY/MM/DD.
+    """
+    return data_root / run_date.strftime("%Y/%m/%d")
+
+
+data_path = get_run_path(date.today())
+compacted_path = data_root / "compacted"
+xml_retention_days = int(get_secret("XML_RETENTION_DAYS", 30))
+similar_games_top_k = int(get_secret("SIMILAR_GAMES_TOP_K", 20))
+top_k_only = int(_top_k_only) if (_top_k_only := get_secret("TOP_K_ONLY")) else None
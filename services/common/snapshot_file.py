@@ -0,0 +1,207 @@
+"""
+snapshot_file.py - Immutable binary snapshot files of the game catalogue.
+
+The pipeline writes one snapshot file per data version. Web worker processes map it
+read-only, so its arrays are shared through the page cache rather than copied into every
+process. A file is laid out as:
+
+- MAGIC, then the length of the header as a little-endian 64-bit integer
+- A JSON header with the dtype, shape and offset of every array, and free-form metadata
+- The arrays, each starting on an ALIGNMENT byte boundary
+
+Numeric columns are fixed-width arrays, with NaN for NULL. Text columns are stored as an
+offset table into a UTF-8 blob, so values are only decoded when read.
+"""
+
+import json
+import math
+import mmap
+import os
+from collections.abc import Iterable, Mapping
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from numpy.typing import NDArray
+
+MAGIC = b"BGASNAP1"
+ALIGNMENT = 64
+SUFFIX = ".snapshot"
+
+# Magic number and header length
+PREAMBLE_SIZE = len(MAGIC) + 8
+
+
+class StringColumn:
+    """
+    Column of strings stored as an offset table into a blob of UTF-8 bytes.
+    """
+
+    def __init__(self, offsets: NDArray, data: NDArray) -> None:
+        """
+        Wrap existing arrays, without copying them.
+
+        :param offsets: Start of every value in data, followed by the end of the last value
+        :param data: UTF-8 bytes of every value, concatenated
+        """
+        self.offsets = offsets
+        self.data = data
+
+    @classmethod
+    def from_values(cls, values: Iterable[str]) -> "StringColumn":
+        """
+        Encode strings into a new column.
+
+        :param values: Strings, in column order
+
+        :return StringColumn: Column holding the strings
+        """
+        encoded = [value.encode() for value in values]
+        offsets: NDArray = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(value) for value in encoded], out=offsets[1:])
+        return cls(offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, position: int) -> str:
+        start, end = self.offsets[position], self.offsets[position + 1]
+        return self.data[start:end].tobytes().decode()
+
+    def take(self, positions: Iterable[int]) -> list[str]:
+        """
+        Decode the strings at the given positions.
+
+        :param positions: Positions to read
+
+        :return list[str]: Strings, in the order of positions
+        """
+        return [self[position] for position in positions]
+
+
+@dataclass(frozen=True)
+class SnapshotFile:
+    """Contents of a snapshot file, backed by a read-only memory map"""
+
+    columns: dict[str, NDArray | StringColumn]
+    links: dict[str, tuple[NDArray, NDArray]]
+    metadata: dict[str, Any] = field(default_factory=dict)
+
+
+def snapshot_file_path(directory: Path, version: str) -> Path:
+    """
+    Get the path of the snapshot file of a data version.
+
+    :param directory: Directory of snapshot files
+    :param version: Data version identifier
+
+    :return Path: Path of the snapshot file
+    """
+    return directory / f"{version}{SUFFIX}"
+
+
+def _align(offset: int) -> int:
+    """Round an offset up to the next ALIGNMENT boundary."""
+    return -(-offset // ALIGNMENT) * ALIGNMENT
+
+
+def write_snapshot_file(
+    path: Path,
+    columns: Mapping[str, NDArray | StringColumn],
+    links: Mapping[str, tuple[NDArray, NDArray]],
+    metadata: Mapping[str, Any] | None = None,
+) -> int:
+    """
+    Write a snapshot file. The file is written under a temporary name and renamed into
+    place, so readers never see a partial snapshot.
+
+    :param path: Path of the snapshot file
+    :param columns: Arrays or string columns of the games, keyed on column name
+    :param links: Game ids and linked ids of each link type, keyed on link name
+    :param metadata: JSON serializable metadata stored in the header
+
+    :return int: Size of the file in bytes
+    """
+    arrays: dict[str, NDArray] = {}
+    for name, column in columns.items():
+        if isinstance(column, StringColumn):
+            arrays[f"text/{name}/offsets"] = column.offsets
+            arrays[f"text/{name}/data"] = column.data
+        else:
+            arrays[f"column/{name}"] = column
+    for name, (game_ids, linked_ids) in links.items():
+        arrays[f"link/{name}/game_id"] = np.asarray(game_ids, dtype=np.int64)
+        arrays[f"link/{name}/linked_id"] = np.asarray(linked_ids, dtype=np.int64)
+
+    entries, size = {}, 0
+    for name, array in arrays.items():
+        offset = _align(size)
+        entries[name] = {
+            "dtype": array.dtype.str,
+            "shape": list(array.shape),
+            "offset": offset,
+        }
+        size = offset + array.nbytes
+    header = json.dumps({"arrays": entries, "metadata": dict(metadata or {})}).encode()
+    data_start = _align(PREAMBLE_SIZE + len(header))
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temp_path = path.with_name(f".{path.name}.tmp")
+    with open(temp_path, "wb") as file:
+        file.write(MAGIC)
+        file.write(len(header).to_bytes(8, "little"))
+        file.write(header)
+        for name, array in arrays.items():
+            file.seek(data_start + entries[name]["offset"])
+            file.write(np.ascontiguousarray(array).tobytes())
+        file.truncate(data_start + size)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(temp_path, path)
+    return data_start + size
+
+
+def read_snapshot_file(path: Path) -> SnapshotFile:
+    """
+    Map a snapshot file into memory. Arrays are read-only views of the mapping, so no data
+    is copied and the pages are shared with every other process mapping the file.
+
+    :param path: Path of the snapshot file
+
+    :return SnapshotFile: Columns, links and metadata of the snapshot
+    """
+    with open(path, "rb") as file:
+        # The mapping stays valid after the file is closed, or replaced on disk
+        buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    magic_end = len(MAGIC)
+    if len(buffer) < PREAMBLE_SIZE or buffer[:magic_end] != MAGIC:
+        raise ValueError(f"{path} is not a catalogue snapshot file")
+    header_end = PREAMBLE_SIZE + int.from_bytes(
+        buffer[magic_end:PREAMBLE_SIZE], "little"
+    )
+    header = json.loads(buffer[PREAMBLE_SIZE:header_end])
+    data_start = _align(header_end)
+
+    arrays = {
+        name: np.frombuffer(
+            buffer,
+            dtype=np.dtype(entry["dtype"]),
+            count=math.prod(entry["shape"]),
+            offset=data_start + entry["offset"],
+        ).reshape(entry["shape"])
+        for name, entry in header["arrays"].items()
+    }
+
+    columns: dict[str, NDArray | StringColumn] = {}
+    links: dict[str, tuple[NDArray, NDArray]] = {}
+    for name, array in arrays.items():
+        kind, key, *part = name.split("/")
+        if kind == "column":
+            columns[key] = array
+        elif kind == "text" and part == ["offsets"]:
+            columns[key] = StringColumn(array, arrays[f"text/{key}/data"])
+        elif kind == "link" and part == ["game_id"]:
+            links[key] = (array, arrays[f"link/{key}/linked_id"])
+    return SnapshotFile(columns, links, header["metadata"])
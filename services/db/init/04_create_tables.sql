@@ -23,7 +23,11 @@ CREATE TABLE game_details
     owned_copies  int,
     wishlist      int,
     popularity    real GENERATED ALWAYS AS (LN(ABS((bayes_rating - 5.5) * total_ratings) + 1) *
-                                            SIGN((bayes_rating - 5.5))) STORED
+                                            SIGN((bayes_rating - 5.5))) STORED,
+    -- Full-text search document, weighting title matches above description matches
+    search_vector tsvector GENERATED ALWAYS AS (
+        setweight(to_tsvector('english', title), 'A') ||
+        setweight(to_tsvector('english', description), 'B')) STORED
 );
 
 CREATE TABLE mechanic_details
@@ -120,3 +124,36 @@ CREATE TABLE game_publisher_link
         FOREIGN KEY (publisher_id)
             REFERENCES publisher_details (publisher_id)
 );
+
+CREATE TABLE data_version
+(
+    version   text PRIMARY KEY,
+    loaded_at timestamptz NOT NULL DEFAULT now()
+);
+
+-- Denormalized game details and linked entities, maintained by the pipeline for single-lookup reads
+CREATE TABLE game_documents
+(
+    game_id    int PRIMARY KEY,
+    document   jsonb       NOT NULL,
+    updated_at timestamptz NOT NULL DEFAULT now(),
+    CONSTRAINT fk_game_id
+        FOREIGN KEY (game_id)
+            REFERENCES game_details (game_id)
+);
+
+-- Top-K most similar games of each game, recomputed by the pipeline after every load
+CREATE TABLE game_similarity
+(
+    game_id         int,
+    rank            smallint,
+    similar_game_id int  NOT NULL,
+    score           real NOT NULL,
+    PRIMARY KEY (game_id, rank),
+    CONSTRAINT fk_game_id
+        FOREIGN KEY (game_id)
+            REFERENCES game_details (game_id),
+    CONSTRAINT fk_similar_game_id
+        FOREIGN KEY (similar_game_id)
+            REFERENCES game_details (game_id)
+);
@@ -0,0 +1,30 @@
+-- Switch to the target database
+\c boardgameanalytics_db
+
+-- Keyset pagination of /games, ordered by sort column with game_id as tie-breaker
+CREATE INDEX game_details_bayes_rating_idx ON game_details (bayes_rating DESC NULLS LAST, game_id DESC);
+CREATE INDEX game_details_popularity_idx ON game_details (popularity DESC NULLS LAST, game_id DESC);
+CREATE INDEX game_details_year_published_idx ON game_details (year_published DESC NULLS LAST, game_id DESC);
+CREATE INDEX game_details_average_weight_idx ON game_details (average_weight DESC NULLS LAST, game_id DESC);
+
+-- Range filters of /games. Rating, year and weight ranges use the keyset indexes above.
+CREATE INDEX game_details_playing_time_idx ON game_details (playing_time);
+CREATE INDEX game_details_min_age_idx ON game_details (min_age);
+-- Leading on max_players, the selective side of a player count: min_players <= n holds for most games
+CREATE INDEX game_details_players_idx ON game_details (max_players, min_players);
+
+-- Reverse lookups from a linked entity to its games, for link filters of /games
+CREATE INDEX game_mechanic_link_mechanic_id_idx ON game_mechanic_link (mechanic_id, game_id);
+CREATE INDEX game_category_link_category_id_idx ON game_category_link (category_id, game_id);
+CREATE INDEX game_designer_link_designer_id_idx ON game_designer_link (designer_id, game_id);
+CREATE INDEX game_artist_link_artist_id_idx ON game_artist_link (artist_id, game_id);
+CREATE INDEX game_publisher_link_publisher_id_idx ON game_publisher_link (publisher_id, game_id);
+
+-- Full-text search of /search. Bulk loads append to the pending list, which the pipeline
+-- merges into the index once after loading with gin_clean_pending_list.
+CREATE INDEX game_details_search_vector_idx ON game_details USING GIN (search_vector)
+    WITH (fastupdate = on, gin_pending_list_limit = 65536);
+
+-- gin_clean_pending_list and ANALYZE require ownership. The pipeline owns game_details, and with it its indexes,
+-- as it owns the materialized views it refreshes.
+ALTER TABLE game_details OWNER TO bga_pipeline;
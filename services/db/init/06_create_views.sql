@@ -0,0 +1,113 @@
+-- Switch to the target database
+\c boardgameanalytics_db
+
+-- Aggregate statistics of the games of each linked entity and year, refreshed concurrently by
+-- the pipeline after every load. BGG reports 0 for a missing rating, weight or playing time,
+-- so zeros are left out of the means and medians. Concurrent refreshes need a unique index,
+-- and refreshing needs ownership of the view.
+
+CREATE MATERIALIZED VIEW mechanic_stats AS
+SELECT d.mechanic_id,
+       d.mechanic_name,
+       count(*) AS game_count,
+       avg(NULLIF(g.avg_rating, 0)) AS mean_rating,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.avg_rating, 0)) AS median_rating,
+       avg(NULLIF(g.average_weight, 0)) AS mean_weight,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.average_weight, 0)) AS median_weight,
+       avg(NULLIF(g.playing_time, 0)) AS mean_playing_time,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.playing_time, 0)) AS median_playing_time,
+       avg(g.popularity) AS mean_popularity
+FROM mechanic_details d
+    JOIN game_mechanic_link l USING (mechanic_id)
+    JOIN game_details g USING (game_id)
+GROUP BY d.mechanic_id, d.mechanic_name;
+CREATE UNIQUE INDEX mechanic_stats_mechanic_id_idx ON mechanic_stats (mechanic_id);
+ALTER MATERIALIZED VIEW mechanic_stats OWNER TO bga_pipeline;
+
+CREATE MATERIALIZED VIEW category_stats AS
+SELECT d.category_id,
+       d.category_name,
+       count(*) AS game_count,
+       avg(NULLIF(g.avg_rating, 0)) AS mean_rating,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.avg_rating, 0)) AS median_rating,
+       avg(NULLIF(g.average_weight, 0)) AS mean_weight,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.average_weight, 0)) AS median_weight,
+       avg(NULLIF(g.playing_time, 0)) AS mean_playing_time,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.playing_time, 0)) AS median_playing_time,
+       avg(g.popularity) AS mean_popularity
+FROM category_details d
+    JOIN game_category_link l USING (category_id)
+    JOIN game_details g USING (game_id)
+GROUP BY d.category_id, d.category_name;
+CREATE UNIQUE INDEX category_stats_category_id_idx ON category_stats (category_id);
+ALTER MATERIALIZED VIEW category_stats OWNER TO bga_pipeline;
+
+CREATE MATERIALIZED VIEW designer_stats AS
+SELECT d.designer_id,
+       d.designer_name,
+       count(*) AS game_count,
+       avg(NULLIF(g.avg_rating, 0)) AS mean_rating,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.avg_rating, 0)) AS median_rating,
+       avg(NULLIF(g.average_weight, 0)) AS mean_weight,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.average_weight, 0)) AS median_weight,
+       avg(NULLIF(g.playing_time, 0)) AS mean_playing_time,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.playing_time, 0)) AS median_playing_time,
+       avg(g.popularity) AS mean_popularity
+FROM designer_details d
+    JOIN game_designer_link l USING (designer_id)
+    JOIN game_details g USING (game_id)
+GROUP BY d.designer_id, d.designer_name;
+CREATE UNIQUE INDEX designer_stats_designer_id_idx ON designer_stats (designer_id);
+ALTER MATERIALIZED VIEW designer_stats OWNER TO bga_pipeline;
+
+CREATE MATERIALIZED VIEW artist_stats AS
+SELECT d.artist_id,
+       d.artist_name,
+       count(*) AS game_count,
+       avg(NULLIF(g.avg_rating, 0)) AS mean_rating,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.avg_rating, 0)) AS median_rating,
+       avg(NULLIF(g.average_weight, 0)) AS mean_weight,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.average_weight, 0)) AS median_weight,
+       avg(NULLIF(g.playing_time, 0)) AS mean_playing_time,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.playing_time, 0)) AS median_playing_time,
+       avg(g.popularity) AS mean_popularity
+FROM artist_details d
+    JOIN game_artist_link l USING (artist_id)
+    JOIN game_details g USING (game_id)
+GROUP BY d.artist_id, d.artist_name;
+CREATE UNIQUE INDEX artist_stats_artist_id_idx ON artist_stats (artist_id);
+ALTER MATERIALIZED VIEW artist_stats OWNER TO bga_pipeline;
+
+CREATE MATERIALIZED VIEW publisher_stats AS
+SELECT d.publisher_id,
+       d.publisher_name,
+       count(*) AS game_count,
+       avg(NULLIF(g.avg_rating, 0)) AS mean_rating,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.avg_rating, 0)) AS median_rating,
+       avg(NULLIF(g.average_weight, 0)) AS mean_weight,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.average_weight, 0)) AS median_weight,
+       avg(NULLIF(g.playing_time, 0)) AS mean_playing_time,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.playing_time, 0)) AS median_playing_time,
+       avg(g.popularity) AS mean_popularity
+FROM publisher_details d
+    JOIN game_publisher_link l USING (publisher_id)
+    JOIN game_details g USING (game_id)
+GROUP BY d.publisher_id, d.publisher_name;
+CREATE UNIQUE INDEX publisher_stats_publisher_id_idx ON publisher_stats (publisher_id);
+ALTER MATERIALIZED VIEW publisher_stats OWNER TO bga_pipeline;
+
+CREATE MATERIALIZED VIEW year_stats AS
+SELECT g.year_published,
+       count(*) AS game_count,
+       avg(NULLIF(g.avg_rating, 0)) AS mean_rating,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.avg_rating, 0)) AS median_rating,
+       avg(NULLIF(g.average_weight, 0)) AS mean_weight,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.average_weight, 0)) AS median_weight,
+       avg(NULLIF(g.playing_time, 0)) AS mean_playing_time,
+       percentile_cont(0.5) WITHIN GROUP (ORDER BY NULLIF(g.playing_time, 0)) AS median_playing_time,
+       avg(g.popularity) AS mean_popularity
+FROM game_details g
+WHERE g.year_published IS NOT NULL
+GROUP BY g.year_published;
+CREATE UNIQUE INDEX year_stats_year_published_idx ON year_stats (year_published);
+ALTER MATERIALIZED VIEW year_stats OWNER TO bga_pipeline;
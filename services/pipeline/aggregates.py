@@ -0,0 +1,40 @@
+"""
+aggregates.py - Refresh of the materialized aggregate statistics views.
+
+Game counts and rating, weight, playing time and popularity statistics per linked entity
+and per year are kept in materialized views (see db/init/06_create_views.sql). They are
+refreshed concurrently after each load, so readers keep seeing the previous statistics
+until each refresh commits.
+"""
+
+import logging
+
+from sqlalchemy import Engine, text
+
+# Materialized views refreshed after each load
+AGGREGATE_VIEWS = (
+    "mechanic_stats",
+    "category_stats",
+    "designer_stats",
+    "artist_stats",
+    "publisher_stats",
+    "year_stats",
+)
+
+
+def refresh_aggregate_views(engine: Engine) -> int:
+    """
+    Refresh every aggregate view concurrently, each in its own transaction.
+
+    :param engine: SQLAlchemy engine of the database
+
+    :return int: Total number of rows in the refreshed views
+    """
+    total_rows = 0
+    for view in AGGREGATE_VIEWS:
+        with engine.begin() as connection:
+            connection.execute(text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}"))
+            rows = connection.execute(text(f"SELECT count(*) FROM {view}")).scalar_one()
+        logging.info(f"Refreshed {view} ({rows:,} rows).")
+        total_rows += rows
+    return total_rows
@@ -0,0 +1,205 @@
+import json
+import logging
+from pathlib import Path
+from typing import Any
+
+import pandas
+from pandas import DataFrame, Series
+
+KEY_SEPARATOR = "|"
+
+
+def get_key_columns(table_name: str, df: DataFrame) -> list[str]:
+    """
+    Get the columns uniquely identifying a row of the given output table.
+    Details tables are keyed on their id column, link tables on every column.
+
+    :param table_name: Name of the table relative to the CSV directory, e.g. details/game_details
+    :param df: Table contents
+
+    :return list[str]: Names of the key columns
+    """
+    if table_name.startswith("links/"):
+        return list(df.columns)
+    return [df.columns[0]]
+
+
+def compute_row_hashes(table_name: str, df: DataFrame) -> Series:
+    """
+    Compute a content hash for every row of the given table, indexed by row key.
+
+    :param table_name: Name of the table relative to the CSV directory
+    :param df: Table contents, as read with dtype=str
+
+    :return Series: Row hashes indexed by row key
+    """
+    if not isinstance(df, DataFrame):
+        raise TypeError(f"Expected DataFrame, got {type(df)}")
+
+    if df.empty:
+        return Series(dtype="uint64", name="row_hash")
+
+    df = df.drop_duplicates()
+    key_columns = get_key_columns(table_name, df)
+    keys = df[key_columns].astype(str).agg(KEY_SEPARATOR.join, axis=1)
+    hashes = Series(
+        pandas.util.hash_pandas_object(df, index=False).to_numpy(),
+        index=keys.to_numpy(),
+        name="row_hash",
+    )
+    hashes.index.name = "key"
+    return hashes[~hashes.index.duplicated(keep="last")]
+
+
+def diff_row_hashes(previous: Series, current: Series) -> dict[str, list[str]]:
+    """
+    Compare two sets of row hashes.
+
+    :param previous: Row hashes of the previous run, indexed by row key
+    :param current: Row hashes of the current run, indexed by row key
+
+    :return dict[str, list[str]]: Sorted keys of inserted, updated and deleted rows
+    """
+    common = current.index.intersection(previous.index)
+    current_hashes = current.iloc[current.index.get_indexer(common)].to_numpy()
+    previous_hashes = previous.iloc[previous.index.get_indexer(common)].to_numpy()
+    updated = common[current_hashes != previous_hashes]
+
+    return {
+        "inserted": sorted(current.index.difference(previous.index)),
+        "updated": sorted(updated),
+        "deleted": sorted(previous.index.difference(current.index)),
+    }
+
+
+def read_table_csv(csv_file: Path) -> DataFrame:
+    """Read an output table CSV with every value as a string, so hashes are stable across runs"""
+    return pandas.read_csv(csv_file, dtype=str, keep_default_na=False)
+
+
+def read_row_hashes(hash_file: Path) -> Series:
+    """Read row hashes saved by a previous run"""
+    if not hash_file.exists():
+        return Series(dtype="uint64", name="row_hash")
+    df = pandas.read_csv(hash_file, dtype={"key": "str", "row_hash": "uint64"})
+    return df.set_index("key")["row_hash"]
+
+
+def find_previous_run(data_root: Path, run_dir: Path) -> Path | None:
+    """
+    Find the most recent run before the given one which saved row hashes.
+
+    :param data_root: Base data directory containing YYYY/MM/DD run directories
+    :param run_dir: Directory of the current run
+
+    :return Path | None: Directory of the previous run, if any
+    """
+    current = run_dir.relative_to(data_root).as_posix()
+    previous_runs = sorted(
+        run
+        for hash_dir in data_root.glob("*/*/*/changeset/hashes")
+        if (run := hash_dir.parent.parent.relative_to(data_root).as_posix()) < current
+    )
+    if not previous_runs:
+        return None
+    return data_root / previous_runs[-1]
+
+
+def build_changeset(
+    csv_dir: Path, changeset_dir: Path, previous_changeset_dir: Path | None
+) -> dict[str, Any]:
+    """
+    Hash every output table of a run, diff it against the previous run and save both
+    the hashes and the resulting changeset to the changeset directory.
+
+    :param csv_dir: Base CSV directory of the current run, containing details and links subdirectories
+    :param changeset_dir: Directory to save row hashes and changeset.json to
+    :param previous_changeset_dir: Changeset directory of the previous run, or None on the first run
+
+    :return dict[str, Any]: Changeset of inserted/updated/deleted keys for each table
+    """
+    if not isinstance(csv_dir, Path):
+        raise TypeError(f"Expected Path, got {type(csv_dir)}")
+
+    table_names = {
+        csv_file.relative_to(csv_dir).with_suffix("").as_posix()
+        for csv_file in csv_dir.glob("*/*.csv")
+    }
+    if previous_changeset_dir is not None:
+        table_names |= {
+            hash_file.relative_to(previous_changeset_dir / "hashes")
+            .with_suffix("")
+            .as_posix()
+            for hash_file in (previous_changeset_dir / "hashes").glob("*/*.csv")
+        }
+
+    changeset: dict[str, Any] = {
+        "previous_run": (
+            None
+            if previous_changeset_dir is None
+            else str(previous_changeset_dir.parent)
+        ),
+        "tables": {},
+    }
+    for table_name in sorted(table_names):
+        csv_file = csv_dir / f"{table_name}.csv"
+        current = (
+            compute_row_hashes(table_name, read_table_csv(csv_file))
+            if csv_file.exists()
+            else Series(dtype="uint64", name="row_hash")
+        )
+        previous = (
+            read_row_hashes(previous_changeset_dir / "hashes" / f"{table_name}.csv")
+            if previous_changeset_dir is not None
+            else Series(dtype="uint64", name="row_hash")
+        )
+
+        hash_file = changeset_dir / "hashes" / f"{table_name}.csv"
+        hash_file.parent.mkdir(parents=True, exist_ok=True)
+        current.rename_axis("key").reset_index().to_csv(hash_file, index=False)
+
+        changeset["tables"][table_name] = table_changes = diff_row_hashes(
+            previous, current
+        )
+        logging.info(
+            f"{table_name}: {len(table_changes['inserted']):,} inserted, "
+            f"{len(table_changes['updated']):,} updated, "
+            f"{len(table_changes['deleted']):,} deleted"
+        )
+
+    with open(changeset_dir / "changeset.json", "w", encoding="utf-8") as file:
+        json.dump(changeset, file)
+
+    return changeset
+
+
+def load_changeset(changeset_dir: Path) -> dict[str, Any] | None:
+    """
+    Load the changeset saved for a run.
+
+    :param changeset_dir: Changeset directory of the run
+
+    :return dict[str, Any] | None: Changeset, or None if the run has no changeset
+    """
+    changeset_file = changeset_dir / "changeset.json"
+    if not changeset_file.exists():
+        return None
+    with open(changeset_file, "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def changed_game_ids(changeset: dict[str, Any]) -> set[int]:
+    """
+    Collect the ids of all games whose details or links changed.
+
+    :param changeset: Changeset as returned by build_changeset
+
+    :return set[int]: Ids of inserted, updated or deleted games
+    """
+    game_ids: set[int] = set()
+    for table_name, changes in changeset["tables"].items():
+        if table_name != "details/game_details" and not table_name.startswith("links/"):
+            continue
+        for keys in changes.values():
+            game_ids.update(int(key.split(KEY_SEPARATOR)[0]) for key in keys)
+    return game_ids
@@ -0,0 +1,370 @@
+"""
+compact.py - Compaction and retention for the pipeline data lake.
+
+Daily run directories of completed months are rolled into one compressed Parquet dataset
+per table and month, keeping only the rows that changed since the previous day and a
+tombstone for each row deleted since the previous day. Every month starts with a complete
+snapshot, so a month's rows can be replayed without the months before it. Days are
+compacted one at a time, in date order, against the row hashes of the live rows. Raw XML
+older than the configured retention period is deleted.
+"""
+
+import logging
+import shutil
+from datetime import date, timedelta
+from pathlib import Path
+
+import numpy
+import pandas
+import pyarrow  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+from common import config  # type: ignore
+from pandas import DataFrame, Series
+from pipeline.changeset import (  # type: ignore
+    get_key_columns,
+    read_table_csv,
+)
+
+SNAPSHOT_DATE_COLUMN = "snapshot_date"
+# True on tombstone rows, recording that a key was missing from the snapshot of that date
+DELETED_COLUMN = "deleted"
+# Run subdirectories removed once their contents are compacted
+COMPACTED_SUBDIRS = ("csv", "rankings_dumps")
+
+
+def list_run_dirs(data_root: Path) -> dict[date, Path]:
+    """
+    Find every daily run directory in the data lake.
+
+    :param data_root: Base data directory containing YYYY/MM/DD run directories
+
+    :return dict[date, Path]: Run directories keyed on their date, in date order
+    """
+    run_dirs = {}
+    for run_dir in data_root.glob("[0-9][0-9][0-9][0-9]/[0-9][0-9]/[0-9][0-9]"):
+        year, month, day = run_dir.relative_to(data_root).parts
+        try:
+            run_dirs[date(int(year), int(month), int(day))] = run_dir
+        except ValueError:
+            logging.warning(f"Ignoring invalid run directory {run_dir}")
+    return dict(sorted(run_dirs.items()))
+
+
+def list_run_tables(run_dir: Path) -> dict[str, Path]:
+    """
+    Find the table files of a run which are compacted.
+
+    :param run_dir: Daily run directory
+
+    :return dict[str, Path]: CSV files keyed on table name, e.g. details/game_details
+    """
+    csv_dir = run_dir / "csv"
+    tables = {
+        csv_file.relative_to(csv_dir).with_suffix("").as_posix(): csv_file
+        for csv_file in csv_dir.glob("*/*.csv")
+    }
+    tables.update(
+        {
+            f"rankings/{csv_file.stem}": csv_file
+            for csv_file in (run_dir / "rankings_dumps").glob("*.csv")
+        }
+    )
+    return tables
+
+
+def get_partition_path(output_dir: Path, table_name: str, month: str) -> Path:
+    """Path of the Parquet file holding a table's rows for a month"""
+    return output_dir / table_name.split("/")[-1] / f"month={month}" / "part-0.parquet"
+
+
+def _row_hashes(df: DataFrame, key_columns: list[str], columns: list[str]) -> Series:
+    """Content hash of every row, indexed by the key columns"""
+    return Series(
+        pandas.util.hash_pandas_object(df[columns], index=False).to_numpy(),
+        index=pandas.MultiIndex.from_frame(df[key_columns]),
+    )
+
+
+def _previous_hashes(
+    live: Series, current: Series
+) -> tuple[numpy.ndarray, numpy.ndarray]:
+    """Whether each key of current is live, and its live row hash, 0 if it isn't"""
+    positions = live.index.get_indexer(current.index)
+    found = positions >= 0
+    previous: numpy.ndarray = numpy.zeros(len(current), dtype="uint64")
+    previous[found] = live.to_numpy()[positions[found]]
+    return found, previous
+
+
+def compact_snapshot(
+    df: DataFrame,
+    live: Series,
+    columns: list[str],
+    key_columns: list[str],
+    snapshot_date: str,
+) -> tuple[DataFrame, Series]:
+    """
+    Compact a complete daily snapshot of a table against the rows live before it.
+
+    :param df: Rows of the snapshot, with every column of the table
+    :param live: Row hashes of the live rows before the snapshot, indexed by key
+    :param columns: Columns of the table, without snapshot_date and deleted
+    :param key_columns: Columns uniquely identifying a row within a snapshot
+    :param snapshot_date: Date of the snapshot, as YYYY-MM-DD
+
+    :return tuple[DataFrame, Series]: New and changed rows, and a tombstone for every live
+        key missing from the snapshot, sorted by key. Row hashes of the rows live after it.
+    """
+    df = df.drop_duplicates(subset=key_columns, keep="last")
+    current = _row_hashes(df, key_columns, columns)
+    found, previous = _previous_hashes(live, current)
+    changed = df[~found | (previous != current.to_numpy())]
+
+    tombstones = (
+        live.index.difference(current.index)
+        .to_frame(index=False)
+        .reindex(columns=columns, fill_value="")
+    )
+    rows = pandas.concat(
+        [
+            changed.assign(
+                **{SNAPSHOT_DATE_COLUMN: snapshot_date, DELETED_COLUMN: False}
+            ),
+            tombstones.assign(
+                **{SNAPSHOT_DATE_COLUMN: snapshot_date, DELETED_COLUMN: True}
+            ),
+        ],
+        ignore_index=True,
+    )
+    return rows.sort_values(key_columns, kind="stable"), current
+
+
+def replay_compacted_rows(
+    df: DataFrame, live: Series, columns: list[str], key_columns: list[str]
+) -> tuple[DataFrame, Series]:
+    """
+    Replay the previously compacted rows of a date against the rows live before it, dropping
+    rows which no longer change anything, e.g. after backfilling an earlier day.
+
+    :param df: Changed rows and tombstones of the date
+    :param live: Row hashes of the live rows before the date, indexed by key
+    :param columns: Columns of the table, without snapshot_date and deleted
+    :param key_columns: Columns uniquely identifying a row within a snapshot
+
+    :return tuple[DataFrame, Series]: Rows still changing the table, and row hashes of the
+        rows live after the date
+    """
+    current = _row_hashes(df, key_columns, columns)
+    deleted = df[DELETED_COLUMN].to_numpy(dtype=bool)
+    found, previous = _previous_hashes(live, current)
+    keep = numpy.where(deleted, found, ~found | (previous != current.to_numpy()))
+
+    live = pandas.concat([live[~live.index.isin(current.index)], current[~deleted]])
+    return df[keep], live
+
+
+def read_compacted_rows(partition_path: Path, snapshot_date: str) -> DataFrame:
+    """Read the rows of one date from a compacted Parquet partition"""
+    df = pq.read_table(
+        partition_path, filters=[(SNAPSHOT_DATE_COLUMN, "==", snapshot_date)]
+    ).to_pandas()
+    if DELETED_COLUMN not in df.columns:
+        # Partitions compacted before tombstones were recorded have no deleted column
+        df[DELETED_COLUMN] = False
+    return df
+
+
+def compact_table(
+    table_name: str, csv_files: dict[str, Path], partition_path: Path
+) -> tuple[int, int]:
+    """
+    Compact the daily snapshots of a table for a month into its Parquet partition, merging
+    with the rows already compacted for other dates. Dates are processed one at a time
+    against the row hash of every live key, and written out as they go, so only a single
+    day's rows are held in memory.
+
+    :param table_name: Name of the table, e.g. details/game_details
+    :param csv_files: Daily snapshot files of the table keyed on their date, as YYYY-MM-DD
+    :param partition_path: Path of the table's Parquet partition for the month
+
+    :return tuple[int, int]: Number of rows read and written
+    """
+    columns = list(
+        dict.fromkeys(
+            column
+            for csv_file in csv_files.values()
+            for column in pandas.read_csv(csv_file, nrows=0).columns
+        )
+    )
+    compacted_dates: list[str] = []
+    if partition_path.exists():
+        schema = pq.read_schema(partition_path)
+        columns += [
+            column
+            for column in schema.names
+            if column not in columns
+            and column not in (SNAPSHOT_DATE_COLUMN, DELETED_COLUMN)
+        ]
+        compacted_dates = (
+            pq.read_table(partition_path, columns=[SNAPSHOT_DATE_COLUMN])[
+                SNAPSHOT_DATE_COLUMN
+            ]
+            .unique()
+            .to_pylist()
+        )
+    key_columns = get_key_columns(table_name, DataFrame(columns=columns))
+
+    schema = pyarrow.schema(
+        [(column, pyarrow.string()) for column in columns]
+        + [(SNAPSHOT_DATE_COLUMN, pyarrow.string()), (DELETED_COLUMN, pyarrow.bool_())]
+    )
+    live = Series(
+        dtype="uint64", index=pandas.MultiIndex.from_tuples([], names=key_columns)
+    )
+    rows_read = rows_written = 0
+
+    partition_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = partition_path.with_suffix(".parquet.tmp")
+    with pq.ParquetWriter(tmp_path, schema, compression="zstd") as writer:
+        for snapshot_date in sorted({*csv_files, *compacted_dates}):
+            # A day's snapshot supersedes rows compacted for it before
+            if snapshot_date in csv_files:
+                df = read_table_csv(csv_files[snapshot_date])
+                df = df.reindex(columns=columns, fill_value="")
+                rows, live = compact_snapshot(
+                    df, live, columns, key_columns, snapshot_date
+                )
+            else:
+                df = read_compacted_rows(partition_path, snapshot_date)
+                df = df.reindex(
+                    columns=[*columns, SNAPSHOT_DATE_COLUMN, DELETED_COLUMN]
+                ).fillna({column: "" for column in columns})
+                rows, live = replay_compacted_rows(df, live, columns, key_columns)
+
+            rows_read += len(df)
+            rows_written += len(rows)
+            if not rows.empty:
+                writer.write_table(
+                    pyarrow.Table.from_pandas(rows, schema=schema, preserve_index=False)
+                )
+    tmp_path.replace(partition_path)
+    return rows_read, rows_written
+
+
+def compact_month(
+    month: str, run_dirs: dict[date, Path], output_dir: Path
+) -> dict[str, int]:
+    """
+    Roll the daily tables of a month into one Parquet file per table, merging with any
+    previously compacted data for the month.
+
+    :param month: Month being compacted, as YYYY-MM
+    :param run_dirs: Daily run directories of the month keyed on their date
+    :param output_dir: Base directory of the compacted dataset
+
+    :return dict[str, int]: Number of rows written for each table
+    """
+    csv_files: dict[str, dict[str, Path]] = {}
+    for run_date, run_dir in run_dirs.items():
+        for table_name, csv_file in list_run_tables(run_dir).items():
+            csv_files.setdefault(table_name, {})[run_date.isoformat()] = csv_file
+
+    rows_written = {}
+    for table_name, table_files in csv_files.items():
+        rows_read, rows_written[table_name] = compact_table(
+            table_name,
+            table_files,
+            get_partition_path(output_dir, table_name, month),
+        )
+        logging.info(
+            f"Compacted {rows_read:,} rows of {table_name} for {month} "
+            f"into {rows_written[table_name]:,} rows."
+        )
+
+    return rows_written
+
+
+def remove_compacted_files(run_dir: Path, keep_hashes: bool) -> None:
+    """
+    Remove the files of a daily run whose contents were compacted.
+
+    :param run_dir: Daily run directory
+    :param keep_hashes: Keep the run's changeset row hashes, needed to diff the next run against
+    """
+    for subdir in COMPACTED_SUBDIRS:
+        shutil.rmtree(run_dir / subdir, ignore_errors=True)
+    if not keep_hashes:
+        shutil.rmtree(run_dir / "changeset" / "hashes", ignore_errors=True)
+
+
+def enforce_xml_retention(
+    run_dirs: dict[date, Path], today: date, retention_days: int
+) -> list[Path]:
+    """
+    Delete raw XML of runs older than the retention period.
+
+    :param run_dirs: Daily run directories keyed on their date
+    :param today: Current date
+    :param retention_days: Number of days to keep raw XML for
+
+    :return list[Path]: Deleted XML directories
+    """
+    cutoff = today - timedelta(days=retention_days)
+    deleted = []
+    for run_date, run_dir in run_dirs.items():
+        xml_dir = run_dir / "xml"
+        if run_date < cutoff and xml_dir.exists():
+            shutil.rmtree(xml_dir)
+            deleted.append(xml_dir)
+            logging.info(f"Deleted raw XML older than {retention_days} days: {xml_dir}")
+    return deleted
+
+
+def compact_data_lake(
+    data_root: Path, output_dir: Path, today: date, xml_retention_days: int
+) -> dict[str, dict[str, int]]:
+    """
+    Compact every completed month of the data lake and enforce raw XML retention.
+
+    :param data_root: Base data directory containing YYYY/MM/DD run directories
+    :param output_dir: Base directory of the compacted dataset
+    :param today: Current date. Months before the current one are compacted.
+    :param xml_retention_days: Number of days to keep raw XML for
+
+    :return dict[str, dict[str, int]]: Number of rows written per table, for each compacted month
+    """
+    run_dirs = list_run_dirs(data_root)
+    current_month = today.strftime("%Y-%m")
+    latest_hashes = max(
+        (
+            run_date
+            for run_date, run_dir in run_dirs.items()
+            if (run_dir / "changeset" / "hashes").exists()
+        ),
+        default=None,
+    )
+
+    months: dict[str, dict[date, Path]] = {}
+    for run_date, run_dir in run_dirs.items():
+        month = run_date.strftime("%Y-%m")
+        if month < current_month and list_run_tables(run_dir):
+            months.setdefault(month, {})[run_date] = run_dir
+
+    compacted = {}
+    for month, month_run_dirs in months.items():
+        compacted[month] = compact_month(month, month_run_dirs, output_dir)
+        for run_date, run_dir in month_run_dirs.items():
+            remove_compacted_files(run_dir, keep_hashes=run_date == latest_hashes)
+
+    enforce_xml_retention(run_dirs, today, xml_retention_days)
+    return compacted
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    compact_data_lake(
+        data_root=config.data_root,
+        output_dir=config.compacted_path,
+        today=date.today(),
+        xml_retention_days=config.xml_retention_days,
+    )
@@ -0,0 +1,198 @@
+"""
+dag.py - Minimal stage orchestration for pipeline jobs.
+
+Stages declare the files they read and write. A stage is skipped when its outputs exist
+and it completed more recently than all of its inputs and upstream stages, and stages
+whose dependencies are satisfied run concurrently.
+"""
+
+import logging
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+
+class StageFailedError(Exception):
+    """Raised when one or more stages of a DAG run fail."""
+
+
+@dataclass
+class Stage:
+    """
+    A single unit of pipeline work.
+
+    :param name: Unique name of the stage
+    :param func: Callable doing the work
+    :param inputs: Files or directories the stage reads
+    :param outputs: Files or directories the stage writes
+    :param depends_on: Names of stages which must complete before this one
+    """
+
+    name: str
+    func: Callable[[], Any]
+    inputs: list[Path] = field(default_factory=list)
+    outputs: list[Path] = field(default_factory=list)
+    depends_on: list[str] = field(default_factory=list)
+
+
+class Dag:
+    """
+    Directed acyclic graph of stages, with completion markers kept in a state directory.
+    """
+
+    def __init__(self, stages: Iterable[Stage], state_dir: Path) -> None:
+        """
+        Initialize the DAG.
+
+        :param stages: Stages making up the DAG
+        :param state_dir: Directory to keep stage completion markers in
+        """
+        self.stages: dict[str, Stage] = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+        self.state_dir = state_dir
+
+        for stage in self.stages.values():
+            for dependency in stage.depends_on:
+                if dependency not in self.stages:
+                    raise ValueError(
+                        f"Stage {stage.name} depends on unknown stage {dependency}"
+                    )
+        self._check_acyclic()
+
+    def _check_acyclic(self) -> None:
+        """Raise ValueError if the stage dependencies contain a cycle."""
+        visiting: set[str] = set()
+        visited: set[str] = set()
+
+        def visit(name: str) -> None:
+            if name in visited:
+                return
+            if name in visiting:
+                raise ValueError(f"Dependency cycle detected at stage {name}")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(dependency)
+            visiting.remove(name)
+            visited.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def marker_path(self, stage_name: str) -> Path:
+        """Path of the completion marker of the given stage"""
+        return self.state_dir / f"{stage_name}.done"
+
+    def is_fresh(self, stage: Stage) -> bool:
+        """
+        Check whether a stage's outputs are up to date.
+
+        :param stage: Stage to check
+
+        :return bool: True if the stage completed after all of its inputs and upstream stages changed
+        """
+        marker = self.marker_path(stage.name)
+        if not marker.exists() or not all(path.exists() for path in stage.outputs):
+            return False
+
+        completed_at = marker.stat().st_mtime
+        upstream = [path for path in stage.inputs if path.exists()] + [
+            self.marker_path(dependency)
+            for dependency in stage.depends_on
+            if self.marker_path(dependency).exists()
+        ]
+        return all(path.stat().st_mtime <= completed_at for path in upstream)
+
+    def _run_stage(self, stage: Stage, force: bool) -> bool:
+        """
+        Run a single stage unless it is fresh.
+
+        :return bool: True if the stage ran, False if it was skipped
+        """
+        if not force and self.is_fresh(stage):
+            logging.info(f"Stage {stage.name} is up to date, skipping.")
+            return False
+
+        if missing := [path for path in stage.inputs if not path.exists()]:
+            raise FileNotFoundError(
+                f"Stage {stage.name} is missing inputs: {', '.join(map(str, missing))}"
+            )
+
+        logging.info(f"Running stage {stage.name}...")
+        marker = self.marker_path(stage.name)
+        marker.unlink(missing_ok=True)
+        stage.func()
+        marker.parent.mkdir(parents=True, exist_ok=True)
+        marker.touch()
+        logging.info(f"Stage {stage.name} complete.")
+        return True
+
+    def run(
+        self,
+        targets: Iterable[str] | None = None,
+        force: bool = False,
+        max_workers: int = 4,
+    ) -> dict[str, bool]:
+        """
+        Run the selected stages in dependency order, concurrently where possible.
+        Dependencies outside the selection are not run, but their outputs must exist.
+
+        :param targets: Names of stages to run. Defaults to all stages.
+        :param force: Run stages even when their outputs are up to date
+        :param max_workers: Maximum number of stages to run at once
+
+        :return dict[str, bool]: Whether each selected stage ran (True) or was skipped (False)
+        """
+        selected = set(self.stages) if targets is None else set(targets)
+        if unknown := selected - set(self.stages):
+            raise ValueError(f"Unknown stages: {', '.join(sorted(unknown))}")
+
+        pending = {
+            name: set(self.stages[name].depends_on) & selected for name in selected
+        }
+        results: dict[str, bool] = {}
+        failures: dict[str, BaseException] = {}
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            running: dict[Future, str] = {}
+            while pending or running:
+                for name in [name for name, deps in pending.items() if not deps]:
+                    del pending[name]
+                    future = executor.submit(self._run_stage, self.stages[name], force)
+                    running[future] = name
+
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name = running.pop(future)
+                    if (error := future.exception()) is not None:
+                        logging.error(f"Stage {name} failed: {error}")
+                        failures[name] = error
+                        self._drop_dependents(name, pending)
+                        continue
+                    results[name] = future.result()
+                    for deps in pending.values():
+                        deps.discard(name)
+
+        if failures:
+            raise StageFailedError(
+                f"Failed stages: {', '.join(sorted(failures))}"
+            ) from next(iter(failures.values()))
+
+        return results
+
+    def _drop_dependents(self, failed: str, pending: dict[str, set[str]]) -> None:
+        """Remove every pending stage downstream of a failed stage."""
+        for name in [name for name, deps in pending.items() if failed in deps]:
+            if name in pending:
+                logging.warning(
+                    f"Skipping stage {name}: upstream stage {failed} failed."
+                )
+                del pending[name]
+                self._drop_dependents(name, pending)
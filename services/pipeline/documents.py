@@ -0,0 +1,107 @@
+"""
+documents.py - Denormalized game documents for single-lookup reads.
+
+Each game's details and the id and name of its linked mechanics, categories, designers,
+artists and publishers are materialized as one JSONB document in game_documents. After a
+load only the documents of games in the run's changeset are rebuilt.
+"""
+
+import logging
+from typing import Any
+
+from pipeline.changeset import changed_game_ids  # type: ignore
+from sqlalchemy import Engine, text
+
+# Linked entities of a document as (document field, link table, details table, column prefix)
+DOCUMENT_LINKS = (
+    ("mechanics", "game_mechanic_link", "mechanic_details", "mechanic"),
+    ("categories", "game_category_link", "category_details", "category"),
+    ("designers", "game_designer_link", "designer_details", "designer"),
+    ("artists", "game_artist_link", "artist_details", "artist"),
+    ("publishers", "game_publisher_link", "publisher_details", "publisher"),
+)
+
+
+def build_documents_query(incremental: bool) -> str:
+    """
+    Build the SQL inserting the documents of games from game_details.
+
+    :param incremental: Only build the documents of the games in the :game_ids parameter
+
+    :return str: INSERT ... SELECT statement
+    """
+    link_fields = ",\n".join(
+        f"""        '{field}', COALESCE((
+            SELECT jsonb_agg(
+                jsonb_build_object('id', d.{prefix}_id, 'name', d.{prefix}_name)
+                ORDER BY d.{prefix}_id
+            )
+            FROM {link_table} l JOIN {details_table} d USING ({prefix}_id)
+            WHERE l.game_id = g.game_id
+        ), '[]'::jsonb)"""
+        for field, link_table, details_table, prefix in DOCUMENT_LINKS
+    )
+    where = "WHERE g.game_id = ANY(:game_ids)" if incremental else ""
+    return f"""
+    INSERT INTO game_documents (game_id, document)
+    SELECT g.game_id, (to_jsonb(g) - 'search_vector') || jsonb_build_object(
+{link_fields}
+    )
+    FROM game_details g
+    {where}
+    """
+
+
+def get_game_ids_to_refresh(changeset: dict[str, Any] | None) -> set[int] | None:
+    """
+    Find the games whose documents are affected by a changeset.
+
+    :param changeset: Changeset as returned by build_changeset, or None if the run has none
+
+    :return set[int] | None: Ids of games to refresh, or None if every document must be rebuilt.
+        That is the case without a changeset against a previous run, or when a linked entity was renamed.
+    """
+    if changeset is None or changeset.get("previous_run") is None:
+        return None
+
+    linked_details_tables = {
+        f"details/{details_table}" for _, _, details_table, _ in DOCUMENT_LINKS
+    }
+    for table_name, changes in changeset["tables"].items():
+        if table_name in linked_details_tables and changes.get("updated"):
+            return None
+    return changed_game_ids(changeset)
+
+
+def refresh_game_documents(engine: Engine, game_ids: set[int] | None = None) -> int:
+    """
+    Rebuild game documents in a single transaction, so readers never see a partial refresh.
+
+    :param engine: SQLAlchemy engine of the database
+    :param game_ids: Ids of the games to refresh, or None to rebuild every document
+
+    :return int: Number of documents written
+    """
+    if game_ids is not None and not game_ids:
+        logging.info("No changed games, game documents are up to date.")
+        return 0
+
+    with engine.begin() as connection:
+        if game_ids is None:
+            connection.execute(text("DELETE FROM game_documents"))
+            result = connection.execute(text(build_documents_query(incremental=False)))
+        else:
+            parameters = {"game_ids": sorted(game_ids)}
+            connection.execute(
+                text("DELETE FROM game_documents WHERE game_id = ANY(:game_ids)"),
+                parameters,
+            )
+            result = connection.execute(
+                text(build_documents_query(incremental=True)), parameters
+            )
+
+    logging.info(
+        f"Refreshed {result.rowcount:,} game documents "
+        f"({'all games' if game_ids is None else f'{len(game_ids):,} changed games'})."
+    )
+    return result.rowcount
@@ -1,6 +1,7 @@
 import html.parser
 import logging
 import zipfile
+from collections.abc import Generator
 from http.client import HTTPException
 from io import BytesIO
 from pathlib import Path
@@ -85,12 +86,16 @@ def download_latest_rankings_dump(output_file_path: Path) -> Path:
     return output_file_path
 
 
-def extract_game_data(game_ids: list[str], destination_dir: Path) -> None:
+def iter_game_data(
+    game_ids: list[str], destination_dir: Path
+) -> Generator[str, None, None]:
     """
-    Extract game data for all provided game IDs
+    Extract game data for all provided game IDs, saving each batch before yielding it
 
     :param game_ids: list of game IDs
     :param destination_dir: Filepath of directory to save xml files
+
+    :return Generator[str]: Yields XML of each batch of games
     """
     destination_dir.mkdir(parents=True, exist_ok=True)
     for num, xml in enumerate(BggXmlApi2.bulk_query_things(game_ids)):
@@ -98,4 +103,16 @@ def extract_game_data(game_ids: list[str], destination_dir: Path) -> None:
         with open(file_path, "w", encoding="utf-8") as file:
             file.write(xml)
             logging.info(f"Extracted {file_path}")
+        yield xml
         sleep(5)
+
+
+def extract_game_data(game_ids: list[str], destination_dir: Path) -> None:
+    """
+    Extract game data for all provided game IDs
+
+    :param game_ids: list of game IDs
+    :param destination_dir: Filepath of directory to save xml files
+    """
+    for _ in iter_game_data(game_ids, destination_dir):
+        pass
@@ -1,20 +1,25 @@
+import hashlib
 import logging
 from itertools import chain
 from pathlib import Path
 
 import pandas
 from common import config  # type: ignore
-from sqlalchemy import create_engine
+from pandas import DataFrame
+from sqlalchemy import Engine, create_engine, text
 
 
-def load_csv_files_into_db(csv_base_dir: Path) -> None:
+def load_csv_files_into_db(csv_base_dir: Path) -> int:
     """
     Load contents of all CSV files into SQL database table.
     Loads CSV files from details and links subdirectories, respectively.
 
     :param csv_base_dir: Path of CSV base directory
+
+    :return int: Number of rows loaded
     """
     engine = create_engine(config.db_url)
+    rows_loaded = 0
 
     csv_files = chain(
         (csv_base_dir / "details").glob("*.csv"),
@@ -29,5 +34,107 @@ def load_csv_files_into_db(csv_base_dir: Path) -> None:
             table_df.to_sql(
                 name=table_name, con=engine, if_exists="append", index=False
             )
+            rows_loaded += len(table_df)
         except Exception as e:
             logging.error(f"Error loading {csv_file.name}: {e}")
+
+    return rows_loaded
+
+
+def load_dfs_into_db(
+    dfs: dict[str, DataFrame],
+    engine: Engine,
+    loaded_keys: dict[str, set] | None = None,
+) -> None:
+    """
+    Load a chunk of processed data into SQL database tables.
+    Details tables are loaded before links tables, so foreign keys are satisfied.
+
+    :param dfs: DataFrames keyed on their details/ or links/ table path, as returned by transform_xml_string
+    :param engine: SQLAlchemy engine to load with
+    :param loaded_keys: Ids already loaded into each details table by earlier chunks of the same run.
+        Rows with these ids are skipped, and the set is updated with the newly loaded ids.
+    """
+    if loaded_keys is None:
+        loaded_keys = {}
+
+    for name in sorted(dfs, key=lambda name: not name.startswith("details/")):
+        table_name = name.split("/")[-1]
+        table_df = dfs[name].drop_duplicates()
+
+        if name.startswith("details/"):
+            key_column = table_df.columns[0]
+            seen = loaded_keys.setdefault(table_name, set())
+            table_df = table_df[~table_df[key_column].isin(seen)]
+            table_df = table_df.drop_duplicates(subset=key_column)
+            if table_df.empty:
+                continue
+
+        logging.info(f"Loading {len(table_df):,} rows into table {table_name}...")
+        try:
+            table_df.to_sql(
+                name=table_name, con=engine, if_exists="append", index=False
+            )
+        except Exception as e:
+            logging.error(f"Error loading chunk into {table_name}: {e}")
+            continue
+
+        if name.startswith("details/"):
+            loaded_keys[table_name].update(table_df[table_df.columns[0]])
+
+
+def compute_data_version(csv_base_dir: Path) -> str:
+    """
+    Compute a version identifier for the contents of all CSV files of a run.
+
+    :param csv_base_dir: Path of CSV base directory
+
+    :return str: Hex digest of the CSV file names and contents
+    """
+    digest = hashlib.sha256()
+    for csv_file in sorted(csv_base_dir.glob("*/*.csv")):
+        digest.update(csv_file.relative_to(csv_base_dir).as_posix().encode())
+        with open(csv_file, "rb") as file:
+            while chunk := file.read(1024 * 1024):
+                digest.update(chunk)
+    return digest.hexdigest()[:16]
+
+
+def record_data_version(version: str) -> None:
+    """
+    Record a newly loaded data version, which the web service uses to validate caches.
+
+    :param version: Data version identifier
+    """
+    engine = create_engine(config.db_url)
+    with engine.begin() as connection:
+        connection.execute(
+            text(
+                "INSERT INTO data_version (version) VALUES (:version) "
+                "ON CONFLICT (version) DO UPDATE SET loaded_at = now()"
+            ),
+            {"version": version},
+        )
+    logging.info(f"Recorded data version {version}")
+
+
+def merge_search_index_pending_list() -> int:
+    """
+    Merge rows appended to the full-text search index's pending list during a bulk load into
+    the main index, and refresh planner statistics for the loaded games.
+    Inserts stay cheap while loading, and searches don't scan a long pending list afterwards.
+    Both require the pipeline user to own game_details, see db/init/05_create_indexes.sql.
+
+    :return int: Number of pending list pages merged
+    """
+    engine = create_engine(config.db_url)
+    with engine.begin() as connection:
+        pages = connection.execute(
+            text(
+                "SELECT gin_clean_pending_list("
+                "'game_details_search_vector_idx'::regclass)"
+            )
+        ).scalar()
+        connection.execute(text("ANALYZE game_details"))
+    logging.info(f"Merged {pages:,} pending pages into the search index.")
+    return pages
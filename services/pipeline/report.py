@@ -0,0 +1,172 @@
+"""
+report.py - Per-stage performance reporting for pipeline jobs.
+
+Each stage records wall and CPU time, the process's peak RSS so far and the rows or bytes it
+processed. The report is written as JSON next to the run's data. Traced Python allocations
+and cProfile output may optionally be captured for every stage.
+"""
+
+import cProfile
+import json
+import logging
+import resource
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+
+@dataclass
+class StageMetrics:
+    """Resource usage of a single pipeline stage."""
+
+    name: str
+    status: str = "running"
+    started_at: str = ""
+    wall_time_s: float = 0.0
+    cpu_time_s: float = 0.0
+    # High-water mark of the whole process when the stage finished, not of the stage alone
+    process_peak_rss_mb: float = 0.0
+    traced_peak_mb: float | None = None
+    top_allocations: list[dict[str, Any]] = field(default_factory=list)
+    rows: int | None = None
+    bytes: int | None = None
+    profile_path: str | None = None
+
+
+def get_peak_rss_mb() -> float:
+    """Peak resident set size of the process so far, in MiB"""
+    # ru_maxrss is reported in KiB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def get_path_size(path: Path) -> int:
+    """Total size in bytes of a file, or of every file below a directory"""
+    if path.is_file():
+        return path.stat().st_size
+    return sum(file.stat().st_size for file in path.rglob("*") if file.is_file())
+
+
+class RunReport:
+    """
+    Collects StageMetrics for a pipeline run and saves them as a JSON report.
+
+    CPU time, peak RSS and traced allocations are process-wide, so stages running
+    concurrently are attributed each other's usage.
+    """
+
+    def __init__(
+        self,
+        report_dir: Path,
+        profile: bool = False,
+        trace_memory: bool = False,
+        top_allocations: int = 10,
+    ) -> None:
+        """
+        Initialize the run report.
+
+        :param report_dir: Directory to write the report and profiles to
+        :param profile: Capture cProfile output for every stage
+        :param trace_memory: Record traced peak memory and top allocators with tracemalloc.
+            Tracing slows down every allocation, so it is off by default.
+        :param top_allocations: Number of top allocating source lines to record per stage
+        """
+        self.report_dir = report_dir
+        self.profile = profile
+        self.trace_memory = trace_memory
+        self.top_allocations = top_allocations
+        self.started_at = datetime.now(timezone.utc)
+        self.stages: list[StageMetrics] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageMetrics]:
+        """
+        Measure the enclosed block as a stage. Set rows and bytes on the yielded
+        metrics to record how much data the stage processed.
+
+        :param name: Name of the stage
+        """
+        metrics = StageMetrics(
+            name=name, started_at=datetime.now(timezone.utc).isoformat()
+        )
+        self.stages.append(metrics)
+
+        if self.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            snapshot_before = tracemalloc.take_snapshot()
+
+        profiler = cProfile.Profile() if self.profile else None
+        wall_start = time.perf_counter()
+        cpu_start = time.process_time()
+        if profiler is not None:
+            profiler.enable()
+
+        try:
+            yield metrics
+            metrics.status = "succeeded"
+        except BaseException:
+            metrics.status = "failed"
+            raise
+        finally:
+            if profiler is not None:
+                profiler.disable()
+            metrics.wall_time_s = round(time.perf_counter() - wall_start, 3)
+            metrics.cpu_time_s = round(time.process_time() - cpu_start, 3)
+            metrics.process_peak_rss_mb = round(get_peak_rss_mb(), 1)
+
+            if self.trace_memory:
+                metrics.traced_peak_mb = round(
+                    tracemalloc.get_traced_memory()[1] / 1024**2, 1
+                )
+                metrics.top_allocations = [
+                    {
+                        "location": str(stat.traceback),
+                        "size_diff_kb": round(stat.size_diff / 1024, 1),
+                        "count_diff": stat.count_diff,
+                    }
+                    for stat in tracemalloc.take_snapshot().compare_to(
+                        snapshot_before, "lineno"
+                    )[: self.top_allocations]
+                ]
+
+            if profiler is not None:
+                profile_path = self.report_dir / "profiles" / f"{name}.prof"
+                profile_path.parent.mkdir(parents=True, exist_ok=True)
+                profiler.dump_stats(profile_path)
+                metrics.profile_path = str(profile_path)
+
+            logging.info(
+                f"Stage {name} {metrics.status} in {metrics.wall_time_s:.1f}s "
+                f"(cpu {metrics.cpu_time_s:.1f}s, process peak rss {metrics.process_peak_rss_mb:.0f} MiB)"
+            )
+
+    def to_dict(self) -> dict[str, Any]:
+        """Report contents as a JSON-serializable dictionary"""
+        return {
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now(timezone.utc).isoformat(),
+            "process_peak_rss_mb": round(get_peak_rss_mb(), 1),
+            "stages": [asdict(stage) for stage in self.stages],
+        }
+
+    def save(self) -> Path:
+        """
+        Write the report to the report directory.
+
+        :return Path: Path of the written report
+        """
+        self.report_dir.mkdir(parents=True, exist_ok=True)
+        report_path = (
+            self.report_dir
+            / f"run_report_{self.started_at.strftime('%Y%m%dT%H%M%S')}.json"
+        )
+        with open(report_path, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+        logging.info(f"Run report written to {report_path}")
+        return report_path
@@ -1,45 +1,375 @@
+import argparse
 import logging
+from datetime import date, timedelta
+from pathlib import Path
 
 import pandas
 from common import config  # type: ignore
+from common.snapshot_file import snapshot_file_path  # type: ignore
+from pipeline.aggregates import refresh_aggregate_views  # type: ignore
+from pipeline.changeset import (  # type: ignore
+    build_changeset,
+    find_previous_run,
+    load_changeset,
+)
+from pipeline.compact import compact_data_lake  # type: ignore
+from pipeline.dag import Dag, Stage  # type: ignore
+from pipeline.documents import (  # type: ignore
+    get_game_ids_to_refresh,
+    refresh_game_documents,
+)
 from pipeline.extract import (  # type: ignore
     download_latest_rankings_dump,
     extract_game_data,
 )
-from pipeline.load import load_csv_files_into_db  # type: ignore
+from pipeline.load import (  # type: ignore
+    compute_data_version,
+    load_csv_files_into_db,
+    merge_search_index_pending_list,
+    record_data_version,
+)
+from pipeline.report import RunReport, get_path_size  # type: ignore
+from pipeline.similarity import refresh_similar_games  # type: ignore
+from pipeline.snapshot import publish_catalog_snapshot  # type: ignore
+from pipeline.streaming import run_pipelined  # type: ignore
 from pipeline.transform_xml import (  # type: ignore
     save_df_to_csv,
     transform_xml_files,
 )
+from sqlalchemy import create_engine
 
-if __name__ == "__main__":
-    logging.basicConfig(level=logging.INFO)
-    logging.info("--Starting job--")
+# Stages fetching live data from BGG, which cannot be backfilled for past dates
+LIVE_STAGES = {"download", "extract", "stream"}
+
+# Stages publishing a run to the database and web service. The documents stage records the
+# run's data version as the newest, so backfilling them would serve a past date as current.
+PUBLISH_STAGES = {"load", "aggregates", "similarity", "snapshot", "documents"}
+
+
+def build_stages(
+    run_dir: Path, report: RunReport | None = None, pipelined: bool = False
+) -> list[Stage]:
+    """
+    Declare the stages of a pipeline job and the files each reads and writes.
+
+    :param run_dir: Data directory of the run, in the form DATA_PATH/YYYY/MM/DD
+    :param report: Run report to record stage metrics in. Defaults to a report in the run directory.
+    :param pipelined: Replace the extract, transform and load stages with a single
+        stream stage running them concurrently
+
+    :return list[Stage]: Job stages
+    """
+    rankings_csv_path = run_dir / "rankings_dumps"
+    rankings_csv_file = rankings_csv_path / "boardgames_ranks.csv"
+    xml_dir = run_dir / "xml"
+    csv_dir = run_dir / "csv"
+    changeset_dir = run_dir / "changeset"
+    if report is None:
+        report = RunReport(run_dir / "reports")
+
+    def download() -> None:
+        logging.info("Downloading latest ranking dump...")
+        with report.stage("download") as metrics:
+            download_latest_rankings_dump(output_file_path=rankings_csv_path)
+            metrics.bytes = get_path_size(rankings_csv_path)
+
+    def read_game_ids() -> list[str]:
+        game_id_list = pandas.read_csv(rankings_csv_file, usecols=["id"])["id"].tolist()
+        logging.info(f"Found {len(game_id_list):,} games in rankings dump.")
+
+        if config.top_k_only:
+            logging.info(f"Limiting extraction to the top {config.top_k_only} games.")
+            game_id_list = game_id_list[: config.top_k_only]
+        return game_id_list
+
+    def extract() -> None:
+        with report.stage("extract") as metrics:
+            game_id_list = read_game_ids()
+            logging.info("Extracting game data from BGG API...")
+            extract_game_data(game_ids=game_id_list, destination_dir=xml_dir)
+            metrics.rows = len(game_id_list)
+            metrics.bytes = get_path_size(xml_dir)
+
+    def transform() -> None:
+        logging.info("Transforming...")
+        with report.stage("transform") as metrics:
+            processed_dfs = transform_xml_files(xml_dir)
+            metrics.rows = sum(len(df) for df in processed_dfs.values())
+            metrics.bytes = get_path_size(xml_dir)
+        with report.stage("save") as metrics:
+            save_df_to_csv(destination_dir=csv_dir, **processed_dfs)
+            metrics.rows = sum(len(df) for df in processed_dfs.values())
+            metrics.bytes = get_path_size(csv_dir)
+
+    def changeset() -> None:
+        logging.info("Computing changeset against previous run...")
+        with report.stage("changeset") as metrics:
+            previous_run_dir = find_previous_run(config.data_root, run_dir)
+            changes = build_changeset(
+                csv_dir=csv_dir,
+                changeset_dir=changeset_dir,
+                previous_changeset_dir=(
+                    previous_run_dir / "changeset" if previous_run_dir else None
+                ),
+            )
+            metrics.rows = sum(
+                len(keys)
+                for table_changes in changes["tables"].values()
+                for keys in table_changes.values()
+            )
+
+    def load() -> None:
+        logging.info("Loading...")
+        with report.stage("load") as metrics:
+            metrics.rows = load_csv_files_into_db(csv_dir)
+            metrics.bytes = get_path_size(csv_dir)
+            merge_search_index_pending_list()
+        logging.info("Loading complete.")
+
+    def stream() -> None:
+        logging.info("Extracting, transforming and loading concurrently...")
+        with report.stage("stream") as metrics:
+            game_id_list = read_game_ids()
+            run_pipelined(game_ids=game_id_list, xml_dir=xml_dir, csv_dir=csv_dir)
+            merge_search_index_pending_list()
+            metrics.rows = len(game_id_list)
+            metrics.bytes = get_path_size(xml_dir) + get_path_size(csv_dir)
+        logging.info("Loading complete.")
 
-    rankings_csv_path = config.data_path / "rankings_dumps"
-    xml_dir = config.data_path / "xml"
-    csv_dir = config.data_path / "csv"
+    def aggregates() -> None:
+        logging.info("Refreshing aggregate views...")
+        with report.stage("aggregates") as metrics:
+            metrics.rows = refresh_aggregate_views(create_engine(config.db_url))
 
-    logging.info("Downloading latest ranking dump...")
-    download_latest_rankings_dump(output_file_path=rankings_csv_path)
-    game_id_list = pandas.read_csv(
-        rankings_csv_path / "boardgames_ranks.csv", usecols=["id"]
-    )["id"].tolist()
-    logging.info(f"Found {len(game_id_list):,} games in rankings dump.")
+    def similarity() -> None:
+        logging.info("Computing similar games...")
+        with report.stage("similarity") as metrics:
+            metrics.rows = refresh_similar_games(
+                create_engine(config.db_url), k=config.similar_games_top_k
+            )
 
-    if config.top_k_only:
-        logging.info(f"Limiting extraction to the top {config.top_k_only} games.")
-        game_id_list = game_id_list[: config.top_k_only]
+    def snapshot() -> None:
+        logging.info("Publishing catalogue snapshot...")
+        with report.stage("snapshot") as metrics:
+            version = compute_data_version(csv_dir)
+            metrics.rows = publish_catalog_snapshot(
+                create_engine(config.db_url),
+                directory=config.snapshot_path,
+                version=version,
+                keep=config.snapshot_retention,
+            )
+            metrics.bytes = get_path_size(
+                snapshot_file_path(config.snapshot_path, version)
+            )
 
-    logging.info("Extracting game data from BGG API...")
-    extract_game_data(game_ids=game_id_list, destination_dir=xml_dir)
+    def documents() -> None:
+        logging.info("Refreshing game documents...")
+        with report.stage("documents") as metrics:
+            game_ids = get_game_ids_to_refresh(load_changeset(changeset_dir))
+            metrics.rows = refresh_game_documents(
+                create_engine(config.db_url), game_ids
+            )
+            # Published once every derived table is current, as the web service caches on the version
+            record_data_version(compute_data_version(csv_dir))
 
-    logging.info("Transforming...")
-    processed_dfs = transform_xml_files(xml_dir)
-    save_df_to_csv(destination_dir=csv_dir, **processed_dfs)
+    def compact() -> None:
+        logging.info("Compacting data lake...")
+        with report.stage("compact") as metrics:
+            compacted = compact_data_lake(
+                data_root=config.data_root,
+                output_dir=config.compacted_path,
+                today=date.today(),
+                xml_retention_days=config.xml_retention_days,
+            )
+            metrics.rows = sum(
+                rows for month in compacted.values() for rows in month.values()
+            )
 
-    logging.info("Loading...")
-    load_csv_files_into_db(csv_dir)
-    logging.info("Loading complete.")
+    changeset_stage = Stage(
+        name="changeset",
+        func=changeset,
+        inputs=[csv_dir],
+        outputs=[changeset_dir / "changeset.json"],
+        depends_on=["stream" if pipelined else "transform"],
+    )
+    download_stage = Stage(name="download", func=download, outputs=[rankings_csv_file])
 
-    logging.info("--Job Complete--")
+    if pipelined:
+        return [
+            download_stage,
+            Stage(
+                name="stream",
+                func=stream,
+                inputs=[rankings_csv_file],
+                outputs=[xml_dir, csv_dir],
+                depends_on=["download"],
+            ),
+            changeset_stage,
+            Stage(name="aggregates", func=aggregates, depends_on=["stream"]),
+            Stage(name="similarity", func=similarity, depends_on=["stream"]),
+            Stage(name="snapshot", func=snapshot, depends_on=["stream"]),
+            Stage(
+                name="documents",
+                func=documents,
+                inputs=[changeset_dir / "changeset.json"],
+                depends_on=["changeset", "aggregates", "similarity", "snapshot"],
+            ),
+            Stage(name="compact", func=compact, depends_on=["changeset"]),
+        ]
+
+    return [
+        download_stage,
+        Stage(
+            name="extract",
+            func=extract,
+            inputs=[rankings_csv_file],
+            outputs=[xml_dir],
+            depends_on=["download"],
+        ),
+        Stage(
+            name="transform",
+            func=transform,
+            inputs=[xml_dir],
+            outputs=[csv_dir],
+            depends_on=["extract"],
+        ),
+        changeset_stage,
+        Stage(name="load", func=load, inputs=[csv_dir], depends_on=["transform"]),
+        Stage(name="aggregates", func=aggregates, depends_on=["load"]),
+        Stage(name="similarity", func=similarity, depends_on=["load"]),
+        Stage(name="snapshot", func=snapshot, depends_on=["load"]),
+        Stage(
+            name="documents",
+            func=documents,
+            inputs=[changeset_dir / "changeset.json"],
+            depends_on=["changeset", "load", "aggregates", "similarity", "snapshot"],
+        ),
+        Stage(name="compact", func=compact, depends_on=["changeset", "load"]),
+    ]
+
+
+def build_dag(
+    run_dir: Path, report: RunReport | None = None, pipelined: bool = False
+) -> Dag:
+    """Build the job DAG for the given run directory"""
+    return Dag(build_stages(run_dir, report, pipelined), state_dir=run_dir / ".stages")
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    """Parse pipeline job command line arguments"""
+    stage_names = list(
+        dict.fromkeys(
+            stage.name
+            for pipelined in (False, True)
+            for stage in build_stages(config.data_path, pipelined=pipelined)
+        )
+    )
+    parser = argparse.ArgumentParser(description="Run the bga-backend data pipeline.")
+    parser.add_argument(
+        "--stage",
+        action="append",
+        choices=stage_names,
+        help="Stage to run; may be repeated. Runs every stage by default.",
+    )
+    parser.add_argument(
+        "--start-date",
+        type=date.fromisoformat,
+        default=date.today(),
+        help="First run date (YYYY-MM-DD) to process. Defaults to today.",
+    )
+    parser.add_argument(
+        "--end-date",
+        type=date.fromisoformat,
+        help="Last run date (YYYY-MM-DD) to process. Defaults to the start date.",
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="Run stages even if their outputs are up to date.",
+    )
+    parser.add_argument(
+        "--pipelined",
+        action="store_true",
+        help="Extract, transform and load concurrently through bounded queues.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Capture cProfile output for every stage. Runs stages one at a time.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record traced peak memory and top allocators of every stage with tracemalloc.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=4,
+        help="Maximum number of stages to run concurrently.",
+    )
+    return parser.parse_args(argv)
+
+
+def select_targets(dag: Dag, stages: list[str] | None, run_date: date) -> set[str]:
+    """
+    Select the stages to run for a date. Past dates skip the live stages, and the publishing
+    stages unless they are named explicitly.
+
+    :param dag: Job DAG of the date
+    :param stages: Stages named with --stage, or None to run every stage
+    :param run_date: Run date
+
+    :return set[str]: Names of the stages to run
+    """
+    targets = set(stages or dag.stages)
+    if run_date == date.today():
+        return targets
+    if live := targets & LIVE_STAGES:
+        logging.warning(
+            f"Skipping live stages {', '.join(sorted(live))} for past date {run_date}."
+        )
+        targets -= live
+    if not stages and (publish := targets & PUBLISH_STAGES):
+        logging.warning(
+            f"Skipping publishing stages {', '.join(sorted(publish))} for past date "
+            f"{run_date}. Name them with --stage to publish it."
+        )
+        targets -= publish
+    return targets
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    end_date = args.end_date or args.start_date
+    if end_date < args.start_date:
+        raise ValueError("--end-date must not be before --start-date")
+
+    run_date = args.start_date
+    while run_date <= end_date:
+        logging.info(f"--Starting job for {run_date}--")
+        run_dir = config.get_run_path(run_date)
+        report = RunReport(
+            run_dir / "reports", profile=args.profile, trace_memory=args.trace_memory
+        )
+        dag = build_dag(run_dir, report, pipelined=args.pipelined)
+
+        targets = select_targets(dag, args.stage, run_date)
+
+        try:
+            dag.run(
+                targets=targets,
+                force=args.force,
+                # Only one profiler may be active at a time
+                max_workers=1 if args.profile else args.workers,
+            )
+        finally:
+            if report.stages:
+                report.save()
+        logging.info(f"--Job Complete for {run_date}--")
+        run_date += timedelta(days=1)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main()
@@ -0,0 +1,234 @@
+"""
+similarity.py - Precomputed "games like this" neighbours.
+
+Each game is described by a sparse feature vector: TF-IDF weighted indicators of its
+mechanics, categories, designers and publishers, each link type normalized and weighted
+on its own. Games sharing at least one linked entity are compared by the cosine of their
+vectors, blended with the closeness of their weight, player counts and playing time.
+Similarities are computed one block of games at a time with sparse matrix products, and
+the top-K neighbours of every game are stored in game_similarity.
+"""
+
+import io
+import logging
+
+import numpy as np
+import pandas
+from numpy.typing import NDArray
+from pandas import DataFrame
+from scipy import sparse  # type: ignore
+from sqlalchemy import Engine, text
+
+# Linked entities used as features as (link table, entity id column, weight)
+SIMILARITY_LINKS = (
+    ("game_mechanic_link", "mechanic_id", 1.0),
+    ("game_category_link", "category_id", 0.5),
+    ("game_designer_link", "designer_id", 0.5),
+    ("game_publisher_link", "publisher_id", 0.25),
+)
+
+NUMERIC_FEATURES = ("average_weight", "min_players", "max_players", "playing_time")
+
+# Share of the similarity score given to the numeric features
+NUMERIC_WEIGHT = 0.2
+
+# Games compared per sparse matrix product. Bounds the memory used by candidate pairs.
+BLOCK_SIZE = 256
+
+
+def build_link_features(game_ids: NDArray, links: list[DataFrame]) -> sparse.csr_array:
+    """
+    Build the sparse link feature matrix of games.
+
+    :param game_ids: Ids of the games, in matrix row order
+    :param links: Link table of each entry of SIMILARITY_LINKS, with game_id and entity id columns
+
+    :return sparse.csr_array: Row-normalized game by linked entity matrix
+    """
+    blocks = []
+    for (_, id_column, weight), link_df in zip(SIMILARITY_LINKS, links):
+        link_df = link_df[link_df["game_id"].isin(game_ids)]
+        rows = np.searchsorted(game_ids, link_df["game_id"].to_numpy())
+        columns, entity_ids = pandas.factorize(link_df[id_column])
+        block = sparse.csr_array(
+            (np.ones_like(rows, dtype=np.float32), (rows, columns)),
+            shape=(len(game_ids), len(entity_ids)),
+        )
+        block.sum_duplicates()
+        block.data[:] = 1.0
+
+        # Entities shared by many games say little about how alike two games are
+        document_frequency = np.bincount(block.indices, minlength=block.shape[1])
+        idf = np.log((1 + len(game_ids)) / (1 + document_frequency)) + 1
+        block = block @ sparse.diags_array(idf.astype(np.float32))
+        blocks.append(normalize_rows(block) * np.float32(np.sqrt(weight)))
+
+    return normalize_rows(sparse.hstack(blocks, format="csr"))
+
+
+def normalize_rows(matrix: sparse.csr_array) -> sparse.csr_array:
+    """Scale the non-empty rows of a sparse matrix to unit length"""
+    norms = np.sqrt(matrix.multiply(matrix).sum(axis=1))
+    norms[norms == 0] = 1
+    return sparse.csr_array(sparse.diags_array((1 / norms).astype(np.float32)) @ matrix)
+
+
+def build_numeric_features(details: DataFrame) -> NDArray:
+    """
+    Standardize the numeric features of games. Missing values and the zeros BGG reports
+    for unknown values are replaced with the mean.
+
+    :param details: Game details, with the NUMERIC_FEATURES columns
+
+    :return NDArray: Game by feature matrix of z-scores
+    """
+    values = details[list(NUMERIC_FEATURES)].astype("float64").replace(0, np.nan)
+    values["playing_time"] = np.log1p(values["playing_time"])
+    standardized = (values - values.mean()) / values.std(ddof=0).replace(0, 1)
+    return standardized.fillna(0).to_numpy(dtype=np.float32)
+
+
+def top_k_similar(
+    link_features: sparse.csr_array,
+    numeric_features: NDArray,
+    k: int,
+    block_size: int = BLOCK_SIZE,
+) -> tuple[NDArray, NDArray, NDArray]:
+    """
+    Find the k most similar games of every game, one block of games at a time.
+
+    :param link_features: Row-normalized link feature matrix
+    :param numeric_features: Standardized numeric feature matrix
+    :param k: Number of neighbours per game
+    :param block_size: Number of games compared per sparse matrix product
+
+    :return tuple[NDArray, NDArray, NDArray]: Row of each game, row of its neighbour and
+        similarity score, ordered by game and then descending score
+    """
+    n_games = link_features.shape[0]
+    transposed = link_features.T.tocsr()
+    squared_norms = (numeric_features**2).sum(axis=1)
+    games, neighbours, scores = [], [], []
+
+    for start in range(0, n_games, block_size):
+        stop = min(start + block_size, n_games)
+        # Only games sharing a linked entity have a non-zero link similarity
+        candidates = sparse.csr_array(link_features[start:stop] @ transposed)
+        rows = np.repeat(np.arange(stop - start), np.diff(candidates.indptr))
+        columns = candidates.indices
+
+        # Squared distances between the numeric features of the block and every game
+        distance = (
+            squared_norms[start:stop, None]
+            + squared_norms[None, :]
+            - 2 * numeric_features[start:stop] @ numeric_features.T
+        )
+        numeric_similarity = np.exp(
+            -np.maximum(distance[rows, columns], 0) / (2 * len(NUMERIC_FEATURES))
+        )
+        score = (
+            1 - NUMERIC_WEIGHT
+        ) * candidates.data + NUMERIC_WEIGHT * numeric_similarity
+        score[columns == rows + start] = -np.inf
+
+        for row in range(stop - start):
+            row_start, row_end = candidates.indptr[row], candidates.indptr[row + 1]
+            row_scores = score[row_start:row_end]
+            if len(row_scores) > k:
+                best = np.argpartition(-row_scores, k - 1)[:k]
+            else:
+                best = np.arange(len(row_scores))
+            best = best[np.lexsort((columns[row_start + best], -row_scores[best]))]
+            best = best[np.isfinite(row_scores[best])]
+
+            games.append(np.full(len(best), start + row))
+            neighbours.append(columns[row_start + best])
+            scores.append(row_scores[best])
+
+    if not games:
+        return np.empty(0, int), np.empty(0, int), np.empty(0, np.float32)
+    return np.concatenate(games), np.concatenate(neighbours), np.concatenate(scores)
+
+
+def compute_similar_games(
+    details: DataFrame, links: list[DataFrame], k: int, block_size: int = BLOCK_SIZE
+) -> DataFrame:
+    """
+    Compute the top-k most similar games of every game.
+
+    :param details: Game details, with game_id and the NUMERIC_FEATURES columns
+    :param links: Link table of each entry of SIMILARITY_LINKS
+    :param k: Number of neighbours per game
+    :param block_size: Number of games compared per sparse matrix product
+
+    :return DataFrame: game_id, similar_game_id, rank (1 for the most similar) and score
+    """
+    details = details.sort_values("game_id").reset_index(drop=True)
+    game_ids = details["game_id"].to_numpy()
+
+    games, neighbours, scores = top_k_similar(
+        build_link_features(game_ids, links),
+        build_numeric_features(details),
+        k,
+        block_size,
+    )
+    similar = DataFrame(
+        {
+            "game_id": game_ids[games],
+            "similar_game_id": game_ids[neighbours],
+            "score": scores.astype(np.float32),
+        }
+    )
+    similar.insert(2, "rank", similar.groupby("game_id").cumcount() + 1)
+    return similar
+
+
+def save_similar_games(engine: Engine, similar: DataFrame) -> int:
+    """
+    Replace the contents of game_similarity in a single transaction, so readers never see
+    a partial refresh.
+
+    :param engine: SQLAlchemy engine of the database
+    :param similar: Neighbours as returned by compute_similar_games
+
+    :return int: Number of rows written
+    """
+    buffer = io.StringIO()
+    similar.to_csv(buffer, index=False, header=False)
+    buffer.seek(0)
+
+    with engine.begin() as connection:
+        connection.execute(text("DELETE FROM game_similarity"))
+        cursor = connection.connection.cursor()
+        cursor.copy_expert(
+            "COPY game_similarity (game_id, similar_game_id, rank, score) "
+            "FROM STDIN WITH (FORMAT csv)",
+            buffer,
+        )
+    return len(similar)
+
+
+def refresh_similar_games(engine: Engine, k: int) -> int:
+    """
+    Recompute the neighbours of every game from the loaded data.
+
+    :param engine: SQLAlchemy engine of the database
+    :param k: Number of neighbours per game
+
+    :return int: Number of neighbour rows written
+    """
+    details = pandas.read_sql(
+        text(f"SELECT game_id, {', '.join(NUMERIC_FEATURES)} FROM game_details"),
+        engine,
+    )
+    links = [
+        pandas.read_sql(text(f"SELECT game_id, {id_column} FROM {link_table}"), engine)
+        for link_table, id_column, _ in SIMILARITY_LINKS
+    ]
+
+    similar = compute_similar_games(details, links, k)
+    written = save_similar_games(engine, similar)
+    logging.info(
+        f"Stored {written:,} similar games for {similar['game_id'].nunique():,} games."
+    )
+    return written
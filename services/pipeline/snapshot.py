@@ -0,0 +1,104 @@
+"""
+snapshot.py - Catalogue snapshot files for the web service.
+
+After a load, game_details and the link tables are written to an immutable snapshot file
+named after the data version, which web worker processes map into memory and share. Only
+the most recent files are kept; workers still mapping an older file keep their mapping.
+"""
+
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas
+from common.snapshot_file import (  # type: ignore
+    SUFFIX,
+    StringColumn,
+    snapshot_file_path,
+    write_snapshot_file,
+)
+from pandas import DataFrame
+from pipeline.documents import DOCUMENT_LINKS  # type: ignore
+from sqlalchemy import Engine, text
+
+# game_details columns stored as strings rather than numbers
+TEXT_COLUMNS = ("title", "description")
+
+
+def build_snapshot_columns(details: DataFrame) -> dict[str, np.ndarray | StringColumn]:
+    """
+    Convert game details to snapshot columns, in game id order.
+
+    :param details: Game details, with game_id and the other game_details columns
+
+    :return dict[str, np.ndarray | StringColumn]: Float64 arrays with NaN for NULL, and
+        string columns for TEXT_COLUMNS
+    """
+    details = details.drop(columns="search_vector", errors="ignore")
+    details = details.sort_values("game_id").reset_index(drop=True)
+    return {
+        str(name): (
+            StringColumn.from_values(values.fillna(""))
+            if name in TEXT_COLUMNS
+            else values.to_numpy(dtype=np.float64, na_value=np.nan)
+        )
+        for name, values in details.items()
+    }
+
+
+def prune_snapshot_files(directory: Path, keep: int) -> list[Path]:
+    """
+    Delete all but the most recently written snapshot files.
+
+    :param directory: Directory of snapshot files
+    :param keep: Number of files to keep
+
+    :return list[Path]: Deleted files
+    """
+    files = sorted(
+        directory.glob(f"*{SUFFIX}"),
+        key=lambda path: path.stat().st_mtime,
+        reverse=True,
+    )
+    for path in files[keep:]:
+        path.unlink()
+    return files[keep:]
+
+
+def publish_catalog_snapshot(
+    engine: Engine, directory: Path, version: str, keep: int
+) -> int:
+    """
+    Write the snapshot file of a data version from the loaded data.
+
+    :param engine: SQLAlchemy engine of the database
+    :param directory: Directory of snapshot files
+    :param version: Data version the snapshot is published for
+    :param keep: Number of snapshot files to keep
+
+    :return int: Number of games in the snapshot
+    """
+    details = pandas.read_sql(text("SELECT * FROM game_details"), engine)
+    links = {}
+    for _, link_table, _, prefix in DOCUMENT_LINKS:
+        link_df = pandas.read_sql(
+            text(f"SELECT game_id, {prefix}_id FROM {link_table}"), engine
+        )
+        links[prefix] = (
+            link_df["game_id"].to_numpy(),
+            link_df[f"{prefix}_id"].to_numpy(),
+        )
+
+    path = snapshot_file_path(directory, version)
+    size = write_snapshot_file(
+        path,
+        build_snapshot_columns(details),
+        links,
+        metadata={"version": version, "games": len(details)},
+    )
+    logging.info(f"Wrote catalogue snapshot of {len(details):,} games to {path}.")
+    logging.info(f"Snapshot size: {size / 1024 / 1024:,.1f} MiB.")
+
+    for removed in prune_snapshot_files(directory, keep):
+        logging.info(f"Deleted old catalogue snapshot {removed}.")
+    return len(details)
@@ -0,0 +1,132 @@
+"""
+streaming.py - Pipelined extract, transform and load.
+
+Each stage runs in its own thread, connected to the next by a bounded queue. Loading starts
+as soon as the first batch is parsed, and a full queue blocks its producer so memory stays
+bounded however many games are extracted.
+"""
+
+import logging
+import threading
+from collections.abc import Callable
+from pathlib import Path
+from queue import Empty, Full, Queue
+from typing import Any
+from xml.etree import ElementTree
+
+from common import config  # type: ignore
+from pipeline.extract import iter_game_data  # type: ignore
+from pipeline.load import load_dfs_into_db  # type: ignore
+from pipeline.transform_xml import (  # type: ignore
+    append_df_to_csv,
+    transform_xml_string,
+)
+from sqlalchemy import create_engine
+
+_DONE = object()
+_POLL_INTERVAL = 0.5
+
+
+def _put(queue: Queue, item: Any, stop: threading.Event) -> bool:
+    """
+    Put an item on a bounded queue, waiting for space unless the pipeline is stopped.
+
+    :return bool: True if the item was queued, False if the pipeline stopped first
+    """
+    while not stop.is_set():
+        try:
+            queue.put(item, timeout=_POLL_INTERVAL)
+            return True
+        except Full:
+            continue
+    return False
+
+
+def _get(queue: Queue, stop: threading.Event) -> Any:
+    """
+    Get the next item from a queue, returning the end marker if the pipeline is stopped.
+    """
+    while not stop.is_set():
+        try:
+            return queue.get(timeout=_POLL_INTERVAL)
+        except Empty:
+            continue
+    return _DONE
+
+
+def run_pipelined(
+    game_ids: list[str], xml_dir: Path, csv_dir: Path, queue_size: int = 4
+) -> None:
+    """
+    Extract, transform and load game data concurrently.
+    XML batches and CSV files are saved to the same locations as the sequential stages.
+
+    :param game_ids: list of game IDs to extract
+    :param xml_dir: Directory to save XML files to
+    :param csv_dir: Base directory to append CSV files to
+    :param queue_size: Maximum number of batches waiting between two stages
+    """
+    if queue_size < 1:
+        raise ValueError("queue_size must be at least 1")
+
+    engine = create_engine(config.db_url)
+    xml_queue: Queue = Queue(maxsize=queue_size)
+    dfs_queue: Queue = Queue(maxsize=queue_size)
+    stop = threading.Event()
+    errors: list[BaseException] = []
+
+    for stale_csv in csv_dir.glob("*/*.csv"):
+        stale_csv.unlink()
+
+    def extract_worker() -> None:
+        for xml in iter_game_data(game_ids, xml_dir):
+            if not _put(xml_queue, xml, stop):
+                return
+
+    def transform_worker() -> None:
+        batch = 0
+        while (xml := _get(xml_queue, stop)) is not _DONE:
+            batch += 1
+            try:
+                dfs = transform_xml_string(xml)
+            except ElementTree.ParseError as e:
+                logging.error(f"Failed to parse XML batch {batch}: {e}")
+                continue
+            append_df_to_csv(destination_dir=csv_dir, **dfs)
+            if not _put(dfs_queue, dfs, stop):
+                return
+
+    def load_worker() -> None:
+        loaded_keys: dict[str, set] = {}
+        while (dfs := _get(dfs_queue, stop)) is not _DONE:
+            load_dfs_into_db(dfs, engine, loaded_keys)
+
+    def run_worker(
+        name: str, worker: Callable[[], None], output_queue: Queue | None
+    ) -> None:
+        try:
+            worker()
+        except Exception as e:
+            logging.error(f"Pipelined {name} failed: {e}")
+            errors.append(e)
+            stop.set()
+        finally:
+            if output_queue is not None:
+                _put(output_queue, _DONE, stop)
+
+    threads = [
+        threading.Thread(
+            target=run_worker, args=("extract", extract_worker, xml_queue)
+        ),
+        threading.Thread(
+            target=run_worker, args=("transform", transform_worker, dfs_queue)
+        ),
+        threading.Thread(target=run_worker, args=("load", load_worker, None)),
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    if errors:
+        raise errors[0]
@@ -124,6 +124,54 @@ def separate_link_types(links_df: DataFrame) -> dict[str, DataFrame]:
     return transformed_data
 
 
+def parse_xml_items(root: Element) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    """
+    Parse every game item within an XML document.
+
+    :param root: Root element of a BGG XML API response
+
+    :return tuple[list, list]: Game records and link records
+    """
+    games = []
+    links = []
+    for item in root.iter("item"):
+        if item.get("id"):
+            parsed_data = parse_bgg_xml_to_dict(item)
+            games.append(parsed_data["game"])
+            links.extend(parsed_data["links"])
+    return games, links
+
+
+def build_dataframes(
+    games: list[dict[str, Any]], links: list[dict[str, Any]]
+) -> dict[str, DataFrame]:
+    """
+    Build the output DataFrames from parsed game and link records.
+
+    :param games: Game records
+    :param links: Link records
+
+    :return dict[str, DataFrame]: Dictionary of each separate dataset as a Pandas DataFrame
+    """
+    transformed_data = separate_link_types(DataFrame.from_records(links))
+    game_details_df = DataFrame.from_records(games)
+    if not game_details_df.empty:
+        transformed_data["details/game_details"] = game_details_df
+
+    return transformed_data
+
+
+def transform_xml_string(xml: str) -> dict[str, DataFrame]:
+    """
+    Transform a single XML API response to Pandas DataFrames
+
+    :param xml: XML game data
+
+    :return dict[str, DataFrame]: Dictionary of each separate dataset as a Pandas DataFrame
+    """
+    return build_dataframes(*parse_xml_items(ElementTree.fromstring(xml)))
+
+
 def transform_xml_files(xml_dir: Path) -> dict[str, DataFrame]:
     """
     Transform XML game data to Pandas DataFrames
@@ -138,23 +186,16 @@ def transform_xml_files(xml_dir: Path) -> dict[str, DataFrame]:
     all_games = []
     all_links = []
 
-    for xml_file in xml_dir.glob("*.xml"):
+    for xml_file in sorted(xml_dir.glob("*.xml")):
         try:
-            for item in ElementTree.parse(xml_file).findall(".//item"):
-                if item.get("id"):
-                    parsed_data = parse_bgg_xml_to_dict(item)
-                    all_games.append(parsed_data["game"])
-                    all_links.extend(parsed_data["links"])
+            games, links = parse_xml_items(ElementTree.parse(xml_file).getroot())
         except ElementTree.ParseError as e:
             logging.error(f"Failed to parse {xml_file}: {e}")
             continue
+        all_games.extend(games)
+        all_links.extend(links)
 
-    transformed_data = separate_link_types(DataFrame.from_records(all_links))
-    game_details_df = DataFrame.from_records(all_games)
-    if not game_details_df.empty:
-        transformed_data["details/game_details"] = game_details_df
-
-    return transformed_data
+    return build_dataframes(all_games, all_links)
 
 
 def save_df_to_csv(destination_dir: Path, **kwargs: DataFrame) -> None:
@@ -176,5 +217,25 @@ def save_df_to_csv(destination_dir: Path, **kwargs: DataFrame) -> None:
         df.to_csv(path_or_buf=filepath, index=False)
 
 
+def append_df_to_csv(destination_dir: Path, **kwargs: DataFrame) -> None:
+    """
+    Append processed data to CSV files on disk, writing headers for new files only
+
+    :param destination_dir: Directory to save processed data to
+    :param kwargs: Pandas DataFrame arguments assigned to their name as the key
+    """
+    if not isinstance(destination_dir, Path):
+        raise TypeError(f"Expected Path, got {type(destination_dir)}")
+
+    for filename, df in kwargs.items():
+        if not isinstance(df, DataFrame):
+            raise AttributeError(f"Expected DataFrame, got {type(df)}")
+        filepath = destination_dir / f"{filename}.csv"
+        filepath.parent.mkdir(parents=True, exist_ok=True)
+        df.to_csv(
+            path_or_buf=filepath, mode="a", header=not filepath.exists(), index=False
+        )
+
+
 if __name__ == "__main__":
     transform_xml_files(Path("./data"))
@@ -0,0 +1,201 @@
+"""
+autocomplete.py - In-memory title index for keystroke-level autocomplete.
+
+Titles are normalized (case, accents and punctuation folded) and indexed twice: a sorted
+list answers prefix matches with a binary search, and an inverted trigram index answers
+fuzzy matches for misspelled input. The index is built from game_details at startup and
+rebuilt in a worker thread whenever the pipeline publishes a new data version, then
+swapped in atomically.
+"""
+
+import asyncio
+import logging
+import re
+import unicodedata
+from bisect import bisect_left
+from collections import defaultdict
+from collections.abc import Sequence
+
+import numpy as np
+from sqlalchemy import select
+from web.data_version import VersionedResource  # type: ignore
+from web.db import models  # type: ignore
+
+NON_ALPHANUMERIC = re.compile(r"[^0-9a-z]+")
+
+# Sorts after every character of a normalized title, to bound prefix ranges
+PREFIX_END = "\uffff"
+
+# Shorter input has too few trigrams to tell a typo from a different title
+MIN_FUZZY_LENGTH = 4
+
+
+def normalize_title(title: str) -> str:
+    """
+    Fold a title for matching: strip accents, case fold, and collapse punctuation and
+    whitespace to single spaces.
+
+    :param title: Title or user input
+
+    :return str: Normalized title
+    """
+    decomposed = unicodedata.normalize("NFKD", title)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return NON_ALPHANUMERIC.sub(" ", stripped.casefold()).strip()
+
+
+def title_trigrams(title: str, partial: bool = False) -> set[str]:
+    """
+    Get the trigrams of a normalized title, with words padded like pg_trgm does.
+
+    :param title: Normalized title
+    :param partial: The last word may be incomplete, so skip its trailing trigram
+
+    :return set[str]: Distinct trigrams
+    """
+    words = title.split()
+    trigrams: set[str] = set()
+    for i, word in enumerate(words):
+        padded = f"  {word}" if partial and i == len(words) - 1 else f"  {word} "
+        trigrams.update(map("".join, zip(padded, padded[1:], padded[2:])))
+    return trigrams
+
+
+class TitleIndex:
+    """
+    Immutable prefix and trigram index over game titles, ranked by popularity.
+    """
+
+    def __init__(
+        self,
+        game_ids: Sequence[int],
+        titles: Sequence[str],
+        popularity: Sequence[float | None],
+    ) -> None:
+        """
+        Build the index.
+
+        :param game_ids: Game ids
+        :param titles: Title of each game
+        :param popularity: Popularity of each game, None if unknown
+        """
+        # Games are stored in popularity order, so a lower position is a more popular game
+        order = sorted(
+            range(len(game_ids)),
+            key=lambda i: (
+                popularity[i] is None,
+                -(popularity[i] or 0.0),
+                game_ids[i],
+            ),
+        )
+        self.game_ids = np.array([game_ids[i] for i in order], dtype=np.int64)
+        self.titles = [titles[i] for i in order]
+        keys = [normalize_title(title) for title in self.titles]
+
+        prefix_order = sorted(range(len(keys)), key=keys.__getitem__)
+        self._prefix_keys = [keys[i] for i in prefix_order]
+        self._prefix_positions = np.array(prefix_order, dtype=np.int32)
+
+        postings: dict[str, list[int]] = defaultdict(list)
+        for position, key in enumerate(keys):
+            for trigram in title_trigrams(key):
+                postings[trigram].append(position)
+        self._postings = {
+            trigram: np.array(positions, dtype=np.int32)
+            for trigram, positions in postings.items()
+        }
+
+    def __len__(self) -> int:
+        return len(self.titles)
+
+    def prefix_matches(self, key: str, limit: int) -> np.ndarray:
+        """
+        Find the most popular titles starting with a normalized prefix.
+
+        :param key: Normalized prefix
+        :param limit: Maximum number of matches
+
+        :return np.ndarray: Positions of matching games, most popular first
+        """
+        start = bisect_left(self._prefix_keys, key)
+        end = bisect_left(self._prefix_keys, key + PREFIX_END, lo=start)
+        positions = self._prefix_positions[start:end]
+        if len(positions) > limit:
+            positions = np.partition(positions, limit - 1)[:limit]
+        return np.sort(positions)
+
+    def fuzzy_matches(self, key: str, limit: int, threshold: float) -> np.ndarray:
+        """
+        Find the titles sharing the most trigrams with normalized input, treating its last
+        word as a prefix.
+
+        :param key: Normalized input
+        :param limit: Maximum number of matches
+        :param threshold: Minimum share of the input's trigrams a title must contain
+
+        :return np.ndarray: Positions of matching games, best match first, then most popular
+        """
+        trigrams = title_trigrams(key, partial=True)
+        postings = [self._postings[t] for t in trigrams if t in self._postings]
+        if not postings:
+            return np.empty(0, dtype=np.int32)
+
+        shared = np.bincount(np.concatenate(postings), minlength=len(self))
+        candidates = np.flatnonzero(shared >= threshold * len(trigrams))
+        best = np.lexsort((candidates, -shared[candidates]))[:limit]
+        return candidates[best]
+
+    def complete(
+        self, text: str, limit: int, threshold: float = 0.6
+    ) -> list[tuple[int, str]]:
+        """
+        Complete user input to game titles. Prefix matches come first, most popular first,
+        followed by fuzzy matches if there are fewer than limit prefix matches and the input
+        is at least MIN_FUZZY_LENGTH characters long.
+
+        :param text: User input
+        :param limit: Maximum number of titles
+        :param threshold: Minimum share of the input's trigrams a fuzzy match must contain
+
+        :return list[tuple[int, str]]: Game ids and titles
+        """
+        key = normalize_title(text)
+        if not key:
+            return []
+
+        positions = list(self.prefix_matches(key, limit))
+        if len(positions) < limit and len(key) >= MIN_FUZZY_LENGTH:
+            seen = set(positions)
+            for position in self.fuzzy_matches(key, limit + len(positions), threshold):
+                if position not in seen:
+                    positions.append(position)
+                    if len(positions) == limit:
+                        break
+        return [
+            (int(self.game_ids[position]), self.titles[position])
+            for position in positions
+        ]
+
+
+class TitleIndexLoader(VersionedResource[TitleIndex]):
+    """
+    Holds the current title index, rebuilt whenever the data version changes.
+    """
+
+    async def load(self, version: str) -> TitleIndex:
+        """Read every title and build the index in a worker thread."""
+        async with self.db.get_session(use_replica=False) as session:
+            rows = (
+                await session.execute(
+                    select(
+                        models.GameDetails.game_id,
+                        models.GameDetails.title,
+                        models.GameDetails.popularity,
+                    )
+                )
+            ).all()
+
+        game_ids, titles, popularity = zip(*rows) if rows else ((), (), ())
+        index = await asyncio.to_thread(TitleIndex, game_ids, titles, popularity)
+        logging.info(f"Built autocomplete index of {len(index):,} titles")
+        return index
@@ -0,0 +1,284 @@
+"""
+cache.py - Application-level cache of serialized query results.
+
+Entries are keyed on the endpoint and its normalized parameters, prefixed with the current
+data version, and dropped whenever the pipeline publishes a new version. Backends evict
+least recently used entries beyond a maximum entry count or total size. Blocking backends
+are called from a worker thread, off the event loop.
+"""
+
+import asyncio
+import json
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from common import config  # type: ignore
+from web.data_version import DataVersionTracker  # type: ignore
+from web.data_version import tracker as data_version_tracker  # type: ignore
+
+
+class CacheBackend(ABC):
+    """Storage for cached values, bounded by entry count and total size."""
+
+    # Whether calls block on I/O and must run in a worker thread
+    blocking = False
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        """
+        Initialize the backend.
+
+        :param max_entries: Maximum number of entries to keep
+        :param max_bytes: Maximum total size of values to keep, in bytes
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+
+    @abstractmethod
+    def get(self, key: str) -> bytes | None:
+        """Get a value, marking it as recently used. Returns None on a miss."""
+
+    @abstractmethod
+    def set(self, key: str, value: bytes) -> None:
+        """Store a value, evicting least recently used entries beyond the bounds."""
+
+    @abstractmethod
+    def discard_except(self, prefix: str) -> None:
+        """Remove every entry whose key does not start with the given prefix."""
+
+
+class MemoryCache(CacheBackend):
+    """LRU cache held in the memory of a single worker process."""
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        super().__init__(max_entries, max_bytes)
+        self._entries: OrderedDict[str, bytes] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> bytes | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        with self._lock:
+            if (previous := self._entries.pop(key, None)) is not None:
+                self._size -= len(previous)
+            self._entries[key] = value
+            self._size += len(value)
+            while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+                _, evicted = self._entries.popitem(last=False)
+                self._size -= len(evicted)
+
+    def discard_except(self, prefix: str) -> None:
+        with self._lock:
+            for key in [key for key in self._entries if not key.startswith(prefix)]:
+                self._size -= len(self._entries.pop(key))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SqliteCache(CacheBackend):
+    """
+    LRU cache in a local SQLite file, shared by every worker process on the host.
+    Stands in for an external shared store such as Redis.
+
+    Access times of hits are buffered in memory and written in batches, so the recency
+    order other processes see lags behind by up to TOUCH_BATCH_SIZE hits of this one.
+    """
+
+    blocking = True
+
+    # Number of buffered access times that triggers a write
+    TOUCH_BATCH_SIZE = 64
+
+    def __init__(self, path: Path, max_entries: int, max_bytes: int) -> None:
+        """
+        Initialize the backend, creating the cache file if needed.
+
+        :param path: Path of the SQLite cache file
+        :param max_entries: Maximum number of entries to keep
+        :param max_bytes: Maximum total size of values to keep, in bytes
+        """
+        super().__init__(max_entries, max_bytes)
+        self.path = path
+        self._local = threading.local()
+        self._touched: dict[str, float] = {}
+        self._touched_lock = threading.Lock()
+        with self._connection() as connection:
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS cache "
+                "(key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+                "accessed_at REAL NOT NULL)"
+            )
+            connection.execute(
+                "CREATE INDEX IF NOT EXISTS cache_accessed_at_idx ON cache (accessed_at)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Connection for the current thread, created on first use"""
+        if (connection := getattr(self._local, "connection", None)) is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            self._local.connection = connection
+        return connection
+
+    def _flush_access_times(self, connection: sqlite3.Connection) -> None:
+        """Write the buffered access times of hits"""
+        with self._touched_lock:
+            touched, self._touched = self._touched, {}
+        connection.executemany(
+            "UPDATE cache SET accessed_at = ? WHERE key = ?",
+            [(accessed_at, key) for key, accessed_at in touched.items()],
+        )
+
+    def get(self, key: str) -> bytes | None:
+        connection = self._connection()
+        row = connection.execute(
+            "SELECT value FROM cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        with self._touched_lock:
+            self._touched[key] = time.time()
+            flush = len(self._touched) >= self.TOUCH_BATCH_SIZE
+        if flush:
+            self._flush_access_times(connection)
+        return row[0]
+
+    def set(self, key: str, value: bytes) -> None:
+        if len(value) > self.max_bytes:
+            return
+        connection = self._connection()
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            self._flush_access_times(connection)
+            connection.execute(
+                "INSERT OR REPLACE INTO cache (key, value, size, accessed_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, value, len(value), time.time()),
+            )
+            count, size = connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM cache"
+            ).fetchone()
+            if count <= self.max_entries and size <= self.max_bytes:
+                return
+
+            # Read only as many of the least recently used entries as need evicting
+            evicted = 0
+            oldest = connection.execute("SELECT size FROM cache ORDER BY accessed_at")
+            for (evicted_size,) in oldest:
+                if count - evicted <= self.max_entries and size <= self.max_bytes:
+                    break
+                evicted += 1
+                size -= evicted_size
+            oldest.close()
+            connection.execute(
+                "DELETE FROM cache WHERE key IN "
+                "(SELECT key FROM cache ORDER BY accessed_at LIMIT ?)",
+                (evicted,),
+            )
+
+    def discard_except(self, prefix: str) -> None:
+        self._connection().execute(
+            "DELETE FROM cache WHERE substr(key, 1, ?) != ?", (len(prefix), prefix)
+        )
+
+
+def make_cache_key(endpoint: str, **params: Any) -> str:
+    """
+    Build a normalized cache key for an endpoint and its validated parameters.
+
+    :param endpoint: Name of the endpoint
+    :param params: Parameter values, after defaults are applied
+
+    :return str: Cache key independent of parameter order and spelling in the request
+    """
+    return f"{endpoint}?{json.dumps(params, sort_keys=True, default=str)}"
+
+
+class QueryCache:
+    """
+    Caches serialized query results per data version.
+    Nothing is cached until the current data version is known.
+    """
+
+    def __init__(self, backend: CacheBackend, tracker: DataVersionTracker) -> None:
+        """
+        Initialize the query cache and subscribe to data version changes.
+
+        :param backend: Storage backend
+        :param tracker: Tracker of the current data version
+        """
+        self.backend = backend
+        self.tracker = tracker
+        self.hits = 0
+        self.misses = 0
+        tracker.add_listener(self.on_version_change)
+
+    async def _call(self, method: Callable[..., Any], *args: Any) -> Any:
+        """Call a backend method, in a worker thread if the backend blocks"""
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    async def on_version_change(self, version: str) -> None:
+        """Drop entries cached for previous data versions."""
+        await self._call(self.backend.discard_except, f"{version}:")
+
+    async def get_or_compute(
+        self, key: str, compute: Callable[[], Awaitable[bytes]]
+    ) -> bytes:
+        """
+        Get a cached result, computing and storing it on a miss.
+
+        :param key: Cache key, as built by make_cache_key
+        :param compute: Coroutine function producing the serialized result
+
+        :return bytes: Serialized result
+        """
+        version = self.tracker.version
+        if version is None:
+            return await compute()
+
+        versioned_key = f"{version}:{key}"
+        if (value := await self._call(self.backend.get, versioned_key)) is not None:
+            self.hits += 1
+            return value
+
+        self.misses += 1
+        value = await compute()
+        # Don't store results computed while a new version was being picked up
+        if self.tracker.version == version:
+            await self._call(self.backend.set, versioned_key, value)
+        return value
+
+
+def create_cache_backend() -> CacheBackend:
+    """Create the cache backend selected by configuration"""
+    if config.api_cache_backend == "sqlite":
+        return SqliteCache(
+            Path(config.api_cache_path),
+            max_entries=config.api_cache_max_entries,
+            max_bytes=config.api_cache_max_bytes,
+        )
+    if config.api_cache_backend == "memory":
+        return MemoryCache(
+            max_entries=config.api_cache_max_entries,
+            max_bytes=config.api_cache_max_bytes,
+        )
+    raise ValueError(f"Unknown cache backend: {config.api_cache_backend}")
+
+
+query_cache = QueryCache(create_cache_backend(), data_version_tracker)
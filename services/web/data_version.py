@@ -0,0 +1,169 @@
+"""
+data_version.py - Tracks the version of the data most recently loaded by the pipeline.
+
+The pipeline records a new version after every load. The web service polls for it in the
+background and derives HTTP validators from it, so unchanged data can be answered with
+304 Not Modified without querying the database.
+"""
+
+import asyncio
+import contextlib
+import logging
+from abc import ABC, abstractmethod
+from collections.abc import Awaitable, Callable
+from typing import Generic, TypeVar
+
+from sqlalchemy import select
+from web.db import models  # type: ignore
+from web.db.session import AsyncDatabaseSession  # type: ignore
+
+VersionListener = Callable[[str], Awaitable[None]]
+
+T = TypeVar("T")
+
+
+class DataVersionTracker:
+    """
+    Keeps the current data version in memory, refreshed periodically from the database.
+    """
+
+    def __init__(self) -> None:
+        self.version: str | None = None
+        self.listeners: list[VersionListener] = []
+        # Listeners which failed for the current version, retried on every later refresh
+        self._failed: list[VersionListener] = []
+        self._task: asyncio.Task | None = None
+
+    def add_listener(self, listener: VersionListener) -> None:
+        """
+        Register a coroutine function called with the new version whenever it changes. If it
+        raises, it is called again on every refresh until it succeeds or the version changes.
+
+        :param listener: Coroutine function taking the new version
+        """
+        self.listeners.append(listener)
+
+    async def refresh(self, db: AsyncDatabaseSession) -> str | None:
+        """
+        Fetch the latest data version, notifying listeners if it changed, and retrying those
+        which failed for the current version.
+
+        :param db: Database session manager to query with
+
+        :return str | None: Current data version, or None if no data was loaded yet
+        """
+        # Replicas may not have replayed the latest load yet
+        async with db.get_session(use_replica=False) as session:
+            version = await session.scalar(
+                select(models.DataVersion.version)
+                .order_by(models.DataVersion.loaded_at.desc())
+                .limit(1)
+            )
+
+        if version is not None and version != self.version:
+            logging.info(f"Data version changed from {self.version} to {version}")
+            self.version = version
+            self._failed = await self._notify(self.listeners, version)
+        elif self._failed and self.version is not None:
+            self._failed = await self._notify(self._failed, self.version)
+        return self.version
+
+    async def _notify(
+        self, listeners: list[VersionListener], version: str
+    ) -> list[VersionListener]:
+        """Call listeners with a version, returning those which failed."""
+        failed = []
+        for listener in listeners:
+            try:
+                await listener(version)
+            except Exception as e:
+                logging.error(
+                    f"Data version listener failed for {version}, retrying on the next poll: {e}"
+                )
+                failed.append(listener)
+        return failed
+
+    async def _poll(self, db: AsyncDatabaseSession, interval: float) -> None:
+        """Refresh the data version every interval seconds until cancelled."""
+        while True:
+            try:
+                await self.refresh(db)
+            except Exception as e:
+                logging.error(f"Failed to refresh data version: {e}")
+            await asyncio.sleep(interval)
+
+    def start(self, db: AsyncDatabaseSession, interval: float) -> None:
+        """
+        Start polling for new data versions in the background.
+
+        :param db: Database session manager to query with
+        :param interval: Seconds between polls
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._poll(db, interval))
+
+    async def stop(self) -> None:
+        """Stop background polling."""
+        if self._task is not None:
+            self._task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    @property
+    def etag(self) -> str | None:
+        """Weak ETag for responses derived from the current data version"""
+        if self.version is None:
+            return None
+        return f'W/"{self.version}"'
+
+
+class VersionedResource(ABC, Generic[T]):
+    """
+    In-memory data derived from the database, rebuilt in the background whenever the data
+    version changes and swapped in once complete.
+    """
+
+    def __init__(self, db: AsyncDatabaseSession, tracker: DataVersionTracker) -> None:
+        """
+        Initialize the resource and subscribe it to data version changes.
+
+        :param db: Database session manager to load with
+        :param tracker: Tracker of the current data version
+        """
+        self.db = db
+        self.tracker = tracker
+        self.value: T | None = None
+        self.version: str | None = None
+        self._lock = asyncio.Lock()
+        tracker.add_listener(self.on_version_change)
+
+    @abstractmethod
+    async def load(self, version: str) -> T:
+        """Load the resource for a data version."""
+
+    async def on_version_change(self, version: str) -> None:
+        """
+        Rebuild the resource for the new data version. Failures are logged and raised, so the
+        tracker retries on each later poll while the resource is behind its version.
+        """
+        async with self._lock:
+            if version == self.version:
+                return
+            try:
+                self.value = await self.load(version)
+            except Exception as e:
+                logging.error(
+                    f"Failed to load {type(self).__name__} for data version {version}: {e}"
+                )
+                raise
+            self.version = version
+
+    def current(self) -> T | None:
+        """The resource if it was built from the current data version, otherwise None"""
+        if self.version is None or self.version != self.tracker.version:
+            return None
+        return self.value
+
+
+tracker = DataVersionTracker()
@@ -1,4 +1,15 @@
-from sqlalchemy import Column, Float, ForeignKey, Integer, Text
+from sqlalchemy import (
+    Column,
+    Computed,
+    DateTime,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    SmallInteger,
+    Text,
+)
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql.expression import text
@@ -33,6 +44,46 @@ class GameDetails(Base):  # type: ignore
             "(LN(ABS((bayes_rating - 5.5) * total_ratings) + 1) * SIGN((bayes_rating - 5.5)))"
         ),
     )
+    search_vector = Column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('english', title), 'A') || "
+            "setweight(to_tsvector('english', description), 'B')",
+            persisted=True,
+        ),
+    )
+
+    __table_args__ = (
+        Index(
+            "game_details_bayes_rating_idx",
+            bayes_rating.desc().nulls_last(),
+            game_id.desc(),
+        ),
+        Index(
+            "game_details_popularity_idx",
+            popularity.desc().nulls_last(),
+            game_id.desc(),
+        ),
+        Index(
+            "game_details_year_published_idx",
+            year_published.desc().nulls_last(),
+            game_id.desc(),
+        ),
+        Index(
+            "game_details_average_weight_idx",
+            average_weight.desc().nulls_last(),
+            game_id.desc(),
+        ),
+        Index("game_details_playing_time_idx", playing_time),
+        Index("game_details_min_age_idx", min_age),
+        Index("game_details_players_idx", max_players, min_players),
+        Index(
+            "game_details_search_vector_idx",
+            search_vector,
+            postgresql_using="gin",
+            postgresql_with={"fastupdate": "on", "gin_pending_list_limit": 65536},
+        ),
+    )
 
     # Relationships
     mechanics = relationship("GameMechanicLink", back_populates="game")
@@ -100,6 +151,10 @@ class GameMechanicLink(Base):  # type: ignore
         Integer, ForeignKey("mechanic_details.mechanic_id"), primary_key=True
     )
 
+    __table_args__ = (
+        Index("game_mechanic_link_mechanic_id_idx", mechanic_id, game_id),
+    )
+
     # Relationships
     game = relationship("GameDetails", back_populates="mechanics")
     mechanic = relationship("MechanicDetails", back_populates="games")
@@ -113,6 +168,10 @@ class GameCategoryLink(Base):  # type: ignore
         Integer, ForeignKey("category_details.category_id"), primary_key=True
     )
 
+    __table_args__ = (
+        Index("game_category_link_category_id_idx", category_id, game_id),
+    )
+
     # Relationships
     game = relationship("GameDetails", back_populates="categories")
     category = relationship("CategoryDetails", back_populates="games")
@@ -126,6 +185,10 @@ class GameDesignerLink(Base):  # type: ignore
         Integer, ForeignKey("designer_details.designer_id"), primary_key=True
     )
 
+    __table_args__ = (
+        Index("game_designer_link_designer_id_idx", designer_id, game_id),
+    )
+
     # Relationships
     game = relationship("GameDetails", back_populates="designers")
     designer = relationship("DesignerDetails", back_populates="games")
@@ -139,6 +202,8 @@ class GameArtistLink(Base):  # type: ignore
         Integer, ForeignKey("artist_details.artist_id"), primary_key=True
     )
 
+    __table_args__ = (Index("game_artist_link_artist_id_idx", artist_id, game_id),)
+
     # Relationships
     game = relationship("GameDetails", back_populates="artists")
     artist = relationship("ArtistDetails", back_populates="games")
@@ -152,6 +217,94 @@ class GamePublisherLink(Base):  # type: ignore
         Integer, ForeignKey("publisher_details.publisher_id"), primary_key=True
     )
 
+    __table_args__ = (
+        Index("game_publisher_link_publisher_id_idx", publisher_id, game_id),
+    )
+
     # Relationships
     game = relationship("GameDetails", back_populates="publishers")
     publisher = relationship("PublisherDetails", back_populates="games")
+
+
+class DataVersion(Base):  # type: ignore
+    __tablename__ = "data_version"
+
+    version = Column(Text, primary_key=True)
+    loaded_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=text("now()")
+    )
+
+
+class GameDocument(Base):  # type: ignore
+    __tablename__ = "game_documents"
+
+    game_id = Column(Integer, ForeignKey("game_details.game_id"), primary_key=True)
+    document = Column(JSONB, nullable=False)
+    updated_at = Column(
+        DateTime(timezone=True), nullable=False, server_default=text("now()")
+    )
+
+
+class AggregateStats:
+    """Statistics columns shared by the aggregate views"""
+
+    game_count = Column(Integer, nullable=False)
+    mean_rating = Column(Float)
+    median_rating = Column(Float)
+    mean_weight = Column(Float)
+    median_weight = Column(Float)
+    mean_playing_time = Column(Float)
+    median_playing_time = Column(Float)
+    mean_popularity = Column(Float)
+
+
+class MechanicStats(AggregateStats, Base):  # type: ignore
+    __tablename__ = "mechanic_stats"
+
+    mechanic_id = Column(Integer, primary_key=True)
+    mechanic_name = Column(Text, nullable=False)
+
+
+class CategoryStats(AggregateStats, Base):  # type: ignore
+    __tablename__ = "category_stats"
+
+    category_id = Column(Integer, primary_key=True)
+    category_name = Column(Text, nullable=False)
+
+
+class DesignerStats(AggregateStats, Base):  # type: ignore
+    __tablename__ = "designer_stats"
+
+    designer_id = Column(Integer, primary_key=True)
+    designer_name = Column(Text, nullable=False)
+
+
+class ArtistStats(AggregateStats, Base):  # type: ignore
+    __tablename__ = "artist_stats"
+
+    artist_id = Column(Integer, primary_key=True)
+    artist_name = Column(Text, nullable=False)
+
+
+class PublisherStats(AggregateStats, Base):  # type: ignore
+    __tablename__ = "publisher_stats"
+
+    publisher_id = Column(Integer, primary_key=True)
+    publisher_name = Column(Text, nullable=False)
+
+
+class YearStats(AggregateStats, Base):  # type: ignore
+    __tablename__ = "year_stats"
+
+    year_published = Column(Integer, primary_key=True)
+
+
+class GameSimilarity(Base):  # type: ignore
+    __tablename__ = "game_similarity"
+
+    game_id = Column(Integer, ForeignKey("game_details.game_id"), primary_key=True)
+    rank = Column(SmallInteger, primary_key=True)
+    similar_game_id = Column(
+        Integer, ForeignKey("game_details.game_id"), nullable=False
+    )
+    score = Column(Float, nullable=False)
@@ -1,35 +1,342 @@
 """
-session.py - Module for creating a read-only SQLAlchemy session
+session.py - Module for creating read-only SQLAlchemy sessions
 for the boardgame analytics database.
+
+Engines are created on first use, with connection pools sized and timed out according to
+PoolSettings. Pools record how long each checkout waited and how many timed out, so
+saturation is visible before requests start failing.
+
+Reads may be spread over streaming replicas of the primary. Replicas are health checked
+periodically, and sessions are routed round-robin to the replicas which answered their
+last check within the replication lag threshold, or to the primary if there are none.
+Given the data version responses are served for, replicas are only used once they have
+loaded it, so results cached under a version are never computed from older data.
 """
 
+import asyncio
 import contextlib
+import itertools
+import logging
+import threading
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from typing import Any, Generic, TypeVar
 
-from sqlalchemy import Engine, create_engine
+from common import config  # type: ignore
+from sqlalchemy import Engine, create_engine, text
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 from sqlalchemy.orm import Session, declarative_base, scoped_session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
 
 # Create base class for declarative models
 Base = declarative_base()
 
+# Upper bounds in seconds of the checkout wait time histogram buckets
+WAIT_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+# Seconds a replica lags behind the primary. A replica which replayed all the WAL it
+# received is caught up, however long ago the last transaction was, and a server which
+# isn't in recovery is not lagging at all.
+REPLICATION_LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """)
+
+# Latest data version recorded by the pipeline. It is written after everything else a load
+# changes, so a replica which replayed it replayed the whole load.
+DATA_VERSION_QUERY = text(
+    "SELECT version FROM data_version ORDER BY loaded_at DESC LIMIT 1"
+)
+
+# Errors of a replica which is down, unreachable or not answering in time
+REPLICA_ERRORS = (SQLAlchemyError, OSError, asyncio.TimeoutError)
+
+S = TypeVar("S")
+
+
+@dataclass(frozen=True)
+class PoolSettings:
+    """Connection pool and per-connection settings of an engine"""
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: float = 30.0
+    pool_recycle: int = 1800
+    pool_pre_ping: bool = True
+    statement_timeout_ms: int = 30_000
+    connect_timeout: float = 10.0
+
+    @classmethod
+    def from_config(cls) -> "PoolSettings":
+        """Pool settings from the DB_POOL_* and DB_*_TIMEOUT configuration options"""
+        return cls(
+            pool_size=config.db_pool_size,
+            max_overflow=config.db_max_overflow,
+            pool_timeout=config.db_pool_timeout,
+            pool_recycle=config.db_pool_recycle,
+            pool_pre_ping=config.db_pool_pre_ping,
+            statement_timeout_ms=config.db_statement_timeout_ms,
+            connect_timeout=config.db_connect_timeout,
+        )
+
+    def engine_options(self) -> dict[str, Any]:
+        """Keyword arguments of create_engine configuring the pool"""
+        return {
+            "pool_size": self.pool_size,
+            "max_overflow": self.max_overflow,
+            "pool_timeout": self.pool_timeout,
+            "pool_recycle": self.pool_recycle,
+            "pool_pre_ping": self.pool_pre_ping,
+        }
+
+
+class PoolMetrics:
+    """
+    Checkout counters and wait time histogram of a connection pool.
+    """
+
+    def __init__(self) -> None:
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds = 0.0
+        self.max_wait_seconds = 0.0
+        # Count of waits per WAIT_BUCKETS bucket, plus one for longer waits
+        self.wait_counts = [0] * (len(WAIT_BUCKETS) + 1)
+
+    def observe(self, seconds: float, timed_out: bool = False) -> None:
+        """
+        Record a checkout.
+
+        :param seconds: Time spent waiting for a connection
+        :param timed_out: The checkout gave up after the pool timeout
+        """
+        self.checkouts += 1
+        self.timeouts += timed_out
+        self.wait_seconds += seconds
+        self.max_wait_seconds = max(self.max_wait_seconds, seconds)
+        self.wait_counts[bisect_left(WAIT_BUCKETS, seconds)] += 1
+
+
+class InstrumentedPoolMixin:
+    """Times every checkout of a queue pool into its PoolMetrics."""
+
+    metrics: PoolMetrics
+
+    def connect(self) -> Any:
+        start = time.perf_counter()
+        try:
+            connection = super().connect()  # type: ignore[misc]
+        except PoolTimeoutError:
+            self.metrics.observe(time.perf_counter() - start, timed_out=True)
+            raise
+        self.metrics.observe(time.perf_counter() - start)
+        return connection
+
+    def recreate(self) -> Pool:
+        # Pools are recreated on dispose, and keep counting into the same metrics
+        pool = super().recreate()  # type: ignore[misc]
+        pool.metrics = self.metrics
+        return pool
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncAdaptedQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_status(
+    engine: Engine | AsyncEngine | None, settings: PoolSettings
+) -> dict[str, float]:
+    """
+    Get the current occupancy of an engine's pool.
+
+    :param engine: Engine, or None if it wasn't created yet
+    :param settings: Settings the pool was created with
+
+    :return dict[str, float]: Connections checked out, idle and in overflow, and
+        saturation as the share of the pool's maximum connections checked out
+    """
+    if engine is None:
+        checked_out = idle = overflow = 0
+    else:
+        pool = engine.pool
+        checked_out, idle = pool.checkedout(), pool.checkedin()  # type: ignore[attr-defined]
+        overflow = max(pool.overflow(), 0)  # type: ignore[attr-defined]
+    capacity = settings.pool_size + settings.max_overflow
+    return {
+        "checked_out": checked_out,
+        "idle": idle,
+        "overflow": overflow,
+        "saturation": checked_out / capacity if capacity else 0.0,
+    }
+
+
+@dataclass
+class ReplicaStatus:
+    """Outcome of the last health check of a replica"""
+
+    healthy: bool = False
+    lag_seconds: float | None = None
+    data_version: str | None = None
+    checked_at: float | None = None
+    error: str | None = None
+
+
+class ReplicaRouter(Generic[S]):
+    """
+    Chooses the replica a read-only session is opened on. Replicas are not used until they
+    passed a health check.
+    """
+
+    def __init__(
+        self,
+        replicas: dict[str, S],
+        max_lag: float | None = None,
+        data_version: Callable[[], str | None] | None = None,
+    ) -> None:
+        """
+        Initialize the router.
+
+        :param replicas: Session managers of the replicas, keyed on their name
+        :param max_lag: Seconds a replica may lag behind the primary and still be used. No limit if None.
+        :param data_version: Returns the data version responses are served for. Replicas are only used
+            once their latest data version is the same. Not checked if None, or while it returns None.
+        """
+        self.replicas = replicas
+        self.max_lag = max_lag
+        self.data_version = data_version
+        self.status = {name: ReplicaStatus() for name in replicas}
+        self._turns = itertools.count()
+
+    def record(
+        self,
+        name: str,
+        lag_seconds: float | None = None,
+        error: str | None = None,
+        data_version: str | None = None,
+    ) -> None:
+        """
+        Record the outcome of a health check.
+
+        :param name: Name of the replica
+        :param lag_seconds: Replication lag reported by the replica
+        :param error: Error the check failed with, if any
+        :param data_version: Latest data version loaded into the replica
+        """
+        status = self.status[name]
+        if error is not None and (status.healthy or status.checked_at is None):
+            logging.warning(f"Database replica {name} failed its health check: {error}")
+        elif error is None and not status.healthy:
+            logging.info(f"Database replica {name} passed its health check")
+        status.healthy = error is None
+        status.lag_seconds = lag_seconds
+        status.data_version = data_version
+        status.checked_at = time.time()
+        status.error = error
+
+    def available(self) -> list[str]:
+        """Names of the healthy replicas within the lag threshold, on the current data version"""
+        version = self.data_version() if self.data_version is not None else None
+        return [
+            name
+            for name, status in self.status.items()
+            if status.healthy
+            and (
+                self.max_lag is None
+                or (
+                    status.lag_seconds is not None
+                    and status.lag_seconds <= self.max_lag
+                )
+            )
+            and (version is None or status.data_version == version)
+        ]
+
+    def choose(self) -> S | None:
+        """
+        Choose the next available replica, in turn.
+
+        :return S | None: Session manager of the replica, or None if no replica is available
+        """
+        available = self.available()
+        if not available:
+            return None
+        return self.replicas[available[next(self._turns) % len(available)]]
+
 
 class DatabaseSession:
     """
     Class for managing database connections and sessions.
     Provides read-only access to the boardgame analytics database.
+
+    Without an event loop to check them in the background, replicas are checked by the
+    first get_session after each replica check interval.
     """
 
-    def __init__(self, connection_string: str) -> None:
+    def __init__(
+        self,
+        connection_string: str,
+        pool: PoolSettings | None = None,
+        replica_urls: Sequence[str] = (),
+        max_replica_lag: float | None = None,
+        data_version: Callable[[], str | None] | None = None,
+        replica_check_interval: float | None = None,
+    ) -> None:
         """
-        Initialize the database session manager.
+        Initialize the database session manager. The engine is created on first use.
 
-        :param connection_string: Database connection string.
+        :param connection_string: Database connection string of the primary.
+        :param pool: Connection pool settings. Defaults to PoolSettings().
+        :param replica_urls: Database connection strings of replicas to route reads to.
+        :param max_replica_lag: Seconds a replica may lag behind the primary and still be used. No limit if None.
+        :param data_version: Returns the data version responses are served for, see ReplicaRouter.
+        :param replica_check_interval: Seconds after which get_session checks the replicas again.
+            Defaults to DB_REPLICA_CHECK_SECONDS.
         """
         self.connection_string: str = connection_string
-        self.engine: Engine = self._create_engine()
-        self.Session: scoped_session[Session] = self._create_session_factory(
-            self.engine
+        self.pool = pool or PoolSettings()
+        self.metrics = PoolMetrics()
+        self.replica_check_interval: float = (
+            config.db_replica_check_seconds
+            if replica_check_interval is None
+            else replica_check_interval
+        )
+        self._replicas_checked_at: float | None = None
+        self._check_lock = threading.Lock()
+        self._engine: Engine | None = None
+        self.Session: scoped_session[Session] = self._create_session_factory()
+        self.replicas: ReplicaRouter[DatabaseSession] = ReplicaRouter(
+            {
+                f"replica{i}": DatabaseSession(url, pool=self.pool)
+                for i, url in enumerate(replica_urls, start=1)
+            },
+            max_lag=max_replica_lag,
+            data_version=data_version,
         )
 
+    @property
+    def engine(self) -> Engine:
+        """SQLAlchemy engine, created and bound to the session factory on first use"""
+        if self._engine is None:
+            self._engine = self._create_engine()
+            self._engine.pool.metrics = self.metrics  # type: ignore[attr-defined]
+            self.Session.configure(bind=self._engine)
+        return self._engine
+
     def _create_engine(self) -> Engine:
         """
         Create SQLAlchemy engine with read-only configuration.
@@ -38,33 +345,111 @@ class DatabaseSession:
         """
         return create_engine(
             self.connection_string,
-            connect_args={"options": "-c default_transaction_read_only=on"},
+            poolclass=InstrumentedQueuePool,
+            connect_args={
+                "options": "-c default_transaction_read_only=on "
+                f"-c statement_timeout={self.pool.statement_timeout_ms}",
+                "connect_timeout": int(self.pool.connect_timeout),
+            },
+            **self.pool.engine_options(),
         )
 
     @staticmethod
-    def _create_session_factory(engine: Engine) -> scoped_session[Session]:
+    def _create_session_factory() -> scoped_session[Session]:
         """
         Create a session factory and wrap it in a scoped_session.
 
         :return scoped_session[Session]: Thread-local session factory
         """
-        session_factory = sessionmaker(bind=engine)
+        session_factory = sessionmaker()
         return scoped_session(session_factory)
 
-    def get_session(self) -> Session:
+    def get_session(self, use_replica: bool = True) -> Session:
         """
-        Get a new session object.
+        Get a new session object, on an available replica if any.
+
+        :param use_replica: Allow the session to be opened on a replica. Reads which must see
+            the latest data written to the primary pass False.
 
         :return Session: SQLAlchemy session object
         """
+        if use_replica and self.replicas.replicas:
+            self._check_replicas_if_due()
+        if use_replica and (replica := self.replicas.choose()) is not None:
+            return replica.get_session()
+        # Creating the engine binds the session factory to it
+        self.engine
         return self.Session()
 
+    def replication_lag(self) -> float:
+        """
+        Query the seconds this database lags behind its primary.
+
+        :return float: Replication lag, 0 if this database is a primary
+        """
+        with self.engine.connect() as connection:
+            return float(connection.execute(REPLICATION_LAG_QUERY).scalar())
+
+    def latest_data_version(self) -> str | None:
+        """
+        Query the latest data version loaded into this database.
+
+        :return str | None: Data version, or None if no data was loaded yet
+        """
+        with self.engine.connect() as connection:
+            return connection.execute(DATA_VERSION_QUERY).scalar()
+
+    def check_replicas(self) -> None:
+        """
+        Check that each replica answers, and record its replication lag and, if replicas
+        must be on the current data version, its latest data version.
+        """
+        self._replicas_checked_at = time.monotonic()
+        for name, replica in self.replicas.replicas.items():
+            try:
+                lag = replica.replication_lag()
+                version = (
+                    replica.latest_data_version()
+                    if self.replicas.data_version is not None
+                    else None
+                )
+            except REPLICA_ERRORS as e:
+                self.replicas.record(name, error=str(e))
+            else:
+                self.replicas.record(name, lag_seconds=lag, data_version=version)
+
+    def _check_replicas_if_due(self) -> None:
+        """Check the replicas if they were last checked over replica_check_interval ago."""
+        checked_at = self._replicas_checked_at
+        if (
+            checked_at is not None
+            and time.monotonic() - checked_at < self.replica_check_interval
+        ):
+            return
+        # One thread checks while the others route on the last recorded state
+        if self._check_lock.acquire(blocking=False):
+            try:
+                self.check_replicas()
+            finally:
+                self._check_lock.release()
+
+    def pools(self) -> dict[str, "DatabaseSession"]:
+        """Session managers of the primary and each replica, keyed on their name"""
+        return {"primary": self, **self.replicas.replicas}
+
+    def pool_status(self) -> dict[str, float]:
+        """Current occupancy of the connection pool, as returned by pool_status"""
+        return pool_status(self._engine, self.pool)
+
     def close(self) -> None:
         """
-        Clean up resources used by this database session manager.
+        Clean up resources used by this database session manager and its replicas.
         """
         self.Session.remove()
-        self.engine.dispose()
+        if self._engine is not None:
+            self._engine.dispose()
+        for replica in self.replicas.replicas.values():
+            replica.close()
 
     def __del__(self) -> None:
         """
@@ -73,3 +458,203 @@ class DatabaseSession:
         """
         with contextlib.suppress(Exception):
             self.close()
+
+
+class AsyncDatabaseSession:
+    """
+    Class for managing asyncio database connections and sessions.
+    Provides read-only access to the boardgame analytics database without blocking the event loop.
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        pool: PoolSettings | None = None,
+        replica_urls: Sequence[str] = (),
+        max_replica_lag: float | None = None,
+        data_version: Callable[[], str | None] | None = None,
+    ) -> None:
+        """
+        Initialize the async database session manager. The engine is created on first use,
+        or by warm().
+
+        :param connection_string: Database connection string of the primary using an asyncio driver,
+            e.g. postgresql+asyncpg.
+        :param pool: Connection pool settings. Defaults to PoolSettings().
+        :param replica_urls: Database connection strings of replicas to route reads to.
+        :param max_replica_lag: Seconds a replica may lag behind the primary and still be used. No limit if None.
+        :param data_version: Returns the data version responses are served for, see ReplicaRouter.
+        """
+        self.connection_string: str = connection_string
+        self.pool = pool or PoolSettings()
+        self.metrics = PoolMetrics()
+        self._engine: AsyncEngine | None = None
+        self.Session: async_sessionmaker[AsyncSession] = self._create_session_factory()
+        self.replicas: ReplicaRouter[AsyncDatabaseSession] = ReplicaRouter(
+            {
+                f"replica{i}": AsyncDatabaseSession(url, pool=self.pool)
+                for i, url in enumerate(replica_urls, start=1)
+            },
+            max_lag=max_replica_lag,
+            data_version=data_version,
+        )
+        self._check_task: asyncio.Task | None = None
+
+    @property
+    def engine(self) -> AsyncEngine:
+        """SQLAlchemy async engine, created on first use"""
+        if self._engine is None:
+            self._engine = self._create_engine()
+            self._engine.pool.metrics = self.metrics  # type: ignore[attr-defined]
+        return self._engine
+
+    def _create_engine(self) -> AsyncEngine:
+        """
+        Create SQLAlchemy async engine with read-only configuration.
+        The engine keeps its own connection pool, separate from any synchronous engine.
+
+        :return AsyncEngine: Configured SQLAlchemy async engine
+        """
+        return create_async_engine(
+            self.connection_string,
+            poolclass=InstrumentedAsyncAdaptedQueuePool,
+            connect_args={
+                "server_settings": {
+                    "default_transaction_read_only": "on",
+                    "statement_timeout": str(self.pool.statement_timeout_ms),
+                },
+                "timeout": self.pool.connect_timeout,
+            },
+            **self.pool.engine_options(),
+        )
+
+    @staticmethod
+    def _create_session_factory() -> async_sessionmaker[AsyncSession]:
+        """
+        Create an async session factory.
+        Sessions are not shared between tasks, so no scoping is needed.
+
+        :return async_sessionmaker[AsyncSession]: Async session factory
+        """
+        return async_sessionmaker(expire_on_commit=False)
+
+    def get_session(self, use_replica: bool = True) -> AsyncSession:
+        """
+        Get a new async session object, on an available replica if any. Use it as an async
+        context manager to close it.
+
+        :param use_replica: Allow the session to be opened on a replica. Reads which must see
+            the latest data written to the primary pass False.
+
+        :return AsyncSession: SQLAlchemy async session object
+        """
+        if use_replica and (replica := self.replicas.choose()) is not None:
+            return replica.get_session()
+        return self.Session(bind=self.engine)
+
+    async def warm(self) -> None:
+        """
+        Create the engines and open pool_size connections to the primary and each replica, so
+        the first requests don't wait for connections to be established. Replicas which can't
+        be reached are marked unhealthy.
+        """
+        async with contextlib.AsyncExitStack() as stack:
+            for _ in range(self.pool.pool_size):
+                connection = await stack.enter_async_context(self.engine.connect())
+                await connection.execute(text("SELECT 1"))
+        for name, replica in self.replicas.replicas.items():
+            try:
+                await replica.warm()
+            except REPLICA_ERRORS as e:
+                self.replicas.record(name, error=str(e))
+
+    async def replication_lag(self) -> float:
+        """
+        Query the seconds this database lags behind its primary.
+
+        :return float: Replication lag, 0 if this database is a primary
+        """
+        async with self.engine.connect() as connection:
+            return float((await connection.execute(REPLICATION_LAG_QUERY)).scalar())
+
+    async def latest_data_version(self) -> str | None:
+        """
+        Query the latest data version loaded into this database.
+
+        :return str | None: Data version, or None if no data was loaded yet
+        """
+        async with self.engine.connect() as connection:
+            return (await connection.execute(DATA_VERSION_QUERY)).scalar()
+
+    async def _replica_state(
+        self, replica: "AsyncDatabaseSession"
+    ) -> tuple[float, str | None]:
+        """Replication lag of a replica and, if it must be checked, its latest data version"""
+        lag = await replica.replication_lag()
+        if self.replicas.data_version is None:
+            return lag, None
+        return lag, await replica.latest_data_version()
+
+    async def _check_replica(self, name: str, replica: "AsyncDatabaseSession") -> None:
+        """Check that a replica answers within the connect timeout, and record its state."""
+        try:
+            lag, version = await asyncio.wait_for(
+                self._replica_state(replica), timeout=self.pool.connect_timeout
+            )
+        except REPLICA_ERRORS as e:
+            self.replicas.record(name, error=str(e) or type(e).__name__)
+        else:
+            self.replicas.record(name, lag_seconds=lag, data_version=version)
+
+    async def check_replicas(self) -> None:
+        """
+        Check that each replica answers, and record its replication lag and, if replicas
+        must be on the current data version, its latest data version.
+        """
+        await asyncio.gather(
+            *(
+                self._check_replica(name, replica)
+                for name, replica in self.replicas.replicas.items()
+            )
+        )
+
+    async def _poll_replicas(self, interval: float) -> None:
+        """Check the replicas every interval seconds until cancelled."""
+        while True:
+            await asyncio.sleep(interval)
+            await self.check_replicas()
+
+    def start_replica_checks(self, interval: float) -> None:
+        """
+        Start checking the replicas in the background, if there are any.
+
+        :param interval: Seconds between checks
+        """
+        if self.replicas.replicas and self._check_task is None:
+            self._check_task = asyncio.create_task(self._poll_replicas(interval))
+
+    async def stop_replica_checks(self) -> None:
+        """Stop checking the replicas in the background."""
+        if self._check_task is not None:
+            self._check_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._check_task
+            self._check_task = None
+
+    def pools(self) -> dict[str, "AsyncDatabaseSession"]:
+        """Session managers of the primary and each replica, keyed on their name"""
+        return {"primary": self, **self.replicas.replicas}
+
+    def pool_status(self) -> dict[str, float]:
+        """Current occupancy of the connection pool, as returned by pool_status"""
+        return pool_status(self._engine, self.pool)
+
+    async def close(self) -> None:
+        """
+        Clean up resources used by this database session manager and its replicas.
+        """
+        await self.stop_replica_checks()
+        if self._engine is not None:
+            await self._engine.dispose()
+        for replica in self.replicas.replicas.values():
+            await replica.close()
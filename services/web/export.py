@@ -0,0 +1,206 @@
+"""
+export.py - Streaming encoders for bulk table exports.
+
+Rows are read from a server-side cursor one batch at a time and each batch is encoded and
+sent before the next is read, so an export holds a single batch in memory whatever the
+size of the table. NDJSON and CSV batches may be gzip compressed on the fly; Parquet files
+are written one row group per batch and compress their column chunks themselves.
+"""
+
+import csv
+import io
+import json
+import zlib
+from abc import ABC, abstractmethod
+from collections.abc import AsyncIterator, Sequence
+from typing import Any, Literal
+
+import pyarrow as pa  # type: ignore
+import pyarrow.parquet as pq  # type: ignore
+from sqlalchemy import Column, Float, Integer, SmallInteger, Text
+
+ExportFormat = Literal["ndjson", "csv", "parquet"]
+ExportCompression = Literal["none", "gzip"]
+
+# Arrow type of each exported SQLAlchemy column type. Columns of other types are not exported.
+ARROW_TYPES = {
+    Integer: pa.int32(),
+    SmallInteger: pa.int16(),
+    Float: pa.float64(),
+    Text: pa.string(),
+}
+
+
+def export_columns(columns: Sequence[Column]) -> list[Column]:
+    """Get the columns of a table that can be exported, in table order"""
+    return [column for column in columns if type(column.type) in ARROW_TYPES]
+
+
+class ExportEncoder(ABC):
+    """
+    Encodes batches of rows into consecutive chunks of an export file.
+    """
+
+    media_type: str
+    extension: str
+
+    def __init__(self, columns: Sequence[Column]) -> None:
+        """
+        Initialize the encoder.
+
+        :param columns: Exported columns, in row order
+        """
+        self.columns = list(columns)
+        self.names = [column.key for column in columns]
+
+    def header(self) -> bytes:
+        """Bytes preceding the first batch."""
+        return b""
+
+    @abstractmethod
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        """Encode a batch of rows."""
+
+    def footer(self) -> bytes:
+        """Bytes following the last batch."""
+        return b""
+
+
+class NdjsonEncoder(ExportEncoder):
+    """One JSON object per line."""
+
+    media_type = "application/x-ndjson"
+    extension = "ndjson"
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        return b"".join(
+            json.dumps(dict(zip(self.names, row)), separators=(",", ":")).encode()
+            + b"\n"
+            for row in rows
+        )
+
+
+class CsvEncoder(ExportEncoder):
+    """CSV with a header line. NULL values are empty fields."""
+
+    media_type = "text/csv"
+    extension = "csv"
+
+    def _lines(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        buffer = io.StringIO()
+        csv.writer(buffer, lineterminator="\n").writerows(rows)
+        return buffer.getvalue().encode()
+
+    def header(self) -> bytes:
+        return self._lines([self.names])
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        return self._lines(rows)
+
+
+class _ChunkSink:
+    """Write-only file collecting the bytes written since they were last taken."""
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.position = 0
+        self.closed = False
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+class ParquetEncoder(ExportEncoder):
+    """Parquet file with one row group per batch."""
+
+    media_type = "application/vnd.apache.parquet"
+    extension = "parquet"
+
+    def __init__(self, columns: Sequence[Column], compression: str = "none") -> None:
+        """
+        Initialize the encoder.
+
+        :param columns: Exported columns, in row order
+        :param compression: Parquet compression codec of the column chunks
+        """
+        super().__init__(columns)
+        self.schema = pa.schema(
+            [
+                pa.field(column.key, ARROW_TYPES[type(column.type)], column.nullable)
+                for column in self.columns
+            ]
+        )
+        self._sink = _ChunkSink()
+        self._writer = pq.ParquetWriter(
+            self._sink, self.schema, compression=compression
+        )
+
+    def header(self) -> bytes:
+        return self._sink.take()
+
+    def encode(self, rows: Sequence[Sequence[Any]]) -> bytes:
+        batch = pa.RecordBatch.from_arrays(
+            [
+                pa.array([row[i] for row in rows], type=field.type)
+                for i, field in enumerate(self.schema)
+            ],
+            schema=self.schema,
+        )
+        self._writer.write_batch(batch)
+        return self._sink.take()
+
+    def footer(self) -> bytes:
+        self._writer.close()
+        return self._sink.take()
+
+
+def create_encoder(
+    export_format: ExportFormat,
+    columns: Sequence[Column],
+    compression: ExportCompression = "none",
+) -> ExportEncoder:
+    """
+    Create the encoder of an export format.
+
+    :param export_format: Format of the export file
+    :param columns: Exported columns, in row order
+    :param compression: Compression of the export. Applied to the column chunks of Parquet files.
+
+    :return ExportEncoder: Encoder of the format
+    """
+    if export_format == "parquet":
+        return ParquetEncoder(columns, compression=compression)
+    if export_format == "csv":
+        return CsvEncoder(columns)
+    return NdjsonEncoder(columns)
+
+
+async def gzip_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+    """
+    Gzip compress a stream of chunks. Every chunk is flushed to a byte boundary, so the
+    client can decompress each batch as soon as it arrives.
+
+    :param chunks: Uncompressed chunks
+
+    :return AsyncIterator[bytes]: Chunks of a gzip stream
+    """
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        yield compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+    yield compressor.flush()
@@ -0,0 +1,131 @@
+"""
+filters.py - Filter parameters of game endpoints.
+
+Range filters map onto single GameDetails columns and link filters onto EXISTS subqueries
+over the link tables, each backed by an index in db/init/05_create_indexes.sql.
+"""
+
+from dataclasses import asdict, dataclass
+from typing import Any
+
+import web.db.models as models  # type: ignore
+from fastapi import Query
+from sqlalchemy import ColumnElement, exists
+
+# Range filters as (column, lower bound parameter, upper bound parameter)
+RANGE_FILTERS = (
+    (models.GameDetails.year_published, "year_min", "year_max"),
+    (models.GameDetails.bayes_rating, "rating_min", "rating_max"),
+    (models.GameDetails.average_weight, "weight_min", "weight_max"),
+    (models.GameDetails.playing_time, "playtime_min", "playtime_max"),
+)
+
+# Link filters as (parameter, link table, linked id column)
+LINK_FILTERS = (
+    ("mechanic", models.GameMechanicLink, models.GameMechanicLink.mechanic_id),
+    ("category", models.GameCategoryLink, models.GameCategoryLink.category_id),
+    ("designer", models.GameDesignerLink, models.GameDesignerLink.designer_id),
+    ("artist", models.GameArtistLink, models.GameArtistLink.artist_id),
+    ("publisher", models.GamePublisherLink, models.GamePublisherLink.publisher_id),
+)
+
+
+@dataclass(frozen=True)
+class GameFilters:
+    """Filters of a game query. Games must match every given filter."""
+
+    year_min: int | None = None
+    year_max: int | None = None
+    rating_min: float | None = None
+    rating_max: float | None = None
+    weight_min: float | None = None
+    weight_max: float | None = None
+    playtime_min: int | None = None
+    playtime_max: int | None = None
+    players: int | None = None
+    age: int | None = None
+    mechanic: tuple[int, ...] = ()
+    category: tuple[int, ...] = ()
+    designer: tuple[int, ...] = ()
+    artist: tuple[int, ...] = ()
+    publisher: tuple[int, ...] = ()
+
+    def active(self) -> dict[str, Any]:
+        """Filters which were given, for use in cache keys"""
+        return {
+            name: value
+            for name, value in asdict(self).items()
+            if value is not None and value != ()
+        }
+
+
+def get_game_filters(
+    year_min: int | None = None,
+    year_max: int | None = None,
+    rating_min: float | None = None,
+    rating_max: float | None = None,
+    weight_min: float | None = Query(None, ge=0, le=5),
+    weight_max: float | None = Query(None, ge=0, le=5),
+    playtime_min: int | None = Query(None, ge=0),
+    playtime_max: int | None = Query(None, ge=0),
+    players: int | None = Query(None, ge=1, description="Supported player count"),
+    age: int | None = Query(None, ge=0, description="Age of the youngest player"),
+    mechanic: list[int] = Query([], description="Mechanic ids, all must match"),
+    category: list[int] = Query([], description="Category ids, all must match"),
+    designer: list[int] = Query([], description="Designer ids, all must match"),
+    artist: list[int] = Query([], description="Artist ids, all must match"),
+    publisher: list[int] = Query([], description="Publisher ids, all must match"),
+) -> GameFilters:
+    """FastAPI dependency reading game filters from the query string"""
+    return GameFilters(
+        year_min=year_min,
+        year_max=year_max,
+        rating_min=rating_min,
+        rating_max=rating_max,
+        weight_min=weight_min,
+        weight_max=weight_max,
+        playtime_min=playtime_min,
+        playtime_max=playtime_max,
+        players=players,
+        age=age,
+        mechanic=tuple(sorted(set(mechanic))),
+        category=tuple(sorted(set(category))),
+        designer=tuple(sorted(set(designer))),
+        artist=tuple(sorted(set(artist))),
+        publisher=tuple(sorted(set(publisher))),
+    )
+
+
+def build_game_filters(filters: GameFilters) -> list[ColumnElement[bool]]:
+    """
+    Build the WHERE clauses of a game query.
+
+    :param filters: Filter parameters
+
+    :return list[ColumnElement[bool]]: Filter expressions, combined with AND
+    """
+    clauses: list[ColumnElement[bool]] = []
+
+    for column, lower, upper in RANGE_FILTERS:
+        if (value := getattr(filters, lower)) is not None:
+            clauses.append(column >= value)
+        if (value := getattr(filters, upper)) is not None:
+            clauses.append(column <= value)
+
+    if filters.players is not None:
+        clauses.append(models.GameDetails.min_players <= filters.players)
+        clauses.append(models.GameDetails.max_players >= filters.players)
+    if filters.age is not None:
+        clauses.append(models.GameDetails.min_age <= filters.age)
+
+    for name, link, id_column in LINK_FILTERS:
+        for linked_id in getattr(filters, name):
+            clauses.append(
+                exists()
+                .where(
+                    link.game_id == models.GameDetails.game_id, id_column == linked_id
+                )
+                .correlate(models.GameDetails)
+            )
+
+    return clauses
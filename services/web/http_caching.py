@@ -0,0 +1,70 @@
+"""
+http_caching.py - Conditional GET support derived from the pipeline's data version.
+
+Responses carry an ETag of the current data version and a Cache-Control max-age, and
+requests whose If-None-Match matches the current version are answered with 304 Not
+Modified before reaching any route, so no query is run.
+"""
+
+from collections.abc import Awaitable, Callable, Collection
+
+from fastapi import FastAPI, Request, Response
+from web.data_version import DataVersionTracker  # type: ignore
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    Check an If-None-Match header against an ETag, using weak comparison.
+
+    :param if_none_match: Value of the If-None-Match request header
+    :param etag: Current ETag
+
+    :return bool: True if the client's cached representation is current
+    """
+    current = etag.removeprefix("W/")
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*" or candidate.removeprefix("W/") == current:
+            return True
+    return False
+
+
+def add_http_caching(
+    app: FastAPI,
+    tracker: DataVersionTracker,
+    max_age: int,
+    excluded_paths: Collection[str] = (),
+) -> None:
+    """
+    Add conditional GET handling to an app.
+
+    :param app: FastAPI app
+    :param tracker: Tracker of the current data version
+    :param max_age: Seconds clients and proxies may reuse a response without revalidating
+    :param excluded_paths: Paths whose responses don't derive from the data version
+    """
+    cache_control = f"public, max-age={max_age}"
+
+    @app.middleware("http")
+    async def conditional_get(
+        request: Request, call_next: Callable[[Request], Awaitable[Response]]
+    ) -> Response:
+        etag = tracker.etag
+        if (
+            request.method not in ("GET", "HEAD")
+            or etag is None
+            or request.url.path in excluded_paths
+        ):
+            return await call_next(request)
+
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None and etag_matches(if_none_match, etag):
+            return Response(
+                status_code=304, headers={"ETag": etag, "Cache-Control": cache_control}
+            )
+
+        response = await call_next(request)
+        if response.status_code == 200:
+            response.headers.setdefault("ETag", etag)
+            response.headers.setdefault("Cache-Control", cache_control)
+        return response
@@ -1,6 +1,46 @@
+import logging
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from common import config  # type: ignore
 from fastapi import FastAPI
+from web.data_version import tracker as data_version_tracker  # type: ignore
+from web.http_caching import add_http_caching  # type: ignore
+from web.routers.autocomplete import router as autocomplete_router  # type: ignore
+from web.routers.export import router as export_router  # type: ignore
+from web.routers.games import db as games_db  # type: ignore
 from web.routers.games import router as games_router  # type: ignore
+from web.routers.metrics import router as metrics_router  # type: ignore
+from web.routers.search import router as search_router  # type: ignore
+from web.routers.stats import router as stats_router  # type: ignore
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    try:
+        await games_db.warm()
+    except Exception as e:
+        logging.error(f"Failed to warm the database connection pool: {e}")
+    await games_db.check_replicas()
+    games_db.start_replica_checks(interval=config.db_replica_check_seconds)
+    data_version_tracker.start(games_db, interval=config.data_version_poll_seconds)
+    yield
+    await data_version_tracker.stop()
+    await games_db.close()
+
+
+app = FastAPI(lifespan=lifespan)
 
-app = FastAPI()
+add_http_caching(
+    app,
+    data_version_tracker,
+    max_age=config.api_cache_max_age,
+    excluded_paths={"/metrics"},
+)
 
 app.include_router(games_router)
+app.include_router(search_router)
+app.include_router(autocomplete_router)
+app.include_router(stats_router)
+app.include_router(export_router)
+app.include_router(metrics_router)
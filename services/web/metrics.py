@@ -0,0 +1,125 @@
+"""
+metrics.py - Process metrics in the Prometheus text exposition format.
+
+Connection pool checkouts, wait times and occupancy of the primary and each replica, replica
+health, and query cache hits and misses, are counted per worker process. Scrape every
+worker, or aggregate the per-process series, when running several.
+"""
+
+from collections.abc import Iterable
+
+from web.cache import QueryCache  # type: ignore
+from web.db.session import WAIT_BUCKETS, AsyncDatabaseSession  # type: ignore
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _metric(
+    name: str, kind: str, description: str, samples: Iterable[tuple[str, float]]
+) -> list[str]:
+    """Render a metric family as its HELP and TYPE lines and one line per sample."""
+    lines = [f"# HELP {name} {description}", f"# TYPE {name} {kind}"]
+    lines.extend(f"{name}{labels} {value:g}" for labels, value in samples)
+    return lines
+
+
+def render_metrics(db: AsyncDatabaseSession, cache: QueryCache) -> str:
+    """
+    Render the metrics of the connection pools, replicas and query cache.
+
+    :param db: Database session manager
+    :param cache: Query result cache
+
+    :return str: Metrics in the Prometheus text exposition format
+    """
+    lines = []
+    databases = db.pools()
+    pools = {name: f'{{pool="{name}"}}' for name in databases}
+
+    lines += _metric(
+        "bga_db_pool_checkouts_total",
+        "counter",
+        "Connections checked out of the pool.",
+        (
+            (pools[name], database.metrics.checkouts)
+            for name, database in databases.items()
+        ),
+    )
+    lines += _metric(
+        "bga_db_pool_checkout_timeouts_total",
+        "counter",
+        "Checkouts that gave up waiting for a connection.",
+        (
+            (pools[name], database.metrics.timeouts)
+            for name, database in databases.items()
+        ),
+    )
+
+    wait = "bga_db_pool_checkout_wait_seconds"
+    lines += [
+        f"# HELP {wait} Time spent waiting for a pool connection.",
+        f"# TYPE {wait} histogram",
+    ]
+    for name, database in databases.items():
+        cumulative = 0
+        for bound, count in zip([*WAIT_BUCKETS, "+Inf"], database.metrics.wait_counts):
+            cumulative += count
+            lines.append(f'{wait}_bucket{{pool="{name}",le="{bound}"}} {cumulative}')
+        lines.append(f"{wait}_sum{pools[name]} {database.metrics.wait_seconds:g}")
+        lines.append(f"{wait}_count{pools[name]} {database.metrics.checkouts}")
+
+    statuses = {name: database.pool_status() for name, database in databases.items()}
+    for key, description in [
+        ("checked_out", "Connections currently checked out."),
+        ("idle", "Open connections waiting in the pool."),
+        ("overflow", "Connections open beyond the pool size."),
+        ("saturation", "Share of the maximum connections currently checked out."),
+    ]:
+        lines += _metric(
+            f"bga_db_pool_{key}",
+            "gauge",
+            description,
+            ((pools[name], status[key]) for name, status in statuses.items()),
+        )
+    lines += _metric(
+        "bga_db_pool_max_connections",
+        "gauge",
+        "Pool size plus maximum overflow.",
+        (
+            (pools[name], database.pool.pool_size + database.pool.max_overflow)
+            for name, database in databases.items()
+        ),
+    )
+
+    available = db.replicas.available()
+    lines += _metric(
+        "bga_db_replica_available",
+        "gauge",
+        "Whether the replica passed its last health check within the lag threshold, on the "
+        "current data version.",
+        ((pools[name], name in available) for name in db.replicas.status),
+    )
+    lines += _metric(
+        "bga_db_replica_lag_seconds",
+        "gauge",
+        "Replication lag reported by the last health check of the replica.",
+        (
+            (pools[name], status.lag_seconds)
+            for name, status in db.replicas.status.items()
+            if status.lag_seconds is not None
+        ),
+    )
+
+    lines += _metric(
+        "bga_query_cache_hits_total",
+        "counter",
+        "Query results served from the cache.",
+        [("", cache.hits)],
+    )
+    lines += _metric(
+        "bga_query_cache_misses_total",
+        "counter",
+        "Query results computed and cached.",
+        [("", cache.misses)],
+    )
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,239 @@
+"""
+pagination.py - Keyset (cursor) pagination helpers.
+
+Pages are ordered by a sort column with the primary key as tie-breaker, NULL sort values last.
+The cursor token encodes the sort key of the last row of a page, so the next page is found
+with an index range scan instead of an OFFSET. The rows with a sort value and the NULL tail
+are separate ranges, each queried with its own range predicate, as a predicate spanning
+both can't be answered from the index. Within a range the NULL placement doesn't change the
+order, so ascending ranges sort NULLS FIRST, the backward scan of a (column DESC NULLS LAST,
+key DESC) index.
+"""
+
+import base64
+import binascii
+import json
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any, Literal
+
+from fastapi import HTTPException
+from sqlalchemy import ColumnElement, Select, and_, text, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import InstrumentedAttribute
+
+SortOrder = Literal["asc", "desc"]
+
+RowFetcher = Callable[[AsyncSession, Select], Awaitable[Sequence[Any]]]
+
+
+def encode_cursor(sort: str, order: SortOrder, value: Any, key: Any) -> str:
+    """
+    Encode the sort key of the last row of a page into an opaque cursor token.
+
+    :param sort: Name of the sort column
+    :param order: Sort direction
+    :param value: Sort column value of the last row
+    :param key: Primary key of the last row
+
+    :return str: URL-safe cursor token
+    """
+    payload = json.dumps([sort, order, value, key], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def is_cursor_value(value: Any, value_type: type) -> bool:
+    """Check that a value decoded from a cursor has the Python type of a column"""
+    if isinstance(value, bool):
+        return value_type is bool
+    if value_type is float:
+        return isinstance(value, (int, float))
+    return isinstance(value, value_type)
+
+
+def decode_cursor(
+    token: str, sort: str, order: SortOrder, value_type: type, key_type: type = int
+) -> tuple[Any, Any]:
+    """
+    Decode a cursor token, checking it was issued for the same ordering and holds values of
+    the sort and key column types, so a tampered cursor never reaches the database.
+
+    :param token: Cursor token returned with a previous page
+    :param sort: Name of the requested sort column
+    :param order: Requested sort direction
+    :param value_type: Python type of the sort column. The value may also be None.
+    :param key_type: Python type of the primary key
+
+    :return tuple[Any, Any]: Sort column value and primary key of the last row of the previous page
+    """
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor_sort, cursor_order, value, key = json.loads(
+            base64.urlsafe_b64decode(padded.encode())
+        )
+    except (binascii.Error, UnicodeDecodeError, ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid cursor") from e
+
+    if (cursor_sort, cursor_order) != (sort, order):
+        raise HTTPException(
+            status_code=400, detail="Cursor was issued for a different sort order"
+        )
+    if not (value is None or is_cursor_value(value, value_type)) or not is_cursor_value(
+        key, key_type
+    ):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return value, key
+
+
+def keyset_order_by(
+    sort_column: InstrumentedAttribute,
+    key_column: InstrumentedAttribute,
+    order: SortOrder,
+) -> list[ColumnElement]:
+    """
+    Build the ORDER BY clause of the ranges of a keyset-paginated query. Only valid with
+    the ranges of keyset_queries, each holding either rows with a sort value or NULLs.
+
+    :param sort_column: Column to sort by
+    :param key_column: Primary key column, used as tie-breaker
+    :param order: Sort direction
+
+    :return list[ColumnElement]: ORDER BY expressions
+    """
+    if sort_column is key_column:
+        return [key_column.desc() if order == "desc" else key_column.asc()]
+    if order == "desc":
+        return [sort_column.desc().nulls_last(), key_column.desc()]
+    return [sort_column.asc().nulls_first(), key_column.asc()]
+
+
+def keyset_filters(
+    sort_column: InstrumentedAttribute,
+    key_column: InstrumentedAttribute,
+    order: SortOrder,
+    value: Any,
+    key: Any,
+) -> list[ColumnElement[bool]]:
+    """
+    Build the WHERE clauses of the consecutive ranges of rows after the cursor position.
+    While the cursor has a sort value, the rows after it with a sort value come first,
+    followed by the whole NULL tail. Once it is in the NULL tail, only the rest of the tail
+    remains.
+
+    :param sort_column: Column to sort by
+    :param key_column: Primary key column, used as tie-breaker
+    :param order: Sort direction
+    :param value: Sort column value of the last row of the previous page
+    :param key: Primary key of the last row of the previous page
+
+    :return list[ColumnElement[bool]]: Filter expression of each range, in page order
+    """
+    after = (lambda a, b: a < b) if order == "desc" else (lambda a, b: a > b)
+
+    if sort_column is key_column:
+        return [after(key_column, key)]
+    if value is None:
+        return [and_(sort_column.is_(None), after(key_column, key))]
+    return [
+        after(tuple_(sort_column, key_column), tuple_(value, key)),
+        sort_column.is_(None),
+    ]
+
+
+def keyset_queries(
+    query: Select,
+    sort_column: InstrumentedAttribute,
+    key_column: InstrumentedAttribute,
+    order: SortOrder,
+    position: tuple[Any, Any] | None,
+) -> list[Select]:
+    """
+    Split an ordered query into the ranges of rows after a cursor position. Without a
+    cursor, the ranges are the rows with a sort value and the NULL tail.
+
+    :param query: Filtered query, ordered with keyset_order_by
+    :param sort_column: Column to sort by
+    :param key_column: Primary key column, used as tie-breaker
+    :param order: Sort direction
+    :param position: Sort value and primary key of the last row of the previous page, if any
+
+    :return list[Select]: Query of each range of rows, in page order. Pass them to
+        fetch_keyset_rows.
+    """
+    if position is not None:
+        conditions = keyset_filters(sort_column, key_column, order, *position)
+    elif sort_column is key_column:
+        return [query]
+    else:
+        conditions = [sort_column.is_not(None), sort_column.is_(None)]
+    return [query.where(condition) for condition in conditions]
+
+
+async def _fetch_mappings(session: AsyncSession, query: Select) -> Sequence[Any]:
+    return (await session.execute(query)).mappings().all()
+
+
+async def fetch_keyset_rows(
+    session: AsyncSession,
+    queries: Sequence[Select],
+    limit: int,
+    fetch: RowFetcher = _fetch_mappings,
+) -> list[Any]:
+    """
+    Fetch up to limit rows from consecutive ranges, querying the next range only if the
+    previous ones hold too few rows.
+
+    :param session: Database session
+    :param queries: Query of each range, as returned by keyset_queries
+    :param limit: Maximum number of rows
+    :param fetch: Coroutine function executing a query. Defaults to returning its row mappings.
+
+    :return list[Any]: Rows, in page order
+    """
+    rows: list[Any] = []
+    for query in queries:
+        rows += await fetch(session, query.limit(limit - len(rows)))
+        if len(rows) >= limit:
+            break
+    return rows
+
+
+async def estimate_row_count(session: AsyncSession, table_name: str) -> int | None:
+    """
+    Estimate the number of rows in a table from planner statistics, avoiding a COUNT(*) scan.
+
+    :param session: Database session
+    :param table_name: Name of the table
+
+    :return int | None: Estimated row count, or None if the table has not been analyzed
+    """
+    result = await session.execute(
+        text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:table)"),
+        {"table": table_name},
+    )
+    estimate = result.scalar()
+    if estimate is None or estimate < 0:
+        return None
+    return int(estimate)
+
+
+async def estimate_query_rows(session: AsyncSession, query: Select) -> int | None:
+    """
+    Estimate the number of rows returned by a query from its query plan, avoiding a COUNT(*).
+
+    :param session: Database session
+    :param query: Query to estimate
+
+    :return int | None: Estimated row count, or None if the plan has no estimate
+    """
+    compiled = query.compile(
+        dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+    )
+    result = await session.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}"))
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    try:
+        return int(plan[0]["Plan"]["Plan Rows"])
+    except (TypeError, LookupError, ValueError):
+        return None
@@ -0,0 +1,56 @@
+from typing import Annotated
+
+import web.db.models as models  # type: ignore
+from fastapi import APIRouter, Query, Response
+from sqlalchemy import select
+from web.autocomplete import TitleIndexLoader  # type: ignore
+from web.data_version import tracker as data_version_tracker  # type: ignore
+from web.routers.games import db  # type: ignore
+from web.schemas import Autocomplete, render_json  # type: ignore
+
+router = APIRouter()
+
+title_index = TitleIndexLoader(db, data_version_tracker)
+
+
+@router.get("/autocomplete", response_model=Autocomplete)
+async def autocomplete(
+    q: Annotated[str, Query(min_length=1, max_length=100, description="Partial title")],
+    limit: Annotated[int, Query(ge=1, le=50, description="Maximum titles")] = 10,
+):
+    """
+    Complete a partial or misspelled title. Titles starting with the input come first,
+    most popular first, followed by the closest fuzzy matches.
+    """
+    # A stale index is still better than the database fallback while it is rebuilt
+    if (index := title_index.value) is not None:
+        matches = index.complete(q, limit)
+    else:
+        # Until the index is built, fall back to a prefix match in the database
+        pattern = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        async with db.get_session() as session:
+            matches = (
+                await session.execute(
+                    select(models.GameDetails.game_id, models.GameDetails.title)
+                    .where(models.GameDetails.title.ilike(f"{pattern}%", escape="\\"))
+                    .order_by(
+                        models.GameDetails.popularity.desc().nulls_last(),
+                        models.GameDetails.game_id,
+                    )
+                    .limit(limit)
+                )
+            ).all()
+
+    return Response(
+        render_json(
+            Autocomplete.model_validate(
+                {
+                    "items": [
+                        {"game_id": game_id, "title": title}
+                        for game_id, title in matches
+                    ]
+                }
+            )
+        ),
+        media_type="application/json",
+    )
@@ -0,0 +1,96 @@
+import asyncio
+from collections.abc import AsyncIterator
+from typing import Literal
+
+import web.db.models as models  # type: ignore
+from common import config  # type: ignore
+from fastapi import APIRouter
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from web.export import (  # type: ignore
+    ExportCompression,
+    ExportFormat,
+    create_encoder,
+    export_columns,
+    gzip_stream,
+)
+from web.routers.games import db  # type: ignore
+
+router = APIRouter()
+
+# Exports waiting for a slot don't hold a connection, so they can't exhaust the pool
+export_slots = asyncio.Semaphore(config.api_max_concurrent_exports)
+
+ExportTable = Literal[
+    "games",
+    "mechanics",
+    "categories",
+    "designers",
+    "artists",
+    "publishers",
+    "game_mechanics",
+    "game_categories",
+    "game_designers",
+    "game_artists",
+    "game_publishers",
+    "similar_games",
+]
+
+EXPORT_TABLES = {
+    "games": models.GameDetails,
+    "mechanics": models.MechanicDetails,
+    "categories": models.CategoryDetails,
+    "designers": models.DesignerDetails,
+    "artists": models.ArtistDetails,
+    "publishers": models.PublisherDetails,
+    "game_mechanics": models.GameMechanicLink,
+    "game_categories": models.GameCategoryLink,
+    "game_designers": models.GameDesignerLink,
+    "game_artists": models.GameArtistLink,
+    "game_publishers": models.GamePublisherLink,
+    "similar_games": models.GameSimilarity,
+}
+
+
+@router.get("/export/{table}")
+async def export(
+    table: ExportTable,
+    format: ExportFormat = "ndjson",
+    compression: ExportCompression = "none",
+):
+    """
+    Stream every row of a table in primary key order, as NDJSON, CSV or Parquet. With
+    compression=gzip, NDJSON and CSV are sent gzip encoded and Parquet column chunks are
+    gzip compressed.
+
+    Rows are read from the primary, which is never behind the data version in the ETag.
+    At most API_MAX_CONCURRENT_EXPORTS exports stream at once, later ones wait for a slot.
+    """
+    model = EXPORT_TABLES[table]
+    columns = export_columns(model.__table__.columns)
+    query = (
+        select(*columns)
+        .order_by(*model.__table__.primary_key.columns)
+        .execution_options(yield_per=config.api_export_batch_size)
+    )
+    encoder = create_encoder(format, columns, compression)
+
+    async def stream_rows() -> AsyncIterator[bytes]:
+        yield encoder.header()
+        async with export_slots, db.get_session(use_replica=False) as session:
+            result = await session.stream(query)
+            async for rows in result.partitions():
+                yield encoder.encode(rows)
+        yield encoder.footer()
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="{table}.{encoder.extension}"'
+    }
+    if compression == "gzip" and format != "parquet":
+        headers["Content-Encoding"] = "gzip"
+        return StreamingResponse(
+            gzip_stream(stream_rows()), media_type=encoder.media_type, headers=headers
+        )
+    return StreamingResponse(
+        stream_rows(), media_type=encoder.media_type, headers=headers
+    )
@@ -1,16 +1,568 @@
+import json
+from collections.abc import AsyncIterator
+from typing import Annotated, Any, Literal
+
 import web.db.models as models  # type: ignore
 from common import config  # type: ignore
-from fastapi import APIRouter
-from web.db.session import DatabaseSession  # type: ignore
+from fastapi import APIRouter, Body, Depends, HTTPException, Path, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import (
+    ARRAY,
+    Integer,
+    Select,
+    Text,
+    and_,
+    any_,
+    bindparam,
+    cast,
+    func,
+    select,
+)
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from web.cache import make_cache_key, query_cache  # type: ignore
+from web.data_version import tracker as data_version_tracker  # type: ignore
+from web.db.session import AsyncDatabaseSession, PoolSettings  # type: ignore
+from web.filters import (  # type: ignore
+    LINK_FILTERS,
+    GameFilters,
+    build_game_filters,
+    get_game_filters,
+)
+from web.pagination import (  # type: ignore
+    SortOrder,
+    decode_cursor,
+    encode_cursor,
+    estimate_query_rows,
+    estimate_row_count,
+    fetch_keyset_rows,
+    keyset_order_by,
+    keyset_queries,
+)
+from web.schemas import (  # type: ignore
+    GAME_FIELD_GROUPS,
+    Facets,
+    GameBatch,
+    GameDetailsSchema,
+    GamesPage,
+    GamesWithLinksPage,
+    GameWithLinksSchema,
+    Page,
+    SimilarGameSchema,
+    SimilarGamesPage,
+    render_json,
+    render_raw_page,
+    resolve_fields,
+    schema_columns,
+    sparse_schema,
+)
+from web.snapshot import (  # type: ignore
+    BITSET_LINKS,
+    FACET_PLAYER_COUNTS,
+    CatalogSnapshotLoader,
+)
 
 router = APIRouter()
 
-db = DatabaseSession(connection_string=config.db_url)
+db = AsyncDatabaseSession(
+    connection_string=config.db_async_url,
+    pool=PoolSettings.from_config(),
+    replica_urls=config.db_replica_async_urls,
+    max_replica_lag=config.db_replica_max_lag,
+    data_version=lambda: data_version_tracker.version,
+)
+# Replicas are only used on the current data version, so check them as soon as it changes
+data_version_tracker.add_listener(lambda version: db.check_replicas())
+
+SortColumn = Literal[
+    "game_id", "bayes_rating", "popularity", "year_published", "average_weight"
+]
+
+SORT_COLUMNS = {
+    "game_id": models.GameDetails.game_id,
+    "bayes_rating": models.GameDetails.bayes_rating,
+    "popularity": models.GameDetails.popularity,
+    "year_published": models.GameDetails.year_published,
+    "average_weight": models.GameDetails.average_weight,
+}
+
+catalog = CatalogSnapshotLoader(db, data_version_tracker, sort_keys=SORT_COLUMNS)
+
+# Link relationships of a game as (response field, link relationship, details relationship)
+LINK_RELATIONS = (
+    ("mechanics", models.GameDetails.mechanics, models.GameMechanicLink.mechanic),
+    ("categories", models.GameDetails.categories, models.GameCategoryLink.category),
+    ("designers", models.GameDetails.designers, models.GameDesignerLink.designer),
+    ("artists", models.GameDetails.artists, models.GameArtistLink.artist),
+    ("publishers", models.GameDetails.publishers, models.GamePublisherLink.publisher),
+)
+
+# Loads every link relation with one SELECT ... IN query per link type, however many games are loaded
+LINK_LOADER_OPTIONS = [
+    selectinload(links).joinedload(details, innerjoin=True)
+    for _, links, details in LINK_RELATIONS
+]
+
+GAME_FIELDS_DESCRIPTION = (
+    "Comma-separated fields and field groups "
+    f"({', '.join(GAME_FIELD_GROUPS)}) to return. Defaults to full."
+)
+
+Limit = Annotated[
+    int, Query(ge=1, le=config.api_max_page_size, description="Maximum page size")
+]
+
+
+def decode_game_cursor(cursor: str, sort: str, order: SortOrder) -> tuple[Any, Any]:
+    """Decode a cursor of a game page sorted by one of SORT_COLUMNS"""
+    return decode_cursor(cursor, sort, order, SORT_COLUMNS[sort].type.python_type)
+
+
+def paginate(
+    query: Select,
+    filters: GameFilters,
+    sort: str,
+    order: SortOrder,
+    cursor: str | None,
+) -> list[Select]:
+    """
+    Apply filters and keyset pagination to a game query.
+
+    :param query: Query selecting from game_details
+    :param filters: Filters to apply
+    :param sort: Name of the sort column
+    :param order: Sort direction
+    :param cursor: Cursor returned with the previous page, if any
+
+    :return list[Select]: Filtered and ordered queries of the ranges after the cursor,
+        without a limit, as returned by keyset_queries
+    """
+    sort_column = SORT_COLUMNS[sort]
+    key_column = models.GameDetails.game_id
+
+    query = query.where(*build_game_filters(filters)).order_by(
+        *keyset_order_by(sort_column, key_column, order)
+    )
+    position = decode_game_cursor(cursor, sort, order) if cursor else None
+    return keyset_queries(query, sort_column, key_column, order, position)
+
+
+def game_with_links(game: models.GameDetails) -> dict[str, Any]:
+    """
+    Convert a game with eager-loaded link relations into GameWithLinksSchema fields.
+
+    :param game: Game loaded with LINK_LOADER_OPTIONS
+
+    :return dict[str, Any]: Game columns and id/name pairs of each link type
+    """
+    item = {field: getattr(game, field) for field in GameDetailsSchema.model_fields}
+    for field, links, details in LINK_RELATIONS:
+        entities = [getattr(link, details.key) for link in getattr(game, links.key)]
+        item[field] = sorted(
+            (
+                {
+                    "id": getattr(entity, f"{details.key}_id"),
+                    "name": getattr(entity, f"{details.key}_name"),
+                }
+                for entity in entities
+            ),
+            key=lambda entity: entity["id"],
+        )
+    return item
+
+
+@router.get("/games", response_model=GamesPage)
+async def games(
+    filters: Annotated[GameFilters, Depends(get_game_filters)],
+    sort: SortColumn = "popularity",
+    order: SortOrder = "desc",
+    limit: Limit = config.api_default_page_size,
+    cursor: str | None = None,
+    include_total: bool = False,
+    fields: str | None = Query(None, description=GAME_FIELDS_DESCRIPTION),
+):
+    selected_fields = resolve_fields(
+        fields, GameDetailsSchema, GAME_FIELD_GROUPS, required=("game_id",)
+    )
+    item_schema = sparse_schema(GameDetailsSchema, selected_fields)
+
+    # The sort column is selected for the cursor even when it isn't returned
+    columns = schema_columns(models.GameDetails, item_schema)
+    if sort not in selected_fields:
+        columns.append(SORT_COLUMNS[sort])
+    queries = paginate(select(*columns), filters, sort, order, cursor)
+    where = build_game_filters(filters)
+
+    async def fetch_rows() -> tuple[list[Any], int | None, bool | None]:
+        """Rows of the page, the total if requested, and whether it is an estimate"""
+        if (snapshot := catalog.current()) is not None:
+            position = decode_game_cursor(cursor, sort, order) if cursor else None
+            positions, total = snapshot.query(filters, sort, order, position, limit + 1)
+            fields = {*selected_fields, sort}
+            rows = snapshot.rows(positions, fields)
+            if include_total:
+                return rows, total, False
+            return rows, None, None
+
+        async with db.get_session() as session:
+            games = await fetch_keyset_rows(session, queries, limit + 1)
+            total_estimate = None
+            if include_total and where:
+                total_estimate = await estimate_query_rows(
+                    session, select(models.GameDetails.game_id).where(*where)
+                )
+            elif include_total:
+                total_estimate = await estimate_row_count(
+                    session, models.GameDetails.__tablename__
+                )
+        return games, total_estimate, True if include_total else None
+
+    async def fetch_page() -> bytes:
+        games, total_estimate, total_is_estimate = await fetch_rows()
+
+        next_cursor = None
+        if len(games) > limit:
+            games = games[:limit]
+            last = games[-1]
+            next_cursor = encode_cursor(sort, order, last[sort], last["game_id"])
+
+        return render_json(
+            Page[item_schema].model_validate(  # type: ignore[valid-type]
+                {
+                    "items": games,
+                    "next_cursor": next_cursor,
+                    "total_estimate": total_estimate,
+                    "total_is_estimate": total_is_estimate,
+                }
+            )
+        )
+
+    cache_key = make_cache_key(
+        "games",
+        sort=sort,
+        order=order,
+        limit=limit,
+        cursor=cursor,
+        include_total=include_total,
+        fields=selected_fields,
+        filters=filters.active(),
+    )
+    return Response(
+        await query_cache.get_or_compute(cache_key, fetch_page),
+        media_type="application/json",
+    )
+
+
+async def count_facets(
+    session: AsyncSession, filters: GameFilters
+) -> tuple[int, dict[str, list[tuple[int, int]]]]:
+    """
+    Count the games matching filters per mechanic, category and player count in the
+    database, with the result shape of CatalogSnapshot.facets.
+
+    :param session: Database session
+    :param filters: Filters to apply
+
+    :return tuple[int, dict[str, list[tuple[int, int]]]]: Number of matching games, and
+        the values and game counts of each facet
+    """
+    where = build_game_filters(filters)
+    total, *player_counts = (
+        await session.execute(
+            select(
+                func.count(),
+                *(
+                    func.count().filter(
+                        and_(
+                            models.GameDetails.min_players <= players,
+                            models.GameDetails.max_players >= players,
+                        )
+                    )
+                    for players in FACET_PLAYER_COUNTS
+                ),
+            )
+            .select_from(models.GameDetails)
+            .where(*where)
+        )
+    ).one()
+
+    facets = {}
+    matching = select(models.GameDetails.game_id).where(*where)
+    for name, link, id_column in LINK_FILTERS:
+        if name not in BITSET_LINKS:
+            continue
+        game_count = func.count()
+        rows = await session.execute(
+            select(id_column, game_count)
+            .where(link.game_id.in_(matching))
+            .group_by(id_column)
+            .order_by(game_count.desc(), id_column)
+        )
+        facets[name] = [(value, count) for value, count in rows.all()]
+    facets["players"] = [
+        (players, count)
+        for players, count in zip(FACET_PLAYER_COUNTS, player_counts)
+        if count > 0
+    ]
+    return total, facets
+
+
+@router.get("/games/facets", response_model=Facets)
+async def game_facets(filters: Annotated[GameFilters, Depends(get_game_filters)]):
+    """
+    Count the games matching the filters per mechanic, category and supported player count.
+    Values matching no game are left out.
+    """
+
+    async def fetch_facets() -> bytes:
+        if (snapshot := catalog.current()) is not None:
+            total, facets = snapshot.facets(filters)
+        else:
+            async with db.get_session() as session:
+                total, facets = await count_facets(session, filters)
+
+        return render_json(
+            Facets.model_validate(
+                {
+                    "total": total,
+                    **{
+                        name: [
+                            {"value": value, "count": count} for value, count in values
+                        ]
+                        for name, values in facets.items()
+                    },
+                }
+            )
+        )
+
+    cache_key = make_cache_key("facets", filters=filters.active())
+    return Response(
+        await query_cache.get_or_compute(cache_key, fetch_facets),
+        media_type="application/json",
+    )
+
+
+async def assemble_documents(
+    session: AsyncSession, game_ids: list[int]
+) -> dict[int, str]:
+    """
+    Assemble game documents from the link tables, for games whose document isn't built yet.
+
+    :param session: Database session
+    :param game_ids: Ids of the games
+
+    :return dict[int, str]: JSON encoded documents keyed on game id
+    """
+    games = await session.scalars(
+        select(models.GameDetails)
+        .options(*LINK_LOADER_OPTIONS)
+        .where(models.GameDetails.game_id.in_(game_ids))
+    )
+    return {
+        game.game_id: GameWithLinksSchema.model_validate(
+            game_with_links(game)
+        ).model_dump_json()
+        for game in games
+    }
+
+
+async def fetch_documents(session: AsyncSession, query: Select) -> list[dict[str, Any]]:
+    """
+    Read the documents of the games selected by a query, with one lookup in game_documents.
+    Games whose document isn't built yet are assembled from the link tables instead.
+
+    :param session: Database session
+    :param query: Query selecting game_id and the document as text, outer joined to game_documents
+
+    :return list[dict[str, Any]]: Rows of the query, with every document filled in
+    """
+    rows = [dict(row) for row in (await session.execute(query)).mappings()]
+    missing = [row["game_id"] for row in rows if row["document"] is None]
+    if not missing:
+        return rows
+
+    assembled = await assemble_documents(session, missing)
+    for row in rows:
+        if row["document"] is None:
+            row["document"] = assembled[row["game_id"]]
+    return rows
+
+
+def select_documents(*columns: Any) -> Select:
+    """Select game ids and documents as JSON text, along with any other columns"""
+    return select(
+        models.GameDetails.game_id,
+        *columns,
+        cast(models.GameDocument.document, Text).label("document"),
+    ).outerjoin(
+        models.GameDocument,
+        models.GameDocument.game_id == models.GameDetails.game_id,
+    )
+
+
+@router.get("/games/details", response_model=GamesWithLinksPage)
+async def games_with_links(
+    filters: Annotated[GameFilters, Depends(get_game_filters)],
+    sort: SortColumn = "popularity",
+    order: SortOrder = "desc",
+    limit: Limit = config.api_default_page_size,
+    cursor: str | None = None,
+):
+    queries = paginate(
+        select_documents(SORT_COLUMNS[sort].label("sort_value")),
+        filters,
+        sort,
+        order,
+        cursor,
+    )
+
+    async def fetch_page() -> bytes:
+        async with db.get_session() as session:
+            rows = await fetch_keyset_rows(
+                session, queries, limit + 1, fetch=fetch_documents
+            )
+
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            last = rows[-1]
+            next_cursor = encode_cursor(
+                sort, order, last["sort_value"], last["game_id"]
+            )
+
+        return render_raw_page([row["document"] for row in rows], next_cursor)
+
+    cache_key = make_cache_key(
+        "games/details",
+        sort=sort,
+        order=order,
+        limit=limit,
+        cursor=cursor,
+        filters=filters.active(),
+    )
+    return Response(
+        await query_cache.get_or_compute(cache_key, fetch_page),
+        media_type="application/json",
+    )
+
+
+@router.post("/games/batch", response_model=GameBatch)
+async def games_batch(
+    ids: Annotated[
+        list[int],
+        Body(
+            embed=True,
+            min_length=1,
+            max_length=config.api_max_batch_size,
+            description="Ids of the games to look up",
+        ),
+    ],
+):
+    game_ids = sorted(set(ids))
+    query = select_documents().where(
+        models.GameDetails.game_id == any_(bindparam("ids", game_ids, ARRAY(Integer)))
+    )
+
+    async def stream_batch() -> AsyncIterator[bytes]:
+        found: set[int] = set()
+        separator = b""
+        yield b'{"items":['
+        async with db.get_session() as session:
+            undocumented = []
+            async for row in (await session.stream(query)).mappings():
+                found.add(row["game_id"])
+                if row["document"] is None:
+                    undocumented.append(row["game_id"])
+                    continue
+                yield separator + row["document"].encode()
+                separator = b","
+
+            if undocumented:
+                assembled = await assemble_documents(session, undocumented)
+                for game_id in undocumented:
+                    yield separator + assembled[game_id].encode()
+                    separator = b","
+
+        missing = [game_id for game_id in game_ids if game_id not in found]
+        yield f'],"missing":{json.dumps(missing)}}}'.encode()
+
+    return StreamingResponse(stream_batch(), media_type="application/json")
+
+
+@router.get("/games/{game_id}", response_model=GameWithLinksSchema)
+async def game(game_id: Annotated[int, Path(ge=1)]):
+    query = select_documents().where(models.GameDetails.game_id == game_id)
+
+    async def fetch_game() -> bytes:
+        async with db.get_session() as session:
+            rows = await fetch_documents(session, query)
+        if not rows:
+            raise HTTPException(status_code=404, detail="Game not found")
+        return rows[0]["document"].encode()
+
+    return Response(
+        await query_cache.get_or_compute(
+            make_cache_key("game", game_id=game_id), fetch_game
+        ),
+        media_type="application/json",
+    )
+
+
+@router.get("/games/{game_id}/similar", response_model=SimilarGamesPage)
+async def similar_games(
+    game_id: Annotated[int, Path(ge=1)],
+    limit: Annotated[
+        int, Query(ge=1, le=config.similar_games_top_k, description="Maximum games")
+    ] = 10,
+    fields: str | None = Query(None, description=GAME_FIELDS_DESCRIPTION),
+):
+    """
+    Games most similar to a game by mechanics, categories, designers, publishers, weight,
+    player count and playing time, most similar first.
+    """
+    selected_fields = resolve_fields(
+        fields,
+        SimilarGameSchema,
+        GAME_FIELD_GROUPS,
+        required=("game_id", "score"),
+    )
+    item_schema = sparse_schema(SimilarGameSchema, selected_fields)
+    query = (
+        select(
+            *(
+                getattr(models.GameDetails, field)
+                for field in selected_fields
+                if field != "score"
+            ),
+            models.GameSimilarity.score,
+        )
+        .join(
+            models.GameSimilarity,
+            models.GameSimilarity.similar_game_id == models.GameDetails.game_id,
+        )
+        .where(models.GameSimilarity.game_id == game_id)
+        .order_by(models.GameSimilarity.rank)
+        .limit(limit)
+    )
 
+    async def fetch_similar() -> bytes:
+        async with db.get_session() as session:
+            games = (await session.execute(query)).mappings().all()
+            if not games and await session.get(models.GameDetails, game_id) is None:
+                raise HTTPException(status_code=404, detail="Game not found")
 
-@router.get("/games")
-async def games():
-    with db.get_session() as session:
-        games = session.query(models.GameDetails).all()
+        return render_json(
+            Page[item_schema].model_validate(  # type: ignore[valid-type]
+                {"items": games}
+            )
+        )
 
-    return games
+    return Response(
+        await query_cache.get_or_compute(
+            make_cache_key(
+                "similar", game_id=game_id, limit=limit, fields=selected_fields
+            ),
+            fetch_similar,
+        ),
+        media_type="application/json",
+    )
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, Response
+from web.cache import query_cache  # type: ignore
+from web.metrics import CONTENT_TYPE, render_metrics  # type: ignore
+from web.routers.games import db  # type: ignore
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Connection pool and query cache metrics of this worker process, for Prometheus."""
+    return Response(
+        render_metrics(db, query_cache),
+        media_type=CONTENT_TYPE,
+        headers={"Cache-Control": "no-store"},
+    )
@@ -0,0 +1,99 @@
+from typing import Annotated
+
+import web.db.models as models  # type: ignore
+from common import config  # type: ignore
+from fastapi import APIRouter, HTTPException, Query, Response
+from sqlalchemy import Float, cast, func, select, tuple_
+from web.cache import make_cache_key, query_cache  # type: ignore
+from web.pagination import (  # type: ignore
+    decode_cursor,
+    encode_cursor,
+    is_cursor_value,
+)
+from web.routers.games import GAME_FIELDS_DESCRIPTION, Limit, db  # type: ignore
+from web.schemas import (  # type: ignore
+    GAME_FIELD_GROUPS,
+    GameDetailsSchema,
+    GamesPage,
+    Page,
+    render_json,
+    resolve_fields,
+    schema_columns,
+    sparse_schema,
+)
+
+router = APIRouter()
+
+# Text search configuration of game_details.search_vector
+SEARCH_CONFIG = "english"
+
+
+@router.get("/search", response_model=GamesPage)
+async def search(
+    q: Annotated[str, Query(min_length=1, max_length=200, description="Search terms")],
+    limit: Limit = config.api_default_page_size,
+    cursor: str | None = None,
+    fields: str | None = Query(None, description=GAME_FIELDS_DESCRIPTION),
+):
+    """
+    Search game titles and descriptions. Terms use web search syntax, e.g. "quoted phrases",
+    OR and -excluded terms. Results are ranked with title matches above description matches,
+    then by popularity.
+    """
+    selected_fields = resolve_fields(
+        fields, GameDetailsSchema, GAME_FIELD_GROUPS, required=("game_id",)
+    )
+    item_schema = sparse_schema(GameDetailsSchema, selected_fields)
+
+    ts_query = func.websearch_to_tsquery(SEARCH_CONFIG, q)
+    rank = func.ts_rank_cd(models.GameDetails.search_vector, ts_query)
+    popularity = func.coalesce(models.GameDetails.popularity, cast("-Infinity", Float))
+    sort_key = tuple_(rank, popularity, models.GameDetails.game_id)
+
+    query = (
+        select(
+            *schema_columns(models.GameDetails, item_schema),
+            rank.label("search_rank"),
+            popularity.label("search_popularity"),
+        )
+        .where(models.GameDetails.search_vector.op("@@")(ts_query))
+        .order_by(rank.desc(), popularity.desc(), models.GameDetails.game_id.desc())
+    )
+    if cursor is not None:
+        value, key = decode_cursor(cursor, "relevance", "desc", value_type=list)
+        # The sort value is the rank and popularity of the last game
+        if value is None or len(value) != 2:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        last_rank, last_popularity = value
+        if not all(is_cursor_value(part, float) for part in value):
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        query = query.where(sort_key < tuple_(last_rank, last_popularity, key))
+
+    async def fetch_page() -> bytes:
+        async with db.get_session() as session:
+            games = (await session.execute(query.limit(limit + 1))).mappings().all()
+
+        next_cursor = None
+        if len(games) > limit:
+            games = games[:limit]
+            last = games[-1]
+            next_cursor = encode_cursor(
+                "relevance",
+                "desc",
+                [last["search_rank"], last["search_popularity"]],
+                last["game_id"],
+            )
+
+        return render_json(
+            Page[item_schema].model_validate(  # type: ignore[valid-type]
+                {"items": games, "next_cursor": next_cursor}
+            )
+        )
+
+    cache_key = make_cache_key(
+        "search", q=q, limit=limit, cursor=cursor, fields=selected_fields
+    )
+    return Response(
+        await query_cache.get_or_compute(cache_key, fetch_page),
+        media_type="application/json",
+    )
@@ -0,0 +1,205 @@
+from typing import Any, Literal
+
+import web.db.models as models  # type: ignore
+from common import config  # type: ignore
+from fastapi import APIRouter, Query, Response
+from sqlalchemy import ColumnElement, Select, select
+from web.cache import make_cache_key, query_cache  # type: ignore
+from web.pagination import (  # type: ignore
+    SortOrder,
+    decode_cursor,
+    encode_cursor,
+    fetch_keyset_rows,
+    keyset_order_by,
+    keyset_queries,
+)
+from web.routers.games import Limit, db  # type: ignore
+from web.schemas import (  # type: ignore
+    AggregateStatsSchema,
+    EntityStatsPage,
+    YearStatsPage,
+    render_json,
+)
+
+router = APIRouter()
+
+StatsSort = Literal[
+    "game_count",
+    "mean_rating",
+    "median_rating",
+    "mean_weight",
+    "median_weight",
+    "mean_playing_time",
+    "median_playing_time",
+    "mean_popularity",
+]
+YearStatsSort = Literal[StatsSort, "year_published"]
+StatsEntity = Literal["mechanics", "categories", "designers", "artists", "publishers"]
+
+# Aggregate view of each linked entity type as (view, id column, name column)
+ENTITY_STATS_VIEWS = {
+    "mechanics": (
+        models.MechanicStats,
+        models.MechanicStats.mechanic_id,
+        models.MechanicStats.mechanic_name,
+    ),
+    "categories": (
+        models.CategoryStats,
+        models.CategoryStats.category_id,
+        models.CategoryStats.category_name,
+    ),
+    "designers": (
+        models.DesignerStats,
+        models.DesignerStats.designer_id,
+        models.DesignerStats.designer_name,
+    ),
+    "artists": (
+        models.ArtistStats,
+        models.ArtistStats.artist_id,
+        models.ArtistStats.artist_name,
+    ),
+    "publishers": (
+        models.PublisherStats,
+        models.PublisherStats.publisher_id,
+        models.PublisherStats.publisher_name,
+    ),
+}
+
+MIN_GAMES_DESCRIPTION = "Leave out groups with fewer games"
+
+
+def stats_columns(view: Any) -> list[ColumnElement]:
+    """Get the statistics columns of an aggregate view"""
+    return [getattr(view, field) for field in AggregateStatsSchema.model_fields]
+
+
+async def fetch_stats_page(
+    queries: list[Select],
+    sort: str,
+    order: SortOrder,
+    key: str,
+    limit: int,
+    page_model: Any,
+) -> bytes:
+    """
+    Fetch a page of aggregate statistics and render it as JSON.
+
+    :param queries: Filtered and ordered queries of the ranges after the cursor, without a limit
+    :param sort: Name of the sort column, selected by the query
+    :param order: Sort direction
+    :param key: Name of the key column, selected by the query
+    :param limit: Maximum page size
+    :param page_model: Page model to render with
+
+    :return bytes: JSON encoded page
+    """
+    async with db.get_session() as session:
+        rows = await fetch_keyset_rows(session, queries, limit + 1)
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, order, last[sort], last[key])
+
+    return render_json(
+        page_model.model_validate({"items": rows, "next_cursor": next_cursor})
+    )
+
+
+@router.get("/stats/years", response_model=YearStatsPage)
+async def year_stats(
+    sort: YearStatsSort = "year_published",
+    order: SortOrder = "desc",
+    limit: Limit = config.api_default_page_size,
+    cursor: str | None = None,
+    min_games: int = Query(1, ge=1, description=MIN_GAMES_DESCRIPTION),
+    year_min: int | None = None,
+    year_max: int | None = None,
+):
+    """
+    Game count and rating, weight, playing time and popularity statistics per publication year.
+    """
+    view = models.YearStats
+    sort_column = getattr(view, sort)
+    query = (
+        select(view.year_published, *stats_columns(view))
+        .where(view.game_count >= min_games)
+        .order_by(*keyset_order_by(sort_column, view.year_published, order))
+    )
+    if year_min is not None:
+        query = query.where(view.year_published >= year_min)
+    if year_max is not None:
+        query = query.where(view.year_published <= year_max)
+    position = (
+        decode_cursor(cursor, sort, order, sort_column.type.python_type)
+        if cursor
+        else None
+    )
+    queries = keyset_queries(query, sort_column, view.year_published, order, position)
+
+    cache_key = make_cache_key(
+        "stats/years",
+        sort=sort,
+        order=order,
+        limit=limit,
+        cursor=cursor,
+        min_games=min_games,
+        year_min=year_min,
+        year_max=year_max,
+    )
+    return Response(
+        await query_cache.get_or_compute(
+            cache_key,
+            lambda: fetch_stats_page(
+                queries, sort, order, "year_published", limit, YearStatsPage
+            ),
+        ),
+        media_type="application/json",
+    )
+
+
+@router.get("/stats/{entity}", response_model=EntityStatsPage)
+async def entity_stats(
+    entity: StatsEntity,
+    sort: StatsSort = "game_count",
+    order: SortOrder = "desc",
+    limit: Limit = config.api_default_page_size,
+    cursor: str | None = None,
+    min_games: int = Query(1, ge=1, description=MIN_GAMES_DESCRIPTION),
+):
+    """
+    Game count and rating, weight, playing time and popularity statistics per mechanic,
+    category, designer, artist or publisher.
+    """
+    view, id_column, name_column = ENTITY_STATS_VIEWS[entity]
+    sort_column = getattr(view, sort)
+    query = (
+        select(id_column.label("id"), name_column.label("name"), *stats_columns(view))
+        .where(view.game_count >= min_games)
+        .order_by(*keyset_order_by(sort_column, id_column, order))
+    )
+    position = (
+        decode_cursor(cursor, sort, order, sort_column.type.python_type)
+        if cursor
+        else None
+    )
+    queries = keyset_queries(query, sort_column, id_column, order, position)
+
+    cache_key = make_cache_key(
+        f"stats/{entity}",
+        sort=sort,
+        order=order,
+        limit=limit,
+        cursor=cursor,
+        min_games=min_games,
+    )
+    return Response(
+        await query_cache.get_or_compute(
+            cache_key,
+            lambda: fetch_stats_page(
+                queries, sort, order, "id", limit, EntityStatsPage
+            ),
+        ),
+        media_type="application/json",
+    )
@@ -0,0 +1,301 @@
+"""
+schemas.py - Response models of the web API.
+
+Each model mirrors a table in web/db/models.py. Queries select only the columns of the
+model they respond with, and responses are serialized to JSON bytes by pydantic-core.
+"""
+
+import functools
+import json
+from typing import Any, Generic, TypeVar
+
+from fastapi import HTTPException
+from pydantic import BaseModel, ConfigDict, create_model
+from sqlalchemy import Column
+
+
+class Schema(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+
+class GameDetailsSchema(Schema):
+    game_id: int
+    title: str
+    description: str
+    year_published: int | None = None
+    avg_rating: float | None = None
+    bayes_rating: float | None = None
+    total_ratings: int | None = None
+    std_dev_ratings: float | None = None
+    min_players: int | None = None
+    max_players: int | None = None
+    playing_time: int | None = None
+    min_playtime: int | None = None
+    max_playtime: int | None = None
+    min_age: int | None = None
+    average_weight: float | None = None
+    total_weights: int | None = None
+    owned_copies: int | None = None
+    wishlist: int | None = None
+    popularity: float | None = None
+
+
+class MechanicDetailsSchema(Schema):
+    mechanic_id: int
+    mechanic_name: str
+
+
+class CategoryDetailsSchema(Schema):
+    category_id: int
+    category_name: str
+
+
+class ArtistDetailsSchema(Schema):
+    artist_id: int
+    artist_name: str
+
+
+class PublisherDetailsSchema(Schema):
+    publisher_id: int
+    publisher_name: str
+
+
+class DesignerDetailsSchema(Schema):
+    designer_id: int
+    designer_name: str
+
+
+class GameMechanicLinkSchema(Schema):
+    game_id: int
+    mechanic_id: int
+
+
+class GameCategoryLinkSchema(Schema):
+    game_id: int
+    category_id: int
+
+
+class GameDesignerLinkSchema(Schema):
+    game_id: int
+    designer_id: int
+
+
+class GameArtistLinkSchema(Schema):
+    game_id: int
+    artist_id: int
+
+
+class GamePublisherLinkSchema(Schema):
+    game_id: int
+    publisher_id: int
+
+
+class LinkedEntitySchema(BaseModel):
+    id: int
+    name: str
+
+
+class GameWithLinksSchema(GameDetailsSchema):
+    mechanics: list[LinkedEntitySchema] = []
+    categories: list[LinkedEntitySchema] = []
+    designers: list[LinkedEntitySchema] = []
+    artists: list[LinkedEntitySchema] = []
+    publishers: list[LinkedEntitySchema] = []
+
+
+ItemT = TypeVar("ItemT", bound=BaseModel)
+
+
+class Page(BaseModel, Generic[ItemT]):
+    items: list[ItemT]
+    next_cursor: str | None = None
+    total_estimate: int | None = None
+    # False when total_estimate is an exact count, None when no total was requested
+    total_is_estimate: bool | None = None
+
+
+GamesPage = Page[GameDetailsSchema]
+GamesWithLinksPage = Page[GameWithLinksSchema]
+
+
+class SimilarGameSchema(GameDetailsSchema):
+    score: float
+
+
+SimilarGamesPage = Page[SimilarGameSchema]
+
+
+class GameBatch(BaseModel):
+    items: list[GameWithLinksSchema]
+    missing: list[int]
+
+
+class AggregateStatsSchema(Schema):
+    game_count: int
+    mean_rating: float | None = None
+    median_rating: float | None = None
+    mean_weight: float | None = None
+    median_weight: float | None = None
+    mean_playing_time: float | None = None
+    median_playing_time: float | None = None
+    mean_popularity: float | None = None
+
+
+class EntityStatsSchema(AggregateStatsSchema):
+    id: int
+    name: str
+
+
+class YearStatsSchema(AggregateStatsSchema):
+    year_published: int
+
+
+EntityStatsPage = Page[EntityStatsSchema]
+YearStatsPage = Page[YearStatsSchema]
+
+
+class FacetCountSchema(BaseModel):
+    value: int
+    count: int
+
+
+class Facets(BaseModel):
+    total: int
+    mechanic: list[FacetCountSchema] = []
+    category: list[FacetCountSchema] = []
+    players: list[FacetCountSchema] = []
+
+
+class TitleMatchSchema(BaseModel):
+    game_id: int
+    title: str
+
+
+class Autocomplete(BaseModel):
+    items: list[TitleMatchSchema]
+
+
+# Field groups accepted by the fields parameter of game endpoints
+GAME_FIELD_GROUPS: dict[str, tuple[str, ...]] = {
+    "summary": (
+        "game_id",
+        "title",
+        "year_published",
+        "bayes_rating",
+        "min_players",
+        "max_players",
+        "playing_time",
+    ),
+    "stats": (
+        "game_id",
+        "avg_rating",
+        "bayes_rating",
+        "total_ratings",
+        "std_dev_ratings",
+        "average_weight",
+        "total_weights",
+        "owned_copies",
+        "wishlist",
+        "popularity",
+    ),
+    "full": tuple(GameDetailsSchema.model_fields),
+}
+
+
+def resolve_fields(
+    fields: str | None,
+    schema: type[BaseModel],
+    groups: dict[str, tuple[str, ...]],
+    default: str = "full",
+    required: tuple[str, ...] = (),
+) -> tuple[str, ...]:
+    """
+    Resolve a fields parameter into the response model fields to return.
+
+    :param fields: Comma-separated field names and field group names, or None for the default group
+    :param schema: Full response model
+    :param groups: Field groups keyed on name
+    :param default: Group returned when no fields are requested
+    :param required: Fields always returned, e.g. the primary key
+
+    :return tuple[str, ...]: Requested fields, in the order of the response model
+    """
+    requested = set(required)
+    for name in (fields or default).split(","):
+        name = name.strip()
+        if name in groups:
+            requested.update(groups[name])
+        elif name in schema.model_fields:
+            requested.add(name)
+        elif name:
+            raise HTTPException(status_code=400, detail=f"Unknown field: {name}")
+    return tuple(field for field in schema.model_fields if field in requested)
+
+
+@functools.cache
+def sparse_schema(schema: type[BaseModel], fields: tuple[str, ...]) -> type[BaseModel]:
+    """
+    Derive a response model holding only some of the fields of another.
+
+    :param schema: Full response model
+    :param fields: Fields to keep
+
+    :return type[BaseModel]: Response model with the given fields
+    """
+    if fields == tuple(schema.model_fields):
+        return schema
+    return create_model(  # type: ignore[call-overload]
+        f"{schema.__name__}[{','.join(fields)}]",
+        __base__=Schema,
+        **{
+            field: (schema.model_fields[field].annotation, schema.model_fields[field])
+            for field in fields
+        },
+    )
+
+
+def schema_columns(model: Any, schema: type[BaseModel]) -> list[Column]:
+    """
+    Get the columns of a table needed to build a response model.
+
+    :param model: SQLAlchemy model of the table
+    :param schema: Response model
+
+    :return list[Column]: Columns of the table, in the order of the response model fields
+    """
+    return [getattr(model, field) for field in schema.model_fields]
+
+
+def render_json(content: BaseModel) -> bytes:
+    """
+    Serialize a response model to JSON.
+
+    :param content: Response model
+
+    :return bytes: JSON encoded response body
+    """
+    return content.__pydantic_serializer__.to_json(content)
+
+
+def render_raw_page(
+    items: list[str],
+    next_cursor: str | None,
+    total_estimate: int | None = None,
+    total_is_estimate: bool | None = None,
+) -> bytes:
+    """
+    Serialize a page whose items are already JSON encoded, e.g. documents read from the database.
+
+    :param items: JSON encoded items
+    :param next_cursor: Cursor of the next page
+    :param total_estimate: Estimated total number of items
+    :param total_is_estimate: Whether total_estimate is an estimate rather than an exact count
+
+    :return bytes: JSON encoded page, in the shape of Page
+    """
+    return (
+        f'{{"items":[{",".join(items)}],'
+        f'"next_cursor":{json.dumps(next_cursor)},'
+        f'"total_estimate":{json.dumps(total_estimate)},'
+        f'"total_is_estimate":{json.dumps(total_is_estimate)}}}'
+    ).encode()
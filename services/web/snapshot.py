@@ -0,0 +1,392 @@
+"""
+snapshot.py - In-memory columnar snapshot of the game catalogue.
+
+game_details and the link tables change once per load and fit easily in memory, so the web
+service keeps them as NumPy arrays: one array per column, a bitset of games per mechanic,
+category and player count, sorted game positions per linked designer, artist and
+publisher, and a precomputed ordering per sort key. Filtered and sorted game pages are
+then answered with vectorized array operations, and facet counts with bitset
+intersections and popcounts, without a database round-trip. The snapshot is rebuilt in a
+worker thread when the data version changes, and swapped in once complete.
+
+The columns are mapped from the snapshot file the pipeline publishes for the version, so
+every worker process shares one copy of them through the page cache. If there is no such
+file, the snapshot is read from the database instead.
+"""
+
+import asyncio
+import logging
+from collections.abc import Iterable, Mapping, Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+from common import config  # type: ignore
+from common.snapshot_file import (  # type: ignore
+    StringColumn,
+    read_snapshot_file,
+    snapshot_file_path,
+)
+from numpy.typing import NDArray
+from sqlalchemy import Integer, Text, select
+from web.data_version import VersionedResource  # type: ignore
+from web.db import models  # type: ignore
+from web.filters import LINK_FILTERS, RANGE_FILTERS, GameFilters  # type: ignore
+from web.pagination import SortOrder  # type: ignore
+from web.schemas import GameDetailsSchema  # type: ignore
+
+# Link filters answered with bitsets, which also back their facet counts. Other link
+# types have too many entities to keep a bitset each, and are kept as sorted game
+# positions instead.
+BITSET_LINKS = ("mechanic", "category")
+
+# Player counts with a facet bucket of the games supporting them
+FACET_PLAYER_COUNTS = tuple(range(1, 9))
+
+# Columns kept as strings rather than numbers
+TEXT_COLUMNS = frozenset(
+    column.key
+    for column in models.GameDetails.__table__.columns
+    if isinstance(column.type, Text)
+)
+
+INTEGER_COLUMNS = frozenset(
+    column.key
+    for column in models.GameDetails.__table__.columns
+    if isinstance(column.type, Integer)
+)
+
+
+class CatalogSnapshot:
+    """
+    Immutable columnar copy of the games and their links.
+    """
+
+    def __init__(
+        self,
+        columns: Mapping[str, Sequence[Any] | StringColumn],
+        links: Mapping[str, tuple[Sequence[int], Sequence[int]]],
+        sort_keys: Iterable[str],
+    ) -> None:
+        """
+        Build the snapshot. Float64 arrays and string columns already in game id order, as
+        read from a snapshot file, are used without being copied.
+
+        :param columns: Values of each game_details column, for every game. NULL numbers may be None or NaN.
+        :param links: Game ids and linked ids of each LINK_FILTERS link table, keyed on filter name
+        :param sort_keys: Columns to precompute orderings for
+        """
+        game_ids = np.asarray(columns["game_id"], dtype=np.int64)
+        order = None if np.all(game_ids[1:] > game_ids[:-1]) else np.argsort(game_ids)
+        self.columns: dict[str, NDArray | StringColumn] = {}
+        for name, values in columns.items():
+            if name in TEXT_COLUMNS:
+                if not isinstance(values, StringColumn):
+                    values = StringColumn.from_values(values)
+                if order is not None:
+                    values = StringColumn.from_values(values.take(order))
+                self.columns[name] = values
+            else:
+                array = np.asarray(values, dtype=np.float64)
+                self.columns[name] = array if order is None else array[order]
+        self.game_ids = game_ids if order is None else game_ids[order]
+
+        self._bitsets: dict[str, tuple[NDArray, NDArray]] = {}
+        self._positions: dict[str, tuple[NDArray, NDArray, NDArray]] = {}
+        for name, (link_game_ids, linked_ids) in links.items():
+            self._index_link(name, np.asarray(link_game_ids), np.asarray(linked_ids))
+
+        self._orders = {
+            (sort, order): self._sort_order(sort, order)
+            for sort in sort_keys
+            for order in ("asc", "desc")
+        }
+        self._player_bitsets = self._player_count_bitsets()
+
+    @classmethod
+    def from_file(cls, path: Path, sort_keys: Iterable[str]) -> "CatalogSnapshot":
+        """
+        Map a snapshot file published by the pipeline. Columns stay in the shared mapping;
+        only the link indexes and orderings are built in this process.
+
+        :param path: Path of the snapshot file
+        :param sort_keys: Columns to precompute orderings for
+
+        :return CatalogSnapshot: Snapshot of the file
+        """
+        contents = read_snapshot_file(path)
+        if missing := set(GameDetailsSchema.model_fields) - set(contents.columns):
+            raise ValueError(f"{path} lacks columns {', '.join(sorted(missing))}")
+        return cls(contents.columns, contents.links, sort_keys)
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def _index_link(self, name: str, game_ids: NDArray, linked_ids: NDArray) -> None:
+        """Index the linked ids of each game, as bitsets or sorted game positions."""
+        known = np.isin(game_ids, self.game_ids)
+        positions: NDArray = np.searchsorted(self.game_ids, game_ids[known])
+        linked_ids = linked_ids[known]
+
+        by_linked_id = np.lexsort((positions, linked_ids))
+        positions, linked_ids = positions[by_linked_id], linked_ids[by_linked_id]
+        ids, starts = np.unique(linked_ids, return_index=True)
+        bounds = np.append(starts, len(positions))
+
+        if name in BITSET_LINKS:
+            # One row of 64-bit words per linked id
+            bitsets: NDArray = np.zeros(
+                (len(ids), -(-len(self) // 64)), dtype=np.uint64
+            )
+            for row, (start, end) in enumerate(zip(bounds[:-1], bounds[1:])):
+                members: NDArray = np.zeros(len(self), dtype=bool)
+                members[positions[start:end]] = True
+                bitsets[row] = pack_bits(members)
+            self._bitsets[name] = (ids, bitsets)
+        else:
+            self._positions[name] = (ids, bounds, positions.astype(np.int32))
+
+    def _sort_order(self, sort: str, order: SortOrder) -> NDArray:
+        """Positions of every game in sort order, NULLs last and game id as tie-breaker."""
+        values = self.columns[sort]
+        missing = np.isnan(values)
+        filled = np.where(missing, 0, values)
+        if order == "desc":
+            return np.lexsort((-self.game_ids, -filled, missing)).astype(np.int32)
+        return np.lexsort((self.game_ids, filled, missing)).astype(np.int32)
+
+    def _player_count_bitsets(self) -> NDArray:
+        """Bitsets of the games supporting each of FACET_PLAYER_COUNTS players."""
+        with np.errstate(invalid="ignore"):
+            return np.array(
+                [
+                    pack_bits(
+                        (self.columns["min_players"] <= players)
+                        & (self.columns["max_players"] >= players)
+                    )
+                    for players in FACET_PLAYER_COUNTS
+                ],
+                dtype=np.uint64,
+            ).reshape(len(FACET_PLAYER_COUNTS), -1)
+
+    def _bitset(self, name: str, linked_id: int) -> NDArray:
+        """Bitset of the games linked to an entity of a BITSET_LINKS type."""
+        if name in self._bitsets:
+            ids, bitsets = self._bitsets[name]
+            index = np.searchsorted(ids, linked_id)
+            if index < len(ids) and ids[index] == linked_id:
+                return bitsets[index]
+        return pack_bits(np.zeros(len(self), dtype=bool))
+
+    def _linked(self, name: str, linked_id: int) -> NDArray:
+        """Boolean mask of the games linked to an entity of another link type."""
+        members: NDArray = np.zeros(len(self), dtype=bool)
+        if name in self._positions:
+            ids, bounds, positions = self._positions[name]
+            index = np.searchsorted(ids, linked_id)
+            if index < len(ids) and ids[index] == linked_id:
+                start, end = bounds[index], bounds[index + 1]
+                members[positions[start:end]] = True
+        return members
+
+    def match(self, filters: GameFilters) -> NDArray:
+        """
+        Find the games matching filters, with the semantics of build_game_filters.
+
+        :param filters: Filter parameters
+
+        :return NDArray: Boolean mask over the games of the snapshot
+        """
+        mask: NDArray = np.ones(len(self), dtype=bool)
+        # Comparisons with NaN are False, so NULL values never match, like in SQL
+        with np.errstate(invalid="ignore"):
+            for column, lower, upper in RANGE_FILTERS:
+                if (value := getattr(filters, lower)) is not None:
+                    mask &= self.columns[column.key] >= value
+                if (value := getattr(filters, upper)) is not None:
+                    mask &= self.columns[column.key] <= value
+
+            if filters.players is not None:
+                mask &= self.columns["min_players"] <= filters.players
+                mask &= self.columns["max_players"] >= filters.players
+            if filters.age is not None:
+                mask &= self.columns["min_age"] <= filters.age
+
+        for name, _, _ in LINK_FILTERS:
+            linked_ids = getattr(filters, name)
+            if not linked_ids:
+                continue
+            if name in BITSET_LINKS:
+                words = np.bitwise_and.reduce(
+                    [self._bitset(name, linked_id) for linked_id in linked_ids]
+                )
+                mask &= unpack_bits(words, len(self))
+            else:
+                for linked_id in linked_ids:
+                    mask &= self._linked(name, linked_id)
+        return mask
+
+    def _after(self, sort: str, order: SortOrder, value: Any, key: Any) -> NDArray:
+        """Boolean mask of the games after a cursor, with the semantics of keyset_filters."""
+        after = np.less if order == "desc" else np.greater
+        after_key = after(self.game_ids, key)
+        if sort == "game_id":
+            return after_key
+
+        values = self.columns[sort]
+        missing = np.isnan(values)
+        if value is None:
+            return missing & after_key
+        with np.errstate(invalid="ignore"):
+            return after(values, value) | ((values == value) & after_key) | missing
+
+    def query(
+        self,
+        filters: GameFilters,
+        sort: str,
+        order: SortOrder,
+        position: tuple[Any, Any] | None,
+        limit: int,
+    ) -> tuple[NDArray, int]:
+        """
+        Find a page of games.
+
+        :param filters: Filter parameters
+        :param sort: Name of the sort column
+        :param order: Sort direction
+        :param position: Sort value and game id of the last game of the previous page, if any
+        :param limit: Maximum number of games
+
+        :return tuple[NDArray, int]: Positions of the games of the page, in order, and the
+            number of games matching the filters on all pages
+        """
+        mask = self.match(filters)
+        total = int(mask.sum())
+        if position is not None:
+            mask &= self._after(sort, order, *position)
+
+        ordered = self._orders[sort, order]
+        return ordered[mask[ordered]][:limit], total
+
+    def facets(
+        self, filters: GameFilters
+    ) -> tuple[int, dict[str, list[tuple[int, int]]]]:
+        """
+        Count the games matching filters per mechanic, category and player count, by
+        intersecting the matching games with the bitset of every value and counting bits.
+
+        :param filters: Filter parameters
+
+        :return tuple[int, dict[str, list[tuple[int, int]]]]: Number of matching games, and
+            the values and game counts of each facet, without values matching no game.
+            Mechanics and categories are ordered by descending count, player counts by value.
+        """
+        words = pack_bits(self.match(filters))
+        total = int(np.bitwise_count(words).sum())
+
+        facets = {}
+        for name, (ids, bitsets) in self._bitsets.items():
+            counts = _count_bits(bitsets, words)
+            order = np.lexsort((ids, -counts))
+            facets[name] = [
+                (int(ids[i]), int(counts[i])) for i in order if counts[i] > 0
+            ]
+
+        counts = _count_bits(self._player_bitsets, words)
+        facets["players"] = [
+            (players, int(count))
+            for players, count in zip(FACET_PLAYER_COUNTS, counts)
+            if count > 0
+        ]
+        return total, facets
+
+    def rows(self, positions: NDArray, fields: Iterable[str]) -> list[dict[str, Any]]:
+        """
+        Read games as dictionaries of their column values.
+
+        :param positions: Positions of the games
+        :param fields: Columns to read
+
+        :return list[dict[str, Any]]: Games, with NULL values as None
+        """
+        values: dict[str, list[Any]] = {}
+        for field in fields:
+            if field in TEXT_COLUMNS:
+                values[field] = self.columns[field].take(positions)
+                continue
+            column = self.columns[field][positions].tolist()
+            if field in INTEGER_COLUMNS:
+                values[field] = [None if v != v else int(v) for v in column]
+            else:
+                values[field] = [None if v != v else v for v in column]
+        return [dict(zip(values, row)) for row in zip(*values.values())]
+
+
+def pack_bits(members: NDArray) -> NDArray:
+    """Pack a boolean mask into 64-bit words."""
+    padded: NDArray = np.zeros(-(-len(members) // 64) * 64, dtype=bool)
+    padded[: len(members)] = members
+    return np.packbits(padded, bitorder="little").view(np.uint64)
+
+
+def _count_bits(bitsets: NDArray, words: NDArray) -> NDArray:
+    """Count the bits each row of bitsets has in common with words."""
+    return np.bitwise_count(bitsets & words).sum(axis=1, dtype=np.int64)
+
+
+def unpack_bits(words: NDArray, length: int) -> NDArray:
+    """Unpack 64-bit words into a boolean mask of the given length."""
+    return np.unpackbits(words.view(np.uint8), count=length, bitorder="little").view(
+        bool
+    )
+
+
+class CatalogSnapshotLoader(VersionedResource[CatalogSnapshot]):
+    """
+    Holds the current catalogue snapshot, rebuilt whenever the data version changes.
+    """
+
+    def __init__(self, *args: Any, sort_keys: Iterable[str], **kwargs: Any) -> None:
+        """
+        Initialize the loader.
+
+        :param sort_keys: Columns to precompute orderings for
+        """
+        super().__init__(*args, **kwargs)
+        self.sort_keys = tuple(sort_keys)
+
+    async def load(self, version: str) -> CatalogSnapshot:
+        """Map the snapshot file of the version, or read the games and their links."""
+        path = snapshot_file_path(config.snapshot_path, version)
+        if path.exists():
+            try:
+                snapshot = await asyncio.to_thread(
+                    CatalogSnapshot.from_file, path, self.sort_keys
+                )
+            except (OSError, ValueError) as e:
+                logging.warning(f"Failed to map catalogue snapshot {path}: {e}")
+            else:
+                logging.info(f"Mapped catalogue snapshot of {len(snapshot):,} games")
+                return snapshot
+
+        fields = list(GameDetailsSchema.model_fields)
+        async with self.db.get_session(use_replica=False) as session:
+            games = (
+                await session.execute(
+                    select(*(getattr(models.GameDetails, field) for field in fields))
+                )
+            ).all()
+            links = {}
+            for name, link, id_column in LINK_FILTERS:
+                rows = (await session.execute(select(link.game_id, id_column))).all()
+                links[name] = (
+                    [row[0] for row in rows],
+                    [row[1] for row in rows],
+                )
+
+        columns = {field: [game[i] for game in games] for i, field in enumerate(fields)}
+        snapshot = await asyncio.to_thread(
+            CatalogSnapshot, columns, links, self.sort_keys
+        )
+        logging.info(f"Built catalogue snapshot of {len(snapshot):,} games")
+        return snapshot
@@ -0,0 +1,80 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from services.common.snapshot_file import (
+    ALIGNMENT,
+    StringColumn,
+    read_snapshot_file,
+    snapshot_file_path,
+    write_snapshot_file,
+)
+
+
+class TestStringColumn:
+    @pytest.mark.parametrize(
+        "values",
+        [[], ["Catan"], ["Catan", "", "Café du Monde", "カタン"]],
+        ids=["empty", "one", "unicode_and_empty"],
+    )
+    def test_round_trip(self, values):
+        # Act
+        column = StringColumn.from_values(values)
+
+        # Assert
+        assert len(column) == len(values)
+        assert column.take(range(len(values))) == values
+        assert column.take(reversed(range(len(values)))) == values[::-1]
+
+
+class TestSnapshotFile:
+    def test_round_trip(self, tmp_path: Path):
+        # Arrange
+        path = snapshot_file_path(tmp_path / "snapshots", "abc123")
+        columns = {
+            "game_id": np.array([1.0, 2.0, 3.0]),
+            "title": StringColumn.from_values(["Catan", "Azul", "Brass: Birmingham"]),
+            "bayes_rating": np.array([7.0, np.nan, 8.5]),
+        }
+        links = {"mechanic": (np.array([1, 3]), np.array([10, 10])), "artist": ([], [])}
+
+        # Act
+        size = write_snapshot_file(path, columns, links, metadata={"games": 3})
+        contents = read_snapshot_file(path)
+
+        # Assert
+        assert path.name == "abc123.snapshot"
+        assert path.stat().st_size == size
+        assert list(path.parent.iterdir()) == [path]
+        assert contents.metadata == {"games": 3}
+        np.testing.assert_array_equal(contents.columns["game_id"], [1, 2, 3])
+        np.testing.assert_array_equal(
+            contents.columns["bayes_rating"], [7, np.nan, 8.5]
+        )
+        assert contents.columns["title"].take([2, 0]) == ["Brass: Birmingham", "Catan"]
+        np.testing.assert_array_equal(contents.links["mechanic"][0], [1, 3])
+        np.testing.assert_array_equal(contents.links["mechanic"][1], [10, 10])
+        assert len(contents.links["artist"][0]) == 0
+
+    def test_arrays_are_read_only_views_of_the_mapping(self, tmp_path: Path):
+        # Arrange
+        path = tmp_path / "v1.snapshot"
+        write_snapshot_file(path, {"game_id": np.arange(5, dtype=np.float64)}, {})
+
+        # Act
+        game_ids = read_snapshot_file(path).columns["game_id"]
+
+        # Assert
+        assert not game_ids.flags.writeable
+        assert not game_ids.flags.owndata
+        assert game_ids.ctypes.data % ALIGNMENT == 0
+
+    def test_not_a_snapshot_file(self, tmp_path: Path):
+        # Arrange
+        path = tmp_path / "v1.snapshot"
+        path.write_bytes(b"game_id,title\n1,Catan\n")
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="not a catalogue snapshot"):
+            read_snapshot_file(path)
@@ -0,0 +1,22 @@
+from pytest_mock import MockerFixture
+
+from services.pipeline.aggregates import AGGREGATE_VIEWS, refresh_aggregate_views
+
+
+class TestRefreshAggregateViews:
+    def test_refresh_aggregate_views(self, mocker: MockerFixture):
+        # Arrange
+        engine = mocker.MagicMock()
+        connection = engine.begin.return_value.__enter__.return_value
+        connection.execute.return_value.scalar_one.return_value = 10
+
+        # Act
+        rows = refresh_aggregate_views(engine)
+
+        # Assert
+        assert rows == 10 * len(AGGREGATE_VIEWS)
+        assert engine.begin.call_count == len(AGGREGATE_VIEWS)
+        statements = [str(call.args[0]) for call in connection.execute.call_args_list]
+        assert statements[::2] == [
+            f"REFRESH MATERIALIZED VIEW CONCURRENTLY {view}" for view in AGGREGATE_VIEWS
+        ]
@@ -0,0 +1,237 @@
+import json
+from pathlib import Path
+
+import pytest
+from pandas import DataFrame, Series
+
+from services.pipeline.changeset import (
+    build_changeset,
+    changed_game_ids,
+    compute_row_hashes,
+    diff_row_hashes,
+    find_previous_run,
+    load_changeset,
+)
+
+
+class TestComputeRowHashes:
+    @pytest.mark.parametrize(
+        "table_name, df, expected_keys",
+        [
+            (
+                "details/game_details",
+                DataFrame({"game_id": ["1", "2"], "title": ["A", "B"]}),
+                ["1", "2"],
+            ),  # happy_path_details_table
+            (
+                "links/mechanic_link",
+                DataFrame({"game_id": ["1", "1"], "mechanic_id": ["10", "11"]}),
+                ["1|10", "1|11"],
+            ),  # happy_path_link_table
+            (
+                "details/mechanic_details",
+                DataFrame({"mechanic_id": ["10", "10"], "mechanic_name": ["X", "X"]}),
+                ["10"],
+            ),  # edge_case_duplicate_rows
+            (
+                "details/game_details",
+                DataFrame(),
+                [],
+            ),  # edge_case_empty_table
+        ],
+        ids=[
+            "happy_path_details_table",
+            "happy_path_link_table",
+            "edge_case_duplicate_rows",
+            "edge_case_empty_table",
+        ],
+    )
+    def test_compute_row_hashes(
+        self, table_name: str, df: DataFrame, expected_keys: list[str]
+    ):
+        # Act
+        hashes = compute_row_hashes(table_name, df)
+
+        # Assert
+        assert list(hashes.index) == expected_keys
+
+    def test_compute_row_hashes_detects_content_change(self):
+        # Arrange
+        before = DataFrame({"game_id": ["1"], "title": ["A"]})
+        after = DataFrame({"game_id": ["1"], "title": ["B"]})
+
+        # Act
+        hash_before = compute_row_hashes("details/game_details", before)
+        hash_after = compute_row_hashes("details/game_details", after)
+
+        # Assert
+        assert hash_before["1"] != hash_after["1"]
+
+    def test_compute_row_hashes_error_cases(self):
+        with pytest.raises(TypeError):
+            compute_row_hashes("details/game_details", "not a dataframe")  # type: ignore[arg-type]
+
+
+class TestDiffRowHashes:
+    @pytest.mark.parametrize(
+        "previous, current, expected_changes",
+        [
+            (
+                Series({"1": 1, "2": 2, "3": 3}, dtype="uint64"),
+                Series({"2": 2, "3": 30, "4": 4}, dtype="uint64"),
+                {"inserted": ["4"], "updated": ["3"], "deleted": ["1"]},
+            ),  # happy_path_mixed_changes
+            (
+                Series(dtype="uint64"),
+                Series({"1": 1}, dtype="uint64"),
+                {"inserted": ["1"], "updated": [], "deleted": []},
+            ),  # edge_case_first_run
+            (
+                Series({"1": 1}, dtype="uint64"),
+                Series({"1": 1}, dtype="uint64"),
+                {"inserted": [], "updated": [], "deleted": []},
+            ),  # edge_case_no_changes
+        ],
+        ids=[
+            "happy_path_mixed_changes",
+            "edge_case_first_run",
+            "edge_case_no_changes",
+        ],
+    )
+    def test_diff_row_hashes(
+        self,
+        previous: Series,
+        current: Series,
+        expected_changes: dict[str, list[str]],
+    ):
+        # Act
+        changes = diff_row_hashes(previous, current)
+
+        # Assert
+        assert changes == expected_changes
+
+
+class TestFindPreviousRun:
+    @pytest.mark.parametrize(
+        "existing_runs, current_run, expected_run",
+        [
+            (
+                ["2025/01/01", "2025/01/03"],
+                "2025/01/04",
+                "2025/01/03",
+            ),  # happy_path_latest_run
+            (
+                ["2025/01/01", "2025/01/05"],
+                "2025/01/04",
+                "2025/01/01",
+            ),  # happy_path_ignores_later_runs
+            ([], "2025/01/04", None),  # edge_case_no_previous_runs
+        ],
+        ids=[
+            "happy_path_latest_run",
+            "happy_path_ignores_later_runs",
+            "edge_case_no_previous_runs",
+        ],
+    )
+    def test_find_previous_run(
+        self,
+        existing_runs: list[str],
+        current_run: str,
+        expected_run: str | None,
+        tmp_path: Path,
+    ):
+        # Arrange
+        for run in existing_runs:
+            (tmp_path / run / "changeset" / "hashes").mkdir(parents=True)
+
+        # Act
+        previous_run = find_previous_run(tmp_path, tmp_path / current_run)
+
+        # Assert
+        assert previous_run == (tmp_path / expected_run if expected_run else None)
+
+
+class TestBuildChangeset:
+    @staticmethod
+    def _write_run(run_dir: Path, tables: dict[str, DataFrame]) -> Path:
+        csv_dir = run_dir / "csv"
+        for table_name, df in tables.items():
+            csv_file = csv_dir / f"{table_name}.csv"
+            csv_file.parent.mkdir(parents=True, exist_ok=True)
+            df.to_csv(csv_file, index=False)
+        return csv_dir
+
+    def test_build_changeset_against_previous_run(self, tmp_path: Path):
+        # Arrange
+        previous_csv_dir = self._write_run(
+            tmp_path / "previous",
+            {
+                "details/game_details": DataFrame(
+                    {"game_id": [1, 2, 3], "title": ["A", "B", "C"]}
+                ),
+                "links/mechanic_link": DataFrame(
+                    {"game_id": [1, 2], "mechanic_id": [10, 10]}
+                ),
+            },
+        )
+        build_changeset(previous_csv_dir, tmp_path / "previous" / "changeset", None)
+        current_csv_dir = self._write_run(
+            tmp_path / "current",
+            {
+                "details/game_details": DataFrame(
+                    {"game_id": [2, 3, 4], "title": ["B", "C2", "D"]}
+                ),
+                "links/mechanic_link": DataFrame(
+                    {"game_id": [2, 4], "mechanic_id": [10, 11]}
+                ),
+            },
+        )
+
+        # Act
+        changeset = build_changeset(
+            current_csv_dir,
+            tmp_path / "current" / "changeset",
+            tmp_path / "previous" / "changeset",
+        )
+
+        # Assert
+        assert changeset["tables"] == {
+            "details/game_details": {
+                "inserted": ["4"],
+                "updated": ["3"],
+                "deleted": ["1"],
+            },
+            "links/mechanic_link": {
+                "inserted": ["4|11"],
+                "updated": [],
+                "deleted": ["1|10"],
+            },
+        }
+        assert load_changeset(tmp_path / "current" / "changeset") == json.loads(
+            json.dumps(changeset)
+        )
+        assert changed_game_ids(changeset) == {1, 3, 4}
+
+    def test_build_changeset_table_removed(self, tmp_path: Path):
+        # Arrange
+        previous_csv_dir = self._write_run(
+            tmp_path / "previous",
+            {"links/artist_link": DataFrame({"game_id": [1], "artist_id": [5]})},
+        )
+        build_changeset(previous_csv_dir, tmp_path / "previous" / "changeset", None)
+        current_csv_dir = tmp_path / "current" / "csv"
+        current_csv_dir.mkdir(parents=True)
+
+        # Act
+        changeset = build_changeset(
+            current_csv_dir,
+            tmp_path / "current" / "changeset",
+            tmp_path / "previous" / "changeset",
+        )
+
+        # Assert
+        assert changeset["tables"]["links/artist_link"]["deleted"] == ["1|5"]
+
+    def test_build_changeset_error_cases(self, tmp_path: Path):
+        with pytest.raises(TypeError):
+            build_changeset("csv", tmp_path, None)  # type: ignore[arg-type]
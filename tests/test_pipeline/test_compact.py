@@ -0,0 +1,251 @@
+from datetime import date
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from pandas import DataFrame, Series
+
+from services.pipeline.compact import (
+    compact_data_lake,
+    compact_snapshot,
+    enforce_xml_retention,
+    get_partition_path,
+    list_run_dirs,
+    replay_compacted_rows,
+)
+
+
+def _write_run(
+    data_root: Path, run_date: date, games: DataFrame, with_xml: bool = True
+) -> Path:
+    run_dir = data_root / run_date.strftime("%Y/%m/%d")
+    (run_dir / "csv" / "details").mkdir(parents=True)
+    games.to_csv(run_dir / "csv" / "details" / "game_details.csv", index=False)
+    (run_dir / "rankings_dumps").mkdir()
+    games[["game_id"]].rename(columns={"game_id": "id"}).to_csv(
+        run_dir / "rankings_dumps" / "boardgames_ranks.csv", index=False
+    )
+    (run_dir / "changeset" / "hashes").mkdir(parents=True)
+    if with_xml:
+        (run_dir / "xml").mkdir()
+        (run_dir / "xml" / "0000.xml").write_text("<items/>")
+    return run_dir
+
+
+class TestListRunDirs:
+    def test_list_run_dirs(self, tmp_path: Path):
+        # Arrange
+        for run in ["2025/02/01", "2025/01/31", "2025/13/01", "compacted/x/y"]:
+            (tmp_path / run).mkdir(parents=True)
+
+        # Act
+        run_dirs = list_run_dirs(tmp_path)
+
+        # Assert
+        assert list(run_dirs) == [date(2025, 1, 31), date(2025, 2, 1)]
+
+
+COLUMNS = ["game_id", "title"]
+KEY_COLUMNS = ["game_id"]
+
+
+def _live(*games: tuple[str, str]) -> Series:
+    no_rows = Series(
+        dtype="uint64", index=pd.MultiIndex.from_tuples([], names=KEY_COLUMNS)
+    )
+    df = DataFrame(games, columns=COLUMNS)
+    return compact_snapshot(df, no_rows, COLUMNS, KEY_COLUMNS, "2025-01-01")[1]
+
+
+class TestCompactSnapshot:
+    @pytest.mark.parametrize(
+        "games, expected_rows",
+        [
+            (
+                [("1", "A"), ("2", "B2"), ("3", "C")],
+                [["2", "B2", False], ["3", "C", False]],
+            ),  # happy_path_changed_rows
+            (
+                [("1", "A")],
+                [["2", "", True]],
+            ),  # happy_path_deleted_row
+            (
+                [("1", "A"), ("2", "B")],
+                [],
+            ),  # edge_case_unchanged
+            (
+                [("1", "A"), ("2", "B"), ("2", "B2")],
+                [["2", "B2", False]],
+            ),  # edge_case_duplicate_key
+        ],
+        ids=[
+            "happy_path_changed_rows",
+            "happy_path_deleted_row",
+            "edge_case_unchanged",
+            "edge_case_duplicate_key",
+        ],
+    )
+    def test_compact_snapshot(
+        self, games: list[tuple[str, str]], expected_rows: list[list]
+    ):
+        # Arrange
+        live = _live(("1", "A"), ("2", "B"))
+        df = DataFrame(games, columns=COLUMNS)
+
+        # Act
+        rows, live = compact_snapshot(df, live, COLUMNS, KEY_COLUMNS, "2025-01-02")
+
+        # Assert
+        assert rows[["game_id", "title", "deleted"]].values.tolist() == expected_rows
+        assert (rows["snapshot_date"] == "2025-01-02").all()
+        assert sorted(key for key, in live.index) == sorted({key for key, _ in games})
+
+
+class TestReplayCompactedRows:
+    def test_replay_compacted_rows(self):
+        # Arrange
+        live = _live(("1", "A"), ("2", "B2"))
+        df = DataFrame(
+            {
+                "game_id": ["1", "2", "3"],
+                "title": ["A", "B2", ""],
+                "snapshot_date": ["2025-01-03"] * 3,
+                "deleted": [False, False, True],
+            }
+        )
+
+        # Act
+        rows, live = replay_compacted_rows(df, live, COLUMNS, KEY_COLUMNS)
+
+        # Assert
+        assert rows.empty
+        assert sorted(key for key, in live.index) == ["1", "2"]
+
+    def test_replay_compacted_rows_keeps_changes(self):
+        # Arrange
+        live = _live(("1", "A"), ("2", "B"))
+        df = DataFrame(
+            {
+                "game_id": ["1", "2"],
+                "title": ["A2", ""],
+                "snapshot_date": ["2025-01-03"] * 2,
+                "deleted": [False, True],
+            }
+        )
+
+        # Act
+        rows, live = replay_compacted_rows(df, live, COLUMNS, KEY_COLUMNS)
+
+        # Assert
+        assert rows["game_id"].tolist() == ["1", "2"]
+        assert sorted(key for key, in live.index) == ["1"]
+
+
+class TestEnforceXmlRetention:
+    def test_enforce_xml_retention(self, tmp_path: Path):
+        # Arrange
+        games = DataFrame({"game_id": [1], "title": ["A"]})
+        old_run = _write_run(tmp_path, date(2025, 1, 1), games)
+        new_run = _write_run(tmp_path, date(2025, 1, 20), games)
+
+        # Act
+        deleted = enforce_xml_retention(
+            list_run_dirs(tmp_path), today=date(2025, 1, 25), retention_days=10
+        )
+
+        # Assert
+        assert deleted == [old_run / "xml"]
+        assert (new_run / "xml").exists()
+
+
+class TestCompactDataLake:
+    def test_compact_data_lake(self, tmp_path: Path):
+        # Arrange
+        data_root = tmp_path / "data"
+        output_dir = data_root / "compacted"
+        unchanged = DataFrame({"game_id": [1, 2], "title": ["A", "B"]})
+        changed = DataFrame({"game_id": [1, 2], "title": ["A", "B2"]})
+        first = _write_run(data_root, date(2025, 1, 30), unchanged)
+        second = _write_run(data_root, date(2025, 1, 31), changed)
+        current = _write_run(data_root, date(2025, 2, 1), changed)
+
+        # Act
+        compacted = compact_data_lake(
+            data_root, output_dir, today=date(2025, 2, 1), xml_retention_days=365
+        )
+
+        # Assert
+        assert compacted == {
+            "2025-01": {"details/game_details": 3, "rankings/boardgames_ranks": 2}
+        }
+        games_df = pd.read_parquet(
+            get_partition_path(output_dir, "details/game_details", "2025-01")
+        )
+        assert games_df[["game_id", "title", "snapshot_date"]].values.tolist() == [
+            ["1", "A", "2025-01-30"],
+            ["2", "B", "2025-01-30"],
+            ["2", "B2", "2025-01-31"],
+        ]
+        assert not (first / "csv").exists()
+        assert not (first / "changeset" / "hashes").exists()
+        assert not (second / "rankings_dumps").exists()
+        assert (current / "csv").exists()
+        assert (current / "changeset" / "hashes").exists()
+
+    def test_compact_data_lake_merges_backfilled_days(self, tmp_path: Path):
+        # Arrange
+        data_root = tmp_path / "data"
+        output_dir = data_root / "compacted"
+        _write_run(
+            data_root, date(2025, 1, 30), DataFrame({"game_id": [1], "title": ["A"]})
+        )
+        compact_data_lake(
+            data_root, output_dir, today=date(2025, 2, 1), xml_retention_days=365
+        )
+        _write_run(
+            data_root, date(2025, 1, 31), DataFrame({"game_id": [1], "title": ["A2"]})
+        )
+
+        # Act
+        compact_data_lake(
+            data_root, output_dir, today=date(2025, 2, 1), xml_retention_days=365
+        )
+
+        # Assert
+        games_df = pd.read_parquet(
+            get_partition_path(output_dir, "details/game_details", "2025-01")
+        )
+        assert games_df["title"].tolist() == ["A", "A2"]
+
+    def test_compact_data_lake_deleted_rows(self, tmp_path: Path):
+        # Arrange
+        data_root = tmp_path / "data"
+        output_dir = data_root / "compacted"
+        _write_run(
+            data_root,
+            date(2025, 1, 29),
+            DataFrame({"game_id": [1, 2, 3], "title": ["A", "B", "C"]}),
+        )
+        compact_data_lake(
+            data_root, output_dir, today=date(2025, 2, 1), xml_retention_days=365
+        )
+        _write_run(
+            data_root, date(2025, 1, 30), DataFrame({"game_id": [1], "title": ["A"]})
+        )
+
+        # Act
+        compact_data_lake(
+            data_root, output_dir, today=date(2025, 2, 1), xml_retention_days=365
+        )
+
+        # Assert
+        games_df = pd.read_parquet(
+            get_partition_path(output_dir, "details/game_details", "2025-01")
+        )
+        assert games_df[["game_id", "snapshot_date", "deleted"]].values.tolist() == [
+            ["1", "2025-01-29", False],
+            ["2", "2025-01-29", False],
+            ["3", "2025-01-29", False],
+            ["2", "2025-01-30", True],
+            ["3", "2025-01-30", True],
+        ]
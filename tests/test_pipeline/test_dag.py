@@ -0,0 +1,159 @@
+import os
+import threading
+from pathlib import Path
+
+import pytest
+
+from services.pipeline.dag import Dag, Stage, StageFailedError
+
+
+def _writer(path: Path, calls: list[str], name: str):
+    def func():
+        calls.append(name)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name)
+
+    return func
+
+
+def _build_chain(tmp_path: Path, calls: list[str]) -> Dag:
+    first_output = tmp_path / "first.txt"
+    second_output = tmp_path / "second.txt"
+    return Dag(
+        [
+            Stage(
+                name="first",
+                func=_writer(first_output, calls, "first"),
+                outputs=[first_output],
+            ),
+            Stage(
+                name="second",
+                func=_writer(second_output, calls, "second"),
+                inputs=[first_output],
+                outputs=[second_output],
+                depends_on=["first"],
+            ),
+        ],
+        state_dir=tmp_path / ".stages",
+    )
+
+
+class TestDagInit:
+    @pytest.mark.parametrize(
+        "stages",
+        [
+            [Stage("a", print), Stage("a", print)],  # error_duplicate_stage
+            [Stage("a", print, depends_on=["missing"])],  # error_unknown_dependency
+            [
+                Stage("a", print, depends_on=["b"]),
+                Stage("b", print, depends_on=["a"]),
+            ],  # error_cycle
+        ],
+        ids=["error_duplicate_stage", "error_unknown_dependency", "error_cycle"],
+    )
+    def test_dag_init_error_cases(self, stages: list[Stage], tmp_path: Path):
+        with pytest.raises(ValueError):
+            Dag(stages, state_dir=tmp_path)
+
+
+class TestDagRun:
+    def test_run_all_stages_in_order(self, tmp_path: Path):
+        # Arrange
+        calls: list[str] = []
+        dag = _build_chain(tmp_path, calls)
+
+        # Act
+        results = dag.run()
+
+        # Assert
+        assert calls == ["first", "second"]
+        assert results == {"first": True, "second": True}
+
+    def test_run_skips_fresh_stages(self, tmp_path: Path):
+        # Arrange
+        calls: list[str] = []
+        dag = _build_chain(tmp_path, calls)
+        dag.run()
+        calls.clear()
+
+        # Act
+        results = dag.run()
+
+        # Assert
+        assert calls == []
+        assert results == {"first": False, "second": False}
+
+    def test_run_reruns_stages_downstream_of_changed_stage(self, tmp_path: Path):
+        # Arrange
+        calls: list[str] = []
+        dag = _build_chain(tmp_path, calls)
+        dag.run()
+        calls.clear()
+        marker = dag.marker_path("second")
+        stale_time = marker.stat().st_mtime - 10
+        os.utime(marker, (stale_time, stale_time))
+
+        # Act
+        dag.run(targets=["first"], force=True)
+        dag.run()
+
+        # Assert
+        assert calls == ["first", "second"]
+
+    def test_run_single_stage_requires_inputs(self, tmp_path: Path):
+        # Arrange
+        dag = _build_chain(tmp_path, [])
+
+        # Act / Assert
+        with pytest.raises(StageFailedError):
+            dag.run(targets=["second"])
+
+    def test_run_failure_skips_dependents(self, tmp_path: Path):
+        # Arrange
+        calls: list[str] = []
+
+        def fail():
+            raise RuntimeError("boom")
+
+        dag = Dag(
+            [
+                Stage("broken", fail),
+                Stage(
+                    "downstream",
+                    lambda: calls.append("downstream"),
+                    depends_on=["broken"],
+                ),
+                Stage("independent", lambda: calls.append("independent")),
+            ],
+            state_dir=tmp_path,
+        )
+
+        # Act
+        with pytest.raises(StageFailedError, match="broken"):
+            dag.run()
+
+        # Assert
+        assert calls == ["independent"]
+        assert not dag.marker_path("broken").exists()
+
+    def test_run_independent_stages_concurrently(self, tmp_path: Path):
+        # Arrange
+        barrier = threading.Barrier(2, timeout=5)
+        dag = Dag(
+            [
+                Stage("root", lambda: None),
+                Stage("left", barrier.wait, depends_on=["root"]),
+                Stage("right", barrier.wait, depends_on=["root"]),
+            ],
+            state_dir=tmp_path,
+        )
+
+        # Act
+        results = dag.run(max_workers=2)
+
+        # Assert
+        assert results == {"root": True, "left": True, "right": True}
+
+    def test_run_unknown_target(self, tmp_path: Path):
+        with pytest.raises(ValueError):
+            _build_chain(tmp_path, []).run(targets=["missing"])
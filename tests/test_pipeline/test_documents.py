@@ -0,0 +1,112 @@
+import pytest
+from pytest_mock import MockerFixture
+
+from services.pipeline.documents import (
+    DOCUMENT_LINKS,
+    build_documents_query,
+    get_game_ids_to_refresh,
+    refresh_game_documents,
+)
+
+
+def _changeset(tables: dict, previous_run: str | None = "2025/01/01") -> dict:
+    return {"previous_run": previous_run, "tables": tables}
+
+
+class TestBuildDocumentsQuery:
+    @pytest.mark.parametrize(
+        "incremental", [True, False], ids=["incremental", "full_rebuild"]
+    )
+    def test_build_documents_query(self, incremental):
+        # Act
+        query = build_documents_query(incremental)
+
+        # Assert
+        assert query.strip().startswith("INSERT INTO game_documents")
+        assert ("WHERE g.game_id = ANY(:game_ids)" in query) == incremental
+        for field, link_table, details_table, prefix in DOCUMENT_LINKS:
+            assert f"'{field}'" in query
+            assert (
+                f"FROM {link_table} l JOIN {details_table} d USING ({prefix}_id)"
+                in query
+            )
+
+
+class TestGetGameIdsToRefresh:
+    @pytest.mark.parametrize(
+        "changeset, expected",
+        [
+            (
+                _changeset(
+                    {
+                        "details/game_details": {"updated": ["1"], "deleted": ["2"]},
+                        "links/game_mechanic_link": {"inserted": ["3|10"]},
+                        "details/mechanic_details": {"inserted": ["10"]},
+                    }
+                ),
+                {1, 2, 3},
+            ),
+            (_changeset({}), set()),
+            (
+                _changeset({"details/mechanic_details": {"updated": ["10"]}}),
+                None,
+            ),
+            (_changeset({"details/game_details": {}}, previous_run=None), None),
+            (None, None),
+        ],
+        ids=[
+            "changed_games",
+            "no_changes",
+            "renamed_entity",
+            "no_previous_run",
+            "no_changeset",
+        ],
+    )
+    def test_get_game_ids_to_refresh(self, changeset, expected):
+        # Act / Assert
+        assert get_game_ids_to_refresh(changeset) == expected
+
+
+class TestRefreshGameDocuments:
+    def test_refresh_changed_games(self, mocker: MockerFixture):
+        # Arrange
+        engine = mocker.MagicMock()
+        connection = engine.begin.return_value.__enter__.return_value
+        connection.execute.return_value.rowcount = 2
+
+        # Act
+        written = refresh_game_documents(engine, {3, 1})
+
+        # Assert
+        assert written == 2
+        delete, insert = connection.execute.call_args_list
+        assert "DELETE FROM game_documents WHERE" in str(delete.args[0])
+        assert delete.args[1] == {"game_ids": [1, 3]}
+        assert "ANY(:game_ids)" in str(insert.args[0])
+        assert insert.args[1] == {"game_ids": [1, 3]}
+
+    def test_refresh_all_games(self, mocker: MockerFixture):
+        # Arrange
+        engine = mocker.MagicMock()
+        connection = engine.begin.return_value.__enter__.return_value
+        connection.execute.return_value.rowcount = 150_000
+
+        # Act
+        written = refresh_game_documents(engine)
+
+        # Assert
+        assert written == 150_000
+        delete, insert = connection.execute.call_args_list
+        assert str(delete.args[0]) == "DELETE FROM game_documents"
+        assert "ANY(:game_ids)" not in str(insert.args[0])
+
+    def test_refresh_no_changes(self, mocker: MockerFixture):
+        # Arrange
+        engine = mocker.MagicMock()
+
+        # Act
+        written = refresh_game_documents(engine, set())
+
+        # Assert
+        assert written == 0
+        engine.begin.assert_not_called()
@@ -8,7 +8,13 @@ from pytest_mock import MockerFixture
 from sqlalchemy import create_engine
 
 from services.common import config
-from services.pipeline.load import load_csv_files_into_db
+from services.pipeline.load import (
+    compute_data_version,
+    load_csv_files_into_db,
+    load_dfs_into_db,
+    merge_search_index_pending_list,
+    record_data_version,
+)
 
 
 class TestLoadCsvFilesIntoDb:
@@ -136,3 +142,116 @@ class TestLoadCsvFilesIntoDb:
     ):
         with pytest.raises(expected_exception):
             load_csv_files_into_db(csv_base_dir)
+
+
+class TestLoadDfsIntoDb:
+    def test_load_dfs_into_db_details_before_links(self, mocker: MockerFixture):
+        # Arrange
+        mock_engine = mocker.MagicMock()
+        mock_to_sql = mocker.patch("pandas.DataFrame.to_sql")
+        dfs = {
+            "links/category_link": pd.DataFrame({"game_id": [1], "category_id": [10]}),
+            "details/game_details": pd.DataFrame({"game_id": [1], "title": ["A"]}),
+        }
+
+        # Act
+        load_dfs_into_db(dfs, mock_engine)
+
+        # Assert
+        assert [call.kwargs["name"] for call in mock_to_sql.call_args_list] == [
+            "game_details",
+            "category_link",
+        ]
+
+    def test_load_dfs_into_db_skips_loaded_keys(self, mocker: MockerFixture):
+        # Arrange
+        mock_engine = mocker.MagicMock()
+        loaded_frames: list[pd.DataFrame] = []
+        mocker.patch(
+            "pandas.DataFrame.to_sql",
+            autospec=True,
+            side_effect=lambda df, **kwargs: loaded_frames.append(df),
+        )
+        loaded_keys = {"category_details": {10}}
+        dfs = {
+            "details/category_details": pd.DataFrame(
+                {"category_id": [10, 11, 11], "category_name": ["X", "Y", "Y"]}
+            ),
+        }
+
+        # Act
+        load_dfs_into_db(dfs, mock_engine, loaded_keys)
+        load_dfs_into_db(dfs, mock_engine, loaded_keys)
+
+        # Assert
+        assert len(loaded_frames) == 1
+        assert loaded_frames[0]["category_id"].tolist() == [11]
+        assert loaded_keys == {"category_details": {10, 11}}
+
+    def test_load_dfs_into_db_error_handling(
+        self, mocker: MockerFixture, caplog: pytest.LogCaptureFixture
+    ):
+        # Arrange
+        mocker.patch("pandas.DataFrame.to_sql", side_effect=Exception("Mock error"))
+        loaded_keys: dict[str, set] = {}
+        dfs = {"details/game_details": pd.DataFrame({"game_id": [1], "title": ["A"]})}
+
+        # Act
+        with caplog.at_level(logging.ERROR):
+            load_dfs_into_db(dfs, mocker.MagicMock(), loaded_keys)
+
+        # Assert
+        assert "Error loading chunk into game_details" in caplog.text
+        assert loaded_keys == {"game_details": set()}
+
+
+class TestDataVersion:
+    def test_compute_data_version(self, tmp_path: Path):
+        # Arrange
+        (tmp_path / "details").mkdir()
+        csv_file = tmp_path / "details" / "game_details.csv"
+        csv_file.write_text("game_id\n1\n")
+
+        # Act
+        first = compute_data_version(tmp_path)
+        same = compute_data_version(tmp_path)
+        csv_file.write_text("game_id\n2\n")
+        changed = compute_data_version(tmp_path)
+
+        # Assert
+        assert first == same
+        assert first != changed
+        assert len(first) == 16
+
+    def test_record_data_version(self, mocker: MockerFixture):
+        # Arrange
+        mock_create_engine = mocker.patch("services.pipeline.load.create_engine")
+        connection = (
+            mock_create_engine.return_value.begin.return_value.__enter__.return_value
+        )
+
+        # Act
+        record_data_version("abc123")
+
+        # Assert
+        connection.execute.assert_called_once()
+        assert connection.execute.call_args.args[1] == {"version": "abc123"}
+
+
+class TestMergeSearchIndexPendingList:
+    def test_merge_search_index_pending_list(self, mocker: MockerFixture):
+        # Arrange
+        mock_create_engine = mocker.patch("services.pipeline.load.create_engine")
+        connection = (
+            mock_create_engine.return_value.begin.return_value.__enter__.return_value
+        )
+        connection.execute.return_value.scalar.return_value = 12
+
+        # Act
+        pages = merge_search_index_pending_list()
+
+        # Assert
+        assert pages == 12
+        clean, analyze = connection.execute.call_args_list
+        assert "gin_clean_pending_list" in str(clean.args[0])
+        assert str(analyze.args[0]) == "ANALYZE game_details"
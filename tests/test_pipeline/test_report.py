@@ -0,0 +1,84 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from services.pipeline.report import RunReport, get_path_size
+
+
+class TestGetPathSize:
+    def test_get_path_size(self, tmp_path: Path):
+        # Arrange
+        (tmp_path / "sub").mkdir()
+        (tmp_path / "a.txt").write_bytes(b"12345")
+        (tmp_path / "sub" / "b.txt").write_bytes(b"123")
+
+        # Act / Assert
+        assert get_path_size(tmp_path) == 8
+        assert get_path_size(tmp_path / "a.txt") == 5
+
+
+class TestRunReport:
+    def test_stage_records_metrics(self, tmp_path: Path):
+        # Arrange
+        report = RunReport(tmp_path, trace_memory=True)
+
+        # Act
+        with report.stage("transform") as metrics:
+            data = [str(i) * 10 for i in range(10_000)]
+            metrics.rows = len(data)
+
+        # Assert
+        stage = report.stages[0]
+        assert stage.name == "transform"
+        assert stage.status == "succeeded"
+        assert stage.rows == 10_000
+        assert stage.wall_time_s >= 0
+        assert stage.process_peak_rss_mb > 0
+        assert stage.traced_peak_mb is not None and stage.traced_peak_mb > 0
+        assert stage.top_allocations
+        assert stage.profile_path is None
+
+    def test_stage_records_failure(self, tmp_path: Path):
+        # Arrange
+        report = RunReport(tmp_path)
+
+        # Act
+        with pytest.raises(RuntimeError):
+            with report.stage("load"):
+                raise RuntimeError("boom")
+
+        # Assert
+        assert report.stages[0].status == "failed"
+        assert report.stages[0].traced_peak_mb is None
+
+    def test_stage_profile(self, tmp_path: Path):
+        # Arrange
+        report = RunReport(tmp_path, profile=True)
+
+        # Act
+        with report.stage("extract"):
+            sum(range(1000))
+
+        # Assert
+        assert (tmp_path / "profiles" / "extract.prof").exists()
+        assert report.stages[0].profile_path == str(
+            tmp_path / "profiles" / "extract.prof"
+        )
+
+    def test_save(self, tmp_path: Path):
+        # Arrange
+        report = RunReport(tmp_path / "reports")
+        with report.stage("download") as metrics:
+            metrics.bytes = 42
+
+        # Act
+        report_path = report.save()
+
+        # Assert
+        with open(report_path, "r", encoding="utf-8") as file:
+            saved = json.load(file)
+        assert report_path.parent == tmp_path / "reports"
+        assert [stage["name"] for stage in saved["stages"]] == ["download"]
+        assert saved["stages"][0]["bytes"] == 42
+        assert saved["process_peak_rss_mb"] > 0
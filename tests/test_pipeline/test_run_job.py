@@ -0,0 +1,46 @@
+from datetime import date, timedelta
+
+from pytest_mock import MockerFixture
+
+from services.pipeline import run_job
+
+
+class TestMain:
+    def test_backfill_publishes_only_today(self, mocker: MockerFixture, tmp_path):
+        # Arrange
+        mocker.patch.object(run_job.config, "get_run_path", return_value=tmp_path)
+        run = mocker.patch.object(run_job.Dag, "run")
+        today = date.today()
+
+        # Act
+        run_job.main(
+            [
+                "--start-date",
+                (today - timedelta(days=1)).isoformat(),
+                "--end-date",
+                today.isoformat(),
+            ]
+        )
+
+        # Assert
+        past_targets, today_targets = [
+            call.kwargs["targets"] for call in run.call_args_list
+        ]
+        assert "documents" not in past_targets
+        assert not past_targets & (run_job.LIVE_STAGES | run_job.PUBLISH_STAGES)
+        assert {"changeset", "compact"} <= past_targets
+        assert "documents" in today_targets
+
+    def test_backfill_publishes_named_stages(self, mocker: MockerFixture, tmp_path):
+        # Arrange
+        mocker.patch.object(run_job.config, "get_run_path", return_value=tmp_path)
+        run = mocker.patch.object(run_job.Dag, "run")
+        past = date.today() - timedelta(days=3)
+
+        # Act
+        run_job.main(
+            ["--start-date", past.isoformat(), "--stage", "load", "--stage", "download"]
+        )
+
+        # Assert
+        assert run.call_args.kwargs["targets"] == {"load"}
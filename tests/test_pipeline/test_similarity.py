@@ -0,0 +1,136 @@
+import numpy as np
+import pytest
+from pandas import DataFrame
+from pytest_mock import MockerFixture
+
+from services.pipeline.similarity import (
+    build_link_features,
+    build_numeric_features,
+    compute_similar_games,
+    save_similar_games,
+)
+
+
+def _details(game_ids: list[int], weights: list[float] | None = None) -> DataFrame:
+    return DataFrame(
+        {
+            "game_id": game_ids,
+            "average_weight": weights or [2.0] * len(game_ids),
+            "min_players": [2] * len(game_ids),
+            "max_players": [4] * len(game_ids),
+            "playing_time": [60] * len(game_ids),
+        }
+    )
+
+
+def _links(
+    mechanics: dict[int, list[int]],
+    designers: dict[int, list[int]] | None = None,
+) -> list[DataFrame]:
+    def link_df(column: str, links: dict[int, list[int]]) -> DataFrame:
+        rows = [(game_id, id_) for game_id, ids in links.items() for id_ in ids]
+        return DataFrame(rows, columns=["game_id", column])
+
+    return [
+        link_df("mechanic_id", mechanics),
+        link_df("category_id", {}),
+        link_df("designer_id", designers or {}),
+        link_df("publisher_id", {}),
+    ]
+
+
+class TestBuildLinkFeatures:
+    def test_rows_are_unit_length(self):
+        # Arrange
+        game_ids = np.array([1, 2, 3])
+        links = _links({1: [10, 11], 2: [10]}, designers={1: [5]})
+
+        # Act
+        features = build_link_features(game_ids, links)
+
+        # Assert
+        assert features.shape == (3, 3)
+        norms = np.sqrt(features.multiply(features).sum(axis=1))
+        np.testing.assert_allclose(norms, [1.0, 1.0, 0.0], rtol=1e-6)
+
+
+class TestBuildNumericFeatures:
+    def test_unknown_values_are_mean(self):
+        # Arrange
+        details = _details([1, 2, 3], weights=[1.0, 3.0, 0.0])
+
+        # Act
+        features = build_numeric_features(details)
+
+        # Assert
+        assert features.shape == (3, 4)
+        np.testing.assert_allclose(features[:, 0], [-1.0, 1.0, 0.0], rtol=1e-6)
+        np.testing.assert_allclose(features[:, 1:], 0.0)
+
+
+class TestComputeSimilarGames:
+    @pytest.mark.parametrize("block_size", [1, 2, 256], ids=["rows", "blocks", "all"])
+    def test_compute_similar_games(self, block_size):
+        # Arrange
+        details = _details([4, 1, 2, 3])
+        links = _links({1: [10, 11, 12], 2: [10, 11, 12], 3: [10, 13], 4: [14]})
+
+        # Act
+        similar = compute_similar_games(details, links, k=2, block_size=block_size)
+
+        # Assert
+        assert similar[["game_id", "similar_game_id", "rank"]].values.tolist() == [
+            [1, 2, 1],
+            [1, 3, 2],
+            [2, 1, 1],
+            [2, 3, 2],
+            [3, 1, 1],
+            [3, 2, 2],
+        ]
+        assert similar["score"].iloc[0] == pytest.approx(1.0)
+        assert similar["score"].iloc[0] > similar["score"].iloc[1] > 0
+
+    def test_numeric_features_break_ties(self):
+        # Arrange
+        details = _details([1, 2, 3], weights=[2.0, 4.5, 2.1])
+        links = _links({1: [10], 2: [10], 3: [10]})
+
+        # Act
+        similar = compute_similar_games(details, links, k=2)
+
+        # Assert
+        first = similar[similar["game_id"] == 1]
+        assert first["similar_game_id"].tolist() == [3, 2]
+
+    def test_no_links(self):
+        # Act
+        similar = compute_similar_games(_details([1, 2]), _links({}), k=5)
+
+        # Assert
+        assert similar.empty
+        assert list(similar.columns) == ["game_id", "similar_game_id", "rank", "score"]
+
+
+class TestSaveSimilarGames:
+    def test_save_similar_games(self, mocker: MockerFixture):
+        # Arrange
+        engine = mocker.MagicMock()
+        connection = engine.begin.return_value.__enter__.return_value
+        cursor = connection.connection.cursor.return_value
+        similar = DataFrame(
+            {"game_id": [1], "similar_game_id": [2], "rank": [1], "score": [0.5]}
+        )
+
+        # Act
+        written = save_similar_games(engine, similar)
+
+        # Assert
+        assert written == 1
+        assert (
+            str(connection.execute.call_args.args[0]) == "DELETE FROM game_similarity"
+        )
+        statement, buffer = cursor.copy_expert.call_args.args
+        assert statement.startswith(
+            "COPY game_similarity (game_id, similar_game_id, rank, score)"
+        )
+        assert buffer.getvalue() == "1,2,1,0.5\n"
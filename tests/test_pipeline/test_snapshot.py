@@ -0,0 +1,49 @@
+import os
+from pathlib import Path
+
+import numpy as np
+from pandas import DataFrame
+
+from services.pipeline.snapshot import build_snapshot_columns, prune_snapshot_files
+
+
+class TestBuildSnapshotColumns:
+    def test_columns_in_game_id_order(self):
+        # Arrange
+        details = DataFrame(
+            {
+                "game_id": [3, 1],
+                "title": ["Azul", "Catan"],
+                "description": ["Tiles", None],
+                "min_age": [8, None],
+                "search_vector": ["'azul':1A", "'catan':1A"],
+            }
+        )
+
+        # Act
+        columns = build_snapshot_columns(details)
+
+        # Assert
+        assert list(columns) == ["game_id", "title", "description", "min_age"]
+        np.testing.assert_array_equal(columns["game_id"], [1, 3])
+        np.testing.assert_array_equal(columns["min_age"], [np.nan, 8])
+        assert columns["min_age"].dtype == np.float64
+        assert columns["title"].take([0, 1]) == ["Catan", "Azul"]
+        assert columns["description"].take([0, 1]) == ["", "Tiles"]
+
+
+class TestPruneSnapshotFiles:
+    def test_keeps_most_recent_files(self, tmp_path: Path):
+        # Arrange
+        paths = [tmp_path / f"v{i}.snapshot" for i in range(4)]
+        for i, path in enumerate(paths):
+            path.touch()
+            os.utime(path, (i, i))
+        (tmp_path / "notes.txt").touch()
+
+        # Act
+        removed = prune_snapshot_files(tmp_path, keep=2)
+
+        # Assert
+        assert removed == [paths[1], paths[0]]
+        assert sorted(tmp_path.iterdir()) == [tmp_path / "notes.txt", *paths[2:]]
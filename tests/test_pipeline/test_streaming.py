@@ -0,0 +1,122 @@
+from pathlib import Path
+
+import pytest
+from pandas import read_csv
+from pytest_mock import MockerFixture
+
+from services.pipeline.streaming import run_pipelined
+
+XML_BATCHES = [
+    """<items>
+    <item type="boardgame" id="1">
+        <name type="primary" value="Game 1"/>
+        <link type="boardgamemechanic" id="200" value="Mechanic 1"/>
+        <statistics><ratings></ratings></statistics>
+    </item>
+    </items>""",
+    """<items>
+    <item type="boardgame" id="2">
+        <name type="primary" value="Game 2"/>
+        <link type="boardgamemechanic" id="200" value="Mechanic 1"/>
+        <statistics><ratings></ratings></statistics>
+    </item>
+    </items>""",
+]
+
+
+class TestRunPipelined:
+    def test_run_pipelined_happy_path(self, tmp_path: Path, mocker: MockerFixture):
+        # Arrange
+        mocker.patch(
+            "services.pipeline.streaming.iter_game_data", return_value=iter(XML_BATCHES)
+        )
+        mock_engine = mocker.patch("services.pipeline.streaming.create_engine")
+        mock_to_sql = mocker.patch("pandas.DataFrame.to_sql")
+        csv_dir = tmp_path / "csv"
+
+        # Act
+        run_pipelined(["1", "2"], tmp_path / "xml", csv_dir, queue_size=1)
+
+        # Assert
+        loaded_tables = [call.kwargs["name"] for call in mock_to_sql.call_args_list]
+        assert loaded_tables == [
+            "mechanic_details",
+            "game_details",
+            "mechanic_link",
+            "game_details",
+            "mechanic_link",
+        ]
+        assert all(
+            call.kwargs["con"] == mock_engine.return_value
+            for call in mock_to_sql.call_args_list
+        )
+        assert read_csv(csv_dir / "details/game_details.csv")["game_id"].tolist() == [
+            1,
+            2,
+        ]
+
+    def test_run_pipelined_skips_malformed_batch(
+        self, tmp_path: Path, mocker: MockerFixture
+    ):
+        # Arrange
+        mocker.patch(
+            "services.pipeline.streaming.iter_game_data",
+            return_value=iter([XML_BATCHES[0], "<items><item", XML_BATCHES[1]]),
+        )
+        mocker.patch("services.pipeline.streaming.create_engine")
+        mocker.patch("pandas.DataFrame.to_sql")
+        csv_dir = tmp_path / "csv"
+
+        # Act
+        run_pipelined(["1", "2"], tmp_path / "xml", csv_dir, queue_size=1)
+
+        # Assert
+        assert read_csv(csv_dir / "details/game_details.csv")["game_id"].tolist() == [
+            1,
+            2,
+        ]
+
+    def test_run_pipelined_extract_failure(self, tmp_path: Path, mocker: MockerFixture):
+        # Arrange
+        def failing_extract(game_ids, destination_dir):
+            yield XML_BATCHES[0]
+            raise ConnectionError("BGG unavailable")
+
+        mocker.patch(
+            "services.pipeline.streaming.iter_game_data", side_effect=failing_extract
+        )
+        mocker.patch("services.pipeline.streaming.create_engine")
+        mocker.patch("pandas.DataFrame.to_sql")
+
+        # Act / Assert
+        with pytest.raises(ConnectionError):
+            run_pipelined(["1", "2"], tmp_path / "xml", tmp_path / "csv")
+
+    def test_run_pipelined_load_failure_stops_extract(
+        self, tmp_path: Path, mocker: MockerFixture
+    ):
+        # Arrange
+        extracted: list[str] = []
+
+        def endless_extract(game_ids, destination_dir):
+            while True:
+                extracted.append(XML_BATCHES[0])
+                yield XML_BATCHES[0]
+
+        mocker.patch(
+            "services.pipeline.streaming.iter_game_data", side_effect=endless_extract
+        )
+        mocker.patch("services.pipeline.streaming.create_engine")
+        mocker.patch(
+            "services.pipeline.streaming.load_dfs_into_db",
+            side_effect=RuntimeError("database down"),
+        )
+
+        # Act / Assert
+        with pytest.raises(RuntimeError, match="database down"):
+            run_pipelined(["1"], tmp_path / "xml", tmp_path / "csv", queue_size=1)
+        assert len(extracted) < 10
+
+    def test_run_pipelined_error_cases(self, tmp_path: Path):
+        with pytest.raises(ValueError):
+            run_pipelined(["1"], tmp_path / "xml", tmp_path / "csv", queue_size=0)
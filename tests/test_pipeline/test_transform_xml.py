@@ -9,12 +9,14 @@ from pandas import testing as pd_testing
 from pytest_mock import MockerFixture
 
 from services.pipeline.transform_xml import (
+    append_df_to_csv,
     find_and_get_value,
     parse_bgg_xml_to_dict,
     parse_description,
     save_df_to_csv,
     separate_link_types,
     transform_xml_files,
+    transform_xml_string,
 )
 
 
@@ -606,3 +608,60 @@ class TestSaveDfToCsv:
         # Act & Assert
         with pytest.raises(expected_exception):
             save_df_to_csv(destination_dir, **dataframes)
+
+
+class TestTransformXmlString:
+    def test_transform_xml_string_happy_path(self):
+        # Arrange
+        xml = """<items>
+        <item type="boardgame" id="1">
+            <name type="primary" value="Game 1"/>
+            <link type="boardgamecategory" id="100" value="Category 1"/>
+            <statistics><ratings></ratings></statistics>
+        </item>
+        </items>"""
+
+        # Act
+        transformed_data = transform_xml_string(xml)
+
+        # Assert
+        assert set(transformed_data) == {
+            "details/game_details",
+            "links/category_link",
+            "details/category_details",
+        }
+        assert transformed_data["details/game_details"]["title"].tolist() == ["Game 1"]
+
+    def test_transform_xml_string_no_items(self):
+        assert transform_xml_string("<items></items>") == {}
+
+
+class TestAppendDfToCsv:
+    def test_append_df_to_csv_happy_path(self, tmp_path: Path):
+        # Arrange
+        df = DataFrame({"game_id": [1], "title": ["A"]})
+
+        # Act
+        append_df_to_csv(tmp_path, **{"details/game_details": df})
+        append_df_to_csv(tmp_path, **{"details/game_details": df})
+
+        # Assert
+        result = read_csv(tmp_path / "details/game_details.csv")
+        assert result["game_id"].tolist() == [1, 1]
+
+    @pytest.mark.parametrize(
+        "destination_dir, kwargs, expected_exception",
+        [
+            (123, {}, TypeError),  # error_invalid_destination_dir_type
+            (Path("."), {"df1": "not_a_df"}, AttributeError),  # error_invalid_df_type
+        ],
+        ids=["error_invalid_destination_dir_type", "error_invalid_df_type"],
+    )
+    def test_append_df_to_csv_error_cases(
+        self,
+        destination_dir: Any,
+        kwargs: dict[str, Any],
+        expected_exception: type[Exception],
+    ):
+        with pytest.raises(expected_exception):
+            append_df_to_csv(destination_dir, **kwargs)
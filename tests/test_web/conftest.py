@@ -0,0 +1,38 @@
+from types import ModuleType
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+from sqlalchemy.dialects import postgresql
+
+
+@pytest.fixture
+def router_module() -> ModuleType:
+    """Router module under test, overridden by each test module using client or mock_session"""
+    raise NotImplementedError("Override router_module with the router under test")
+
+
+@pytest.fixture
+def mock_session(router_module: ModuleType, mocker: MockerFixture):
+    session = mocker.AsyncMock()
+    session.execute.return_value = mocker.MagicMock()
+    mock_db = mocker.patch.object(router_module, "db")
+    mock_db.get_session.return_value.__aenter__.return_value = session
+    return session
+
+
+@pytest.fixture
+def client(router_module: ModuleType) -> TestClient:
+    app = FastAPI()
+    app.include_router(router_module.router)
+    return TestClient(app)
+
+
+def compile_query(query, literal_binds: bool = True) -> str:
+    return str(
+        query.compile(
+            dialect=postgresql.dialect(),
+            compile_kwargs={"literal_binds": literal_binds},
+        )
+    )
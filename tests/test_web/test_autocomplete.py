@@ -0,0 +1,194 @@
+import asyncio
+from types import ModuleType
+
+import pytest
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+from sqlalchemy.dialects import postgresql
+
+from services.web.autocomplete import (
+    TitleIndex,
+    TitleIndexLoader,
+    normalize_title,
+    title_trigrams,
+)
+from services.web.routers import autocomplete
+
+GAMES = [
+    (1, "Twilight Imperium: Fourth Edition", 900.0),
+    (2, "Twilight Struggle", 950.0),
+    (3, "Catan", 990.0),
+    (4, "Catan: Seafarers", 400.0),
+    (5, "Pandemic", 980.0),
+    (6, "Café International", None),
+    (7, "Twilight Imperium", 500.0),
+]
+
+
+@pytest.fixture
+def index() -> TitleIndex:
+    game_ids, titles, popularity = zip(*GAMES)
+    return TitleIndex(game_ids, titles, popularity)
+
+
+class TestNormalizeTitle:
+    @pytest.mark.parametrize(
+        "title, expected",
+        [
+            ("Catan", "catan"),
+            ("Twilight Imperium: Fourth Edition", "twilight imperium fourth edition"),
+            ("  Café  International ", "cafe international"),
+            ("!!!", ""),
+        ],
+        ids=["case", "punctuation", "accents_and_whitespace", "no_alphanumerics"],
+    )
+    def test_normalize_title(self, title, expected):
+        # Act / Assert
+        assert normalize_title(title) == expected
+
+
+class TestTitleTrigrams:
+    @pytest.mark.parametrize(
+        "partial, expected",
+        [
+            (False, {"  a", " ab", "ab ", "  c", " cd", "cde", "de "}),
+            (True, {"  a", " ab", "ab ", "  c", " cd", "cde"}),
+        ],
+        ids=["complete", "partial"],
+    )
+    def test_title_trigrams(self, partial, expected):
+        # Act / Assert
+        assert title_trigrams("ab cde", partial=partial) == expected
+
+
+class TestTitleIndexComplete:
+    @pytest.mark.parametrize(
+        "text, limit, expected",
+        [
+            ("twi", 10, [2, 1, 7]),
+            ("CATAN", 10, [3, 4]),
+            ("cafe", 10, [6]),
+            ("twilight", 1, [2]),
+            ("twilght imperium", 2, [1, 7]),
+            ("pandemc", 10, [5]),
+            ("zzz", 10, []),
+            ("?", 10, []),
+        ],
+        ids=[
+            "prefix_by_popularity",
+            "case_insensitive",
+            "accent_insensitive",
+            "limit",
+            "misspelled",
+            "misspelled_prefix",
+            "no_match",
+            "empty_input",
+        ],
+    )
+    def test_complete(self, index: TitleIndex, text, limit, expected):
+        # Act
+        matches = index.complete(text, limit)
+
+        # Assert
+        assert [game_id for game_id, _ in matches] == expected
+
+    def test_complete_prefix_before_fuzzy(self, index: TitleIndex):
+        # Act
+        matches = index.complete("twilight imperium", 10)
+
+        # Assert
+        assert matches[:2] == [
+            (1, "Twilight Imperium: Fourth Edition"),
+            (7, "Twilight Imperium"),
+        ]
+        assert len({game_id for game_id, _ in matches}) == len(matches)
+
+    def test_empty_index(self):
+        # Act / Assert
+        assert TitleIndex([], [], []).complete("catan", 10) == []
+
+
+class TestTitleIndexLoader:
+    def test_rebuild_on_version_change(self, mocker: MockerFixture):
+        # Arrange
+        db = mocker.MagicMock()
+        session = mocker.AsyncMock()
+        session.execute.return_value = mocker.MagicMock()
+        session.execute.return_value.all.return_value = GAMES
+        db.get_session.return_value.__aenter__.return_value = session
+        tracker = mocker.MagicMock()
+        loader = TitleIndexLoader(db, tracker)
+
+        # Act
+        asyncio.run(loader.on_version_change("v1"))
+        asyncio.run(loader.on_version_change("v1"))
+
+        # Assert
+        tracker.add_listener.assert_called_once_with(loader.on_version_change)
+        assert loader.version == "v1"
+        assert len(loader.value) == len(GAMES)
+        session.execute.assert_called_once()
+
+
+@pytest.fixture
+def router_module() -> ModuleType:
+    return autocomplete
+
+
+class TestAutocompleteEndpoint:
+    def test_autocomplete_from_index(
+        self, client: TestClient, index: TitleIndex, mocker: MockerFixture
+    ):
+        # Arrange
+        mocker.patch.object(autocomplete.title_index, "value", index)
+        mock_db = mocker.patch.object(autocomplete, "db")
+
+        # Act
+        response = client.get("/autocomplete", params={"q": "cat", "limit": 5})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {
+            "items": [
+                {"game_id": 3, "title": "Catan"},
+                {"game_id": 4, "title": "Catan: Seafarers"},
+            ]
+        }
+        mock_db.get_session.assert_not_called()
+
+    def test_autocomplete_before_index_is_built(
+        self, client: TestClient, mocker: MockerFixture
+    ):
+        # Arrange
+        mocker.patch.object(autocomplete.title_index, "value", None)
+        session = mocker.AsyncMock()
+        session.execute.return_value = mocker.MagicMock()
+        session.execute.return_value.all.return_value = [(4, "100% Orange Juice")]
+        mock_db = mocker.patch.object(autocomplete, "db")
+        mock_db.get_session.return_value.__aenter__.return_value = session
+
+        # Act
+        response = client.get("/autocomplete", params={"q": "100%"})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["items"] == [
+            {"game_id": 4, "title": "100% Orange Juice"}
+        ]
+        compiled = session.execute.call_args.args[0].compile(
+            dialect=postgresql.dialect()
+        )
+        assert "ILIKE" in str(compiled).upper()
+        assert "100\\%%" in compiled.params.values()
+
+    @pytest.mark.parametrize(
+        "params",
+        [{"q": ""}, {"q": "catan", "limit": 0}, {"q": "catan", "limit": 51}],
+        ids=["empty_query", "limit_too_small", "limit_too_large"],
+    )
+    def test_autocomplete_invalid_parameters(self, client: TestClient, params):
+        # Act
+        response = client.get("/autocomplete", params=params)
+
+        # Assert
+        assert response.status_code == 422
@@ -0,0 +1,226 @@
+import asyncio
+import sqlite3
+from pathlib import Path
+
+import pytest
+from pytest_mock import MockerFixture
+
+from services.web import cache as cache_module
+from services.web.cache import (
+    CacheBackend,
+    MemoryCache,
+    QueryCache,
+    SqliteCache,
+    make_cache_key,
+)
+from services.web.data_version import DataVersionTracker
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path: Path):
+    def factory(max_entries: int = 10, max_bytes: int = 1000) -> CacheBackend:
+        if request.param == "sqlite":
+            return SqliteCache(tmp_path / "cache.sqlite3", max_entries, max_bytes)
+        return MemoryCache(max_entries, max_bytes)
+
+    return factory
+
+
+class TestCacheBackend:
+    def test_get_and_set(self, make_backend):
+        # Arrange
+        backend = make_backend()
+
+        # Act
+        backend.set("a", b"1")
+        backend.set("a", b"2")
+
+        # Assert
+        assert backend.get("a") == b"2"
+        assert backend.get("b") is None
+
+    def test_evicts_least_recently_used_entry(self, make_backend):
+        # Arrange
+        backend = make_backend(max_entries=2)
+        backend.set("a", b"1")
+        backend.set("b", b"2")
+        backend.get("a")
+
+        # Act
+        backend.set("c", b"3")
+
+        # Assert
+        assert backend.get("a") == b"1"
+        assert backend.get("b") is None
+        assert backend.get("c") == b"3"
+
+    def test_evicts_beyond_max_bytes(self, make_backend):
+        # Arrange
+        backend = make_backend(max_bytes=10)
+        backend.set("a", b"x" * 6)
+
+        # Act
+        backend.set("b", b"y" * 6)
+        backend.set("c", b"z" * 11)
+
+        # Assert
+        assert backend.get("a") is None
+        assert backend.get("b") == b"y" * 6
+        assert backend.get("c") is None
+
+    def test_evicts_several_entries_for_a_large_value(self, make_backend):
+        # Arrange
+        backend = make_backend(max_bytes=10)
+        for key in "abc":
+            backend.set(key, b"x" * 3)
+
+        # Act
+        backend.set("d", b"y" * 8)
+
+        # Assert
+        assert [backend.get(key) for key in "abcd"] == [None, None, None, b"y" * 8]
+
+    def test_discard_except(self, make_backend):
+        # Arrange
+        backend = make_backend()
+        backend.set("v1:a", b"1")
+        backend.set("v2:a", b"2")
+
+        # Act
+        backend.discard_except("v2:")
+
+        # Assert
+        assert backend.get("v1:a") is None
+        assert backend.get("v2:a") == b"2"
+
+
+class TestSqliteCache:
+    def test_shared_between_instances(self, tmp_path: Path):
+        # Arrange
+        writer = SqliteCache(tmp_path / "cache.sqlite3", 10, 1000)
+        reader = SqliteCache(tmp_path / "cache.sqlite3", 10, 1000)
+
+        # Act
+        writer.set("a", b"1")
+
+        # Assert
+        assert reader.get("a") == b"1"
+
+    def test_batches_access_times(self, tmp_path: Path, mocker: MockerFixture):
+        # Arrange
+        mocker.patch.object(SqliteCache, "TOUCH_BATCH_SIZE", 2)
+        backend = SqliteCache(tmp_path / "cache.sqlite3", 10, 1000)
+        backend.set("a", b"1")
+        backend.set("b", b"2")
+        connection = sqlite3.connect(tmp_path / "cache.sqlite3")
+        query = "SELECT accessed_at FROM cache WHERE key = 'a'"
+        (set_at,) = connection.execute(query).fetchone()
+
+        # Act
+        backend.get("a")
+        (after_hit,) = connection.execute(query).fetchone()
+        backend.get("b")
+        (after_batch,) = connection.execute(query).fetchone()
+
+        # Assert
+        assert after_hit == set_at
+        assert after_batch > set_at
+
+
+class TestMakeCacheKey:
+    def test_independent_of_parameter_order(self):
+        # Act
+        first = make_cache_key("games", sort="popularity", limit=10)
+        second = make_cache_key("games", limit=10, sort="popularity")
+
+        # Assert
+        assert first == second
+        assert first != make_cache_key("games", sort="popularity", limit=20)
+        assert first != make_cache_key("search", sort="popularity", limit=10)
+
+
+class TestQueryCache:
+    def test_computes_once_per_version(self, mocker: MockerFixture):
+        # Arrange
+        tracker = DataVersionTracker()
+        tracker.version = "v1"
+        cache = QueryCache(MemoryCache(10, 1000), tracker)
+        compute = mocker.AsyncMock(side_effect=[b"first", b"second"])
+
+        # Act
+        results = [asyncio.run(cache.get_or_compute("key", compute)) for _ in range(2)]
+
+        # Assert
+        assert results == [b"first", b"first"]
+        assert compute.await_count == 1
+        assert (cache.hits, cache.misses) == (1, 1)
+
+    def test_blocking_backend_called_in_worker_thread(
+        self, tmp_path: Path, mocker: MockerFixture
+    ):
+        # Arrange
+        tracker = DataVersionTracker()
+        tracker.version = "v1"
+        cache = QueryCache(SqliteCache(tmp_path / "cache.sqlite3", 10, 1000), tracker)
+        to_thread = mocker.spy(cache_module.asyncio, "to_thread")
+        compute = mocker.AsyncMock(return_value=b"result")
+
+        # Act
+        results = [asyncio.run(cache.get_or_compute("key", compute)) for _ in range(2)]
+
+        # Assert
+        assert results == [b"result", b"result"]
+        assert [call.args[0].__name__ for call in to_thread.call_args_list] == [
+            "get",
+            "set",
+            "get",
+        ]
+
+    def test_bypassed_without_data_version(self, mocker: MockerFixture):
+        # Arrange
+        cache = QueryCache(MemoryCache(10, 1000), DataVersionTracker())
+        compute = mocker.AsyncMock(side_effect=[b"first", b"second"])
+
+        # Act
+        results = [asyncio.run(cache.get_or_compute("key", compute)) for _ in range(2)]
+
+        # Assert
+        assert results == [b"first", b"second"]
+
+    def test_invalidated_on_new_data_version(self, mocker: MockerFixture):
+        # Arrange
+        tracker = DataVersionTracker()
+        tracker.version = "v1"
+        backend = MemoryCache(10, 1000)
+        cache = QueryCache(backend, tracker)
+        compute = mocker.AsyncMock(side_effect=[b"first", b"second"])
+        asyncio.run(cache.get_or_compute("key", compute))
+        db = mocker.MagicMock()
+        session = db.get_session.return_value.__aenter__.return_value
+        session.scalar = mocker.AsyncMock(return_value="v2")
+
+        # Act
+        asyncio.run(tracker.refresh(db))
+        result = asyncio.run(cache.get_or_compute("key", compute))
+
+        # Assert
+        assert result == b"second"
+        assert len(backend) == 1
+
+    def test_not_stored_if_version_changed_during_compute(self, mocker: MockerFixture):
+        # Arrange
+        tracker = DataVersionTracker()
+        tracker.version = "v1"
+        backend = MemoryCache(10, 1000)
+        cache = QueryCache(backend, tracker)
+
+        async def compute() -> bytes:
+            tracker.version = "v2"
+            return b"result"
+
+        # Act
+        result = asyncio.run(cache.get_or_compute("key", compute))
+
+        # Assert
+        assert result == b"result"
+        assert len(backend) == 0
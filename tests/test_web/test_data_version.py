@@ -0,0 +1,157 @@
+import asyncio
+
+import pytest
+from pytest_mock import MockerFixture
+
+from services.web.data_version import DataVersionTracker, VersionedResource
+
+
+@pytest.fixture
+def mock_db(mocker: MockerFixture):
+    db = mocker.MagicMock()
+    session = mocker.AsyncMock()
+    db.get_session.return_value.__aenter__.return_value = session
+    return db
+
+
+class TestDataVersionTracker:
+    def test_refresh_notifies_listeners_on_change(self, mock_db, mocker: MockerFixture):
+        # Arrange
+        tracker = DataVersionTracker()
+        listener = mocker.AsyncMock()
+        tracker.add_listener(listener)
+        session = mock_db.get_session.return_value.__aenter__.return_value
+        session.scalar.side_effect = ["v1", "v1", "v2"]
+
+        # Act
+        versions = [asyncio.run(tracker.refresh(mock_db)) for _ in range(3)]
+
+        # Assert
+        assert versions == ["v1", "v1", "v2"]
+        assert [call.args[0] for call in listener.await_args_list] == ["v1", "v2"]
+        assert tracker.etag == 'W/"v2"'
+
+    def test_refresh_no_data_loaded(self, mock_db):
+        # Arrange
+        tracker = DataVersionTracker()
+        mock_db.get_session.return_value.__aenter__.return_value.scalar.return_value = (
+            None
+        )
+
+        # Act
+        version = asyncio.run(tracker.refresh(mock_db))
+
+        # Assert
+        assert version is None
+        assert tracker.etag is None
+
+    def test_refresh_listener_failure_is_isolated(self, mock_db, mocker: MockerFixture):
+        # Arrange
+        tracker = DataVersionTracker()
+        failing = mocker.AsyncMock(side_effect=RuntimeError("boom"))
+        succeeding = mocker.AsyncMock()
+        tracker.add_listener(failing)
+        tracker.add_listener(succeeding)
+        mock_db.get_session.return_value.__aenter__.return_value.scalar.return_value = (
+            "v1"
+        )
+
+        # Act
+        asyncio.run(tracker.refresh(mock_db))
+
+        # Assert
+        succeeding.assert_awaited_once_with("v1")
+
+    def test_refresh_retries_failed_listeners(self, mock_db, mocker: MockerFixture):
+        # Arrange
+        tracker = DataVersionTracker()
+        listener = mocker.AsyncMock(side_effect=[RuntimeError("boom"), None, None])
+        tracker.add_listener(listener)
+        session = mock_db.get_session.return_value.__aenter__.return_value
+        session.scalar.side_effect = ["v1", "v1", "v1", "v2"]
+
+        # Act
+        for _ in range(4):
+            asyncio.run(tracker.refresh(mock_db))
+
+        # Assert
+        assert [call.args[0] for call in listener.await_args_list] == ["v1", "v1", "v2"]
+
+    def test_start_and_stop(self, mock_db):
+        # Arrange
+        tracker = DataVersionTracker()
+        mock_db.get_session.return_value.__aenter__.return_value.scalar.return_value = (
+            "v1"
+        )
+
+        async def run():
+            tracker.start(mock_db, interval=0.01)
+            await asyncio.sleep(0.05)
+            await tracker.stop()
+
+        # Act
+        asyncio.run(run())
+
+        # Assert
+        assert tracker.version == "v1"
+        assert tracker._task is None
+
+
+class CountingResource(VersionedResource[int]):
+    loads = 0
+    failures = 0
+
+    async def load(self, version: str) -> int:
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError("boom")
+        self.loads += 1
+        return self.loads
+
+
+class TestVersionedResource:
+    def test_rebuilt_on_version_change(self, mock_db):
+        # Arrange
+        tracker = DataVersionTracker()
+        resource = CountingResource(mock_db, tracker)
+
+        # Act / Assert
+        assert resource.current() is None
+        tracker.version = "v1"
+        asyncio.run(resource.on_version_change("v1"))
+        asyncio.run(resource.on_version_change("v1"))
+        assert (resource.current(), resource.loads) == (1, 1)
+
+        tracker.version = "v2"
+        assert resource.current() is None
+        assert resource.value == 1
+        asyncio.run(resource.on_version_change("v2"))
+        assert resource.current() == 2
+
+    def test_subscribes_to_tracker(self, mock_db):
+        # Arrange
+        tracker = DataVersionTracker()
+
+        # Act
+        resource = CountingResource(mock_db, tracker)
+
+        # Assert
+        assert tracker.listeners == [resource.on_version_change]
+
+    def test_retried_after_failed_load(self, mock_db):
+        # Arrange
+        tracker = DataVersionTracker()
+        resource = CountingResource(mock_db, tracker)
+        resource.failures = 1
+        session = mock_db.get_session.return_value.__aenter__.return_value
+        session.scalar.return_value = "v1"
+
+        # Act
+        asyncio.run(tracker.refresh(mock_db))
+        failed = resource.current()
+        asyncio.run(tracker.refresh(mock_db))
+
+        # Assert
+        assert failed is None
+        assert resource.current() == 1
+        assert resource.version == "v1"
@@ -0,0 +1,203 @@
+import asyncio
+import csv
+import gzip
+import io
+import json
+import zlib
+from types import ModuleType
+
+import pyarrow.parquet as pq
+import pytest
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+
+from services.web.export import (
+    CsvEncoder,
+    NdjsonEncoder,
+    ParquetEncoder,
+    export_columns,
+    gzip_stream,
+)
+from services.web.routers import export
+
+COLUMNS = export_columns(export.models.GameDetails.__table__.columns)
+
+BATCHES = [
+    [
+        (1, "Die Macher", 'Politics, "quoted"', 1986, 7.6)
+        + (None,) * (len(COLUMNS) - 5),
+        (2, "Dragonmaster", "", None, 6.6) + (None,) * (len(COLUMNS) - 5),
+    ],
+    [(3, "Samurai", "Ｓａｍｕｒａｉ", 1998, 7.4) + (None,) * (len(COLUMNS) - 5)],
+]
+
+
+def _encode(encoder) -> bytes:
+    return (
+        encoder.header()
+        + b"".join(encoder.encode(batch) for batch in BATCHES)
+        + encoder.footer()
+    )
+
+
+class TestExportColumns:
+    def test_skips_unsupported_types(self):
+        # Act
+        names = [column.key for column in COLUMNS]
+
+        # Assert
+        assert names[:3] == ["game_id", "title", "description"]
+        assert "search_vector" not in names
+        assert len(names) == len(BATCHES[0][0])
+
+
+class TestEncoders:
+    def test_ndjson(self):
+        # Act
+        lines = _encode(NdjsonEncoder(COLUMNS)).decode().splitlines()
+
+        # Assert
+        rows = [json.loads(line) for line in lines]
+        assert [row["game_id"] for row in rows] == [1, 2, 3]
+        assert rows[0]["description"] == 'Politics, "quoted"'
+        assert rows[1]["year_published"] is None
+
+    def test_csv(self):
+        # Act
+        rows = list(csv.reader(io.StringIO(_encode(CsvEncoder(COLUMNS)).decode())))
+
+        # Assert
+        assert rows[0] == [column.key for column in COLUMNS]
+        assert [row[0] for row in rows[1:]] == ["1", "2", "3"]
+        assert rows[1][2] == 'Politics, "quoted"'
+        assert rows[2][3] == ""
+
+    @pytest.mark.parametrize("compression", ["none", "gzip"])
+    def test_parquet(self, compression):
+        # Arrange
+        encoder = ParquetEncoder(COLUMNS, compression=compression)
+
+        # Act
+        parquet_file = pq.ParquetFile(io.BytesIO(_encode(encoder)))
+
+        # Assert
+        assert parquet_file.num_row_groups == len(BATCHES)
+        table = parquet_file.read()
+        assert table.column_names == [column.key for column in COLUMNS]
+        assert table.column("game_id").to_pylist() == [1, 2, 3]
+        assert table.column("title").to_pylist()[2] == "Samurai"
+        assert table.column("year_published").to_pylist()[1] is None
+
+
+class TestGzipStream:
+    def test_each_chunk_decompresses_on_arrival(self):
+        # Arrange
+        async def chunks():
+            yield b"first\n"
+            yield b"second\n"
+
+        async def collect():
+            return [chunk async for chunk in gzip_stream(chunks())]
+
+        # Act
+        compressed = asyncio.run(collect())
+
+        # Assert
+        decompressor = zlib.decompressobj(wbits=31)
+        assert decompressor.decompress(compressed[0]) == b"first\n"
+        assert gzip.decompress(b"".join(compressed)) == b"first\nsecond\n"
+
+
+@pytest.fixture
+def router_module() -> ModuleType:
+    return export
+
+
+@pytest.fixture
+def mock_session(mock_session):
+    async def partitions():
+        for batch in BATCHES:
+            yield batch
+
+    mock_session.stream.return_value.partitions = partitions
+    return mock_session
+
+
+class TestExportEndpoint:
+    def test_export_ndjson(self, client: TestClient, mock_session):
+        # Act
+        response = client.get("/export/games")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        assert (
+            response.headers["content-disposition"]
+            == 'attachment; filename="games.ndjson"'
+        )
+        assert len(response.text.splitlines()) == 3
+        query = mock_session.stream.call_args.args[0]
+        assert query.get_execution_options()["yield_per"] > 0
+        assert [column.name for column in query._order_by_clauses] == ["game_id"]
+        export.db.get_session.assert_called_once_with(use_replica=False)
+
+    def test_export_holds_slot_while_streaming(
+        self, client: TestClient, mock_session, mocker: MockerFixture
+    ):
+        # Arrange
+        slots = mocker.patch.object(export, "export_slots", asyncio.Semaphore(1))
+        locked = []
+
+        async def partitions():
+            locked.append(slots.locked())
+            yield BATCHES[0]
+
+        mock_session.stream.return_value.partitions = partitions
+
+        # Act
+        response = client.get("/export/games")
+
+        # Assert
+        assert response.status_code == 200
+        assert locked == [True]
+        assert not slots.locked()
+
+    def test_export_csv_gzip(self, client: TestClient, mock_session):
+        # Act
+        response = client.get(
+            "/export/games", params={"format": "csv", "compression": "gzip"}
+        )
+
+        # Assert
+        assert response.headers["content-encoding"] == "gzip"
+        assert response.headers["content-type"].startswith("text/csv")
+        assert response.text.splitlines()[0].startswith("game_id,title,")
+        assert len(response.text.splitlines()) == 4
+
+    def test_export_parquet(self, client: TestClient, mock_session):
+        # Act
+        response = client.get(
+            "/export/games", params={"format": "parquet", "compression": "gzip"}
+        )
+
+        # Assert
+        assert "content-encoding" not in response.headers
+        assert pq.read_table(io.BytesIO(response.content)).num_rows == 3
+
+    def test_export_link_table(self, client: TestClient, mock_session):
+        # Act
+        client.get("/export/game_mechanics")
+
+        # Assert
+        query = mock_session.stream.call_args.args[0]
+        assert [column.name for column in query.selected_columns] == [
+            "game_id",
+            "mechanic_id",
+        ]
+
+    def test_export_unknown_table(self, client: TestClient, mock_session):
+        # Act
+        response = client.get("/export/data_version")
+
+        # Assert
+        assert response.status_code == 422
@@ -0,0 +1,88 @@
+import pytest
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from services.web import filters
+from services.web.filters import GameFilters, build_game_filters, get_game_filters
+
+
+def _compile(clauses) -> list[str]:
+    """Compile each clause as the WHERE clause of a game query, so subqueries correlate"""
+    return [
+        str(
+            select(filters.models.GameDetails.game_id)
+            .where(clause)
+            .compile(
+                dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+            )
+        ).split("\nWHERE ", 1)[1]
+        for clause in clauses
+    ]
+
+
+class TestBuildGameFilters:
+    @pytest.mark.parametrize(
+        "game_filters, expected_sql",
+        [
+            (GameFilters(), []),
+            (
+                GameFilters(year_min=2000, weight_max=2.5),
+                [
+                    "game_details.year_published >= 2000",
+                    "game_details.average_weight <= 2.5",
+                ],
+            ),
+            (
+                GameFilters(players=4, age=10),
+                [
+                    "game_details.min_players <= 4",
+                    "game_details.max_players >= 4",
+                    "game_details.min_age <= 10",
+                ],
+            ),
+            (
+                GameFilters(mechanic=(2, 5)),
+                [
+                    "EXISTS (SELECT * \nFROM game_mechanic_link \nWHERE "
+                    "game_mechanic_link.game_id = game_details.game_id "
+                    "AND game_mechanic_link.mechanic_id = 2)",
+                    "EXISTS (SELECT * \nFROM game_mechanic_link \nWHERE "
+                    "game_mechanic_link.game_id = game_details.game_id "
+                    "AND game_mechanic_link.mechanic_id = 5)",
+                ],
+            ),
+        ],
+        ids=["no_filters", "ranges", "players_and_age", "links"],
+    )
+    def test_build_game_filters(self, game_filters, expected_sql):
+        # Act
+        clauses = build_game_filters(game_filters)
+
+        # Assert
+        assert _compile(clauses) == expected_sql
+
+
+class TestGetGameFilters:
+    def test_get_game_filters(self):
+        # Act
+        game_filters = get_game_filters(
+            year_min=None,
+            year_max=2020,
+            rating_min=None,
+            rating_max=None,
+            weight_min=None,
+            weight_max=None,
+            playtime_min=None,
+            playtime_max=None,
+            players=None,
+            age=None,
+            mechanic=[5, 2, 5],
+            category=[],
+            designer=[],
+            artist=[],
+            publisher=[],
+        )
+
+        # Assert
+        assert game_filters == GameFilters(year_max=2020, mechanic=(2, 5))
+        assert game_filters.active() == {"year_max": 2020, "mechanic": (2, 5)}
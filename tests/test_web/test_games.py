@@ -0,0 +1,661 @@
+from types import ModuleType
+
+import pytest
+from fastapi.testclient import TestClient
+from pytest_mock import MockerFixture
+from sqlalchemy import MetaData, create_engine, event, select, text, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.dialects.postgresql import JSONB, TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import StaticPool
+
+from services.common import config
+from services.web.cache import MemoryCache, QueryCache
+from services.web.data_version import DataVersionTracker
+from services.web.pagination import encode_cursor
+from services.web.routers import games
+from services.web.schemas import GameDetailsSchema
+from services.web.snapshot import CatalogSnapshot
+
+
+def _game(game_id: int, popularity: float | None) -> dict:
+    return {
+        "game_id": game_id,
+        "title": f"Game {game_id}",
+        "description": "",
+        "popularity": popularity,
+    }
+
+
+@pytest.fixture
+def router_module() -> ModuleType:
+    return games
+
+
+class TestGamesEndpoint:
+    def test_games_first_page(self, client: TestClient, mock_session):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = [
+            _game(1, 9.0),
+            _game(2, 8.0),
+            _game(3, 7.0),
+        ]
+
+        # Act
+        response = client.get("/games", params={"limit": 2})
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert [game["game_id"] for game in body["items"]] == [1, 2]
+        assert body["next_cursor"] == encode_cursor("popularity", "desc", 8.0, 2)
+        assert body["total_estimate"] is None
+        query = mock_session.execute.call_args.args[0]
+        assert query._limit_clause.value == 3
+        assert [column.name for column in query.selected_columns] == list(
+            GameDetailsSchema.model_fields
+        )
+
+    def test_games_last_page(self, client: TestClient, mock_session):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = [
+            _game(3, 7.0)
+        ]
+        cursor = encode_cursor("popularity", "desc", 8.0, 2)
+
+        # Act
+        response = client.get("/games", params={"limit": 2, "cursor": cursor})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["next_cursor"] is None
+        query = mock_session.execute.call_args.args[0]
+        assert query.whereclause is not None
+
+    def test_games_total_estimate(
+        self, client: TestClient, mock_session, mocker: MockerFixture
+    ):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = []
+        mocker.patch.object(
+            games, "estimate_row_count", mocker.AsyncMock(return_value=150_000)
+        )
+
+        # Act
+        response = client.get("/games", params={"include_total": True})
+
+        # Assert
+        assert response.json()["total_estimate"] == 150_000
+        assert response.json()["total_is_estimate"] is True
+
+    def test_games_sparse_fields(self, client: TestClient, mock_session):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = [
+            {"game_id": 1, "title": "Game 1", "popularity": 9.0},
+            {"game_id": 2, "title": "Game 2", "popularity": 8.0},
+        ]
+
+        # Act
+        response = client.get("/games", params={"limit": 1, "fields": "title"})
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["items"] == [{"game_id": 1, "title": "Game 1"}]
+        assert body["next_cursor"] == encode_cursor("popularity", "desc", 9.0, 1)
+        query = mock_session.execute.call_args.args[0]
+        assert [column.name for column in query.selected_columns] == [
+            "game_id",
+            "title",
+            "popularity",
+        ]
+
+    def test_games_filtered(
+        self, client: TestClient, mock_session, mocker: MockerFixture
+    ):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = []
+        estimate_query_rows = mocker.patch.object(
+            games, "estimate_query_rows", mocker.AsyncMock(return_value=42)
+        )
+
+        # Act
+        response = client.get(
+            "/games",
+            params={
+                "players": 3,
+                "mechanic": [7, 9],
+                "sort": "average_weight",
+                "include_total": True,
+            },
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["total_estimate"] == 42
+        range_query, tail_query = [
+            call.args[0] for call in mock_session.execute.call_args_list
+        ]
+        where = str(estimate_query_rows.call_args.args[1].whereclause)
+        assert "game_details.min_players <=" in where
+        assert where.count("EXISTS") == 2
+        assert "average_weight DESC NULLS LAST" in str(range_query)
+        assert str(range_query.whereclause) == (
+            f"{where} AND game_details.average_weight IS NOT NULL"
+        )
+        assert str(tail_query.whereclause) == (
+            f"{where} AND game_details.average_weight IS NULL"
+        )
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {"limit": 0},
+            {"limit": 100_000},
+            {"sort": "title"},
+            {"cursor": "garbage"},
+            {"cursor": encode_cursor("game_id", "desc", 1, 1)},
+            {"cursor": encode_cursor("popularity", "desc", "1 OR 1=1", 1)},
+            {"fields": "summary,secret"},
+            {"weight_max": 6},
+            {"mechanic": "strategy"},
+        ],
+        ids=[
+            "error_limit_too_small",
+            "error_limit_too_large",
+            "error_unknown_sort",
+            "error_invalid_cursor",
+            "error_cursor_for_other_sort",
+            "error_tampered_cursor",
+            "error_unknown_field",
+            "error_weight_out_of_range",
+            "error_invalid_link_id",
+        ],
+    )
+    def test_games_error_cases(self, params, client: TestClient, mock_session):
+        # Act
+        response = client.get("/games", params=params)
+
+        # Assert
+        assert response.status_code in (400, 422)
+        mock_session.execute.assert_not_called()
+
+    def test_games_served_from_query_cache(
+        self, client: TestClient, mock_session, mocker: MockerFixture
+    ):
+        # Arrange
+        tracker = DataVersionTracker()
+        tracker.version = "v1"
+        mocker.patch.object(
+            games, "query_cache", QueryCache(MemoryCache(10, 10_000), tracker)
+        )
+        mock_session.execute.return_value.mappings.return_value.all.return_value = [
+            _game(1, 9.0)
+        ]
+
+        # Act
+        first = client.get("/games", params={"limit": 5, "sort": "popularity"})
+        second = client.get("/games", params={"sort": "popularity", "limit": 5})
+
+        # Assert
+        assert first.json() == second.json()
+        # The range with a sort value and the NULL tail, both of the first request only
+        assert mock_session.execute.call_count == 2
+
+
+class TestGamesFromSnapshot:
+    @pytest.fixture
+    def snapshot(self, mocker: MockerFixture) -> CatalogSnapshot:
+        rows = [_game(game_id, float(game_id % 4)) for game_id in range(1, 8)]
+        columns = {
+            field: [row.get(field) for row in rows]
+            for field in GameDetailsSchema.model_fields
+        }
+        links = {"mechanic": ([1, 2, 3, 4], [10, 10, 10, 11])}
+        snapshot = CatalogSnapshot(columns, links, games.SORT_COLUMNS)
+        mocker.patch.object(games.catalog, "current", return_value=snapshot)
+        return snapshot
+
+    def test_games_from_snapshot(self, client: TestClient, snapshot, mock_session):
+        # Act
+        first = client.get(
+            "/games",
+            params={
+                "mechanic": 10,
+                "limit": 2,
+                "fields": "title",
+                "include_total": True,
+            },
+        )
+        second = client.get(
+            "/games",
+            params={
+                "mechanic": 10,
+                "limit": 2,
+                "fields": "title",
+                "cursor": first.json()["next_cursor"],
+            },
+        )
+
+        # Assert
+        assert first.status_code == 200
+        assert first.json() == {
+            "items": [
+                {"game_id": 3, "title": "Game 3"},
+                {"game_id": 2, "title": "Game 2"},
+            ],
+            "next_cursor": encode_cursor("popularity", "desc", 2.0, 2),
+            "total_estimate": 3,
+            "total_is_estimate": False,
+        }
+        assert second.json()["items"] == [{"game_id": 1, "title": "Game 1"}]
+        assert second.json()["next_cursor"] is None
+        mock_session.execute.assert_not_called()
+
+    def test_facets_from_snapshot(self, client: TestClient, snapshot, mock_session):
+        # Act
+        response = client.get("/games/facets", params={"mechanic": 10})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {
+            "total": 3,
+            "mechanic": [{"value": 10, "count": 3}],
+            "category": [],
+            "players": [],
+        }
+        mock_session.execute.assert_not_called()
+
+    def test_games_from_snapshot_invalid_cursor(
+        self, client: TestClient, snapshot, mock_session
+    ):
+        # Act
+        response = client.get("/games", params={"cursor": "not-a-cursor"})
+
+        # Assert
+        assert response.status_code == 400
+
+
+@compiles(JSONB, "sqlite")
+def _compile_jsonb_sqlite(type_, compiler, **kw) -> str:
+    return "JSON"
+
+
+@compiles(TSVECTOR, "sqlite")
+def _compile_tsvector_sqlite(type_, compiler, **kw) -> str:
+    return "TEXT"
+
+
+@pytest.fixture
+def sqlite_session():
+    models = games.models
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    # SQLite doesn't support the Postgres server defaults, generated columns and indexes
+    metadata = MetaData()
+    for table in models.Base.metadata.sorted_tables:
+        copy = table.to_metadata(metadata)
+        copy.indexes.clear()
+        for column in copy.columns:
+            column.server_default = None
+            column.computed = None
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            [
+                models.MechanicDetails(mechanic_id=1, mechanic_name="Dice Rolling"),
+                models.MechanicDetails(mechanic_id=2, mechanic_name="Hand Management"),
+                models.CategoryDetails(category_id=10, category_name="Economic"),
+                models.DesignerDetails(designer_id=20, designer_name="Klaus Teuber"),
+            ]
+        )
+        for game_id in range(1, 11):
+            session.add(
+                models.GameDetails(
+                    game_id=game_id,
+                    title=f"Game {game_id}",
+                    description="",
+                    popularity=float(game_id),
+                )
+            )
+            session.add(models.GameMechanicLink(game_id=game_id, mechanic_id=2))
+            session.add(models.GameMechanicLink(game_id=game_id, mechanic_id=1))
+            session.add(models.GameCategoryLink(game_id=game_id, category_id=10))
+        session.add(models.GameDesignerLink(game_id=1, designer_id=20))
+        session.commit()
+        yield session
+
+
+class TestLinkLoading:
+    def test_constant_query_count(self, sqlite_session):
+        # Arrange
+        statements = []
+        event.listen(
+            sqlite_session.get_bind(),
+            "before_cursor_execute",
+            lambda *args: statements.append(args[2]),
+        )
+        query = select(games.models.GameDetails).options(*games.LINK_LOADER_OPTIONS)
+
+        # Act
+        items = [
+            games.game_with_links(game) for game in sqlite_session.scalars(query).all()
+        ]
+
+        # Assert
+        assert len(items) == 10
+        assert len(statements) == 1 + len(games.LINK_RELATIONS)
+        first = next(item for item in items if item["game_id"] == 1)
+        assert first["mechanics"] == [
+            {"id": 1, "name": "Dice Rolling"},
+            {"id": 2, "name": "Hand Management"},
+        ]
+        assert first["categories"] == [{"id": 10, "name": "Economic"}]
+        assert first["designers"] == [{"id": 20, "name": "Klaus Teuber"}]
+        assert first["artists"] == []
+
+
+class TestGameFacets:
+    @pytest.fixture
+    def facet_session(self, sqlite_session, mocker: MockerFixture):
+        """Async session stand-in answering queries from the SQLite session"""
+        models = games.models
+        sqlite_session.execute(
+            models.GameDetails.__table__.update()
+            .where(models.GameDetails.game_id <= 4)
+            .values(min_players=2, max_players=models.GameDetails.game_id)
+        )
+        sqlite_session.execute(
+            models.GameMechanicLink.__table__.delete().where(
+                models.GameMechanicLink.game_id > 6,
+                models.GameMechanicLink.mechanic_id == 1,
+            )
+        )
+        session = mocker.AsyncMock()
+        session.execute.side_effect = lambda query: sqlite_session.execute(query)
+        mock_db = mocker.patch.object(games, "db")
+        mock_db.get_session.return_value.__aenter__.return_value = session
+        return session
+
+    @pytest.mark.parametrize(
+        "params",
+        [{}, {"mechanic": 1}, {"players": 3}, {"designer": 20}],
+        ids=["no_filters", "bitset_link", "players", "position_link"],
+    )
+    def test_database_matches_snapshot(
+        self,
+        client: TestClient,
+        facet_session,
+        sqlite_session,
+        mocker: MockerFixture,
+        params,
+    ):
+        # Arrange
+        rows = sqlite_session.scalars(select(games.models.GameDetails)).all()
+        columns = {
+            field: [getattr(row, field) for row in rows]
+            for field in GameDetailsSchema.model_fields
+        }
+        links = {}
+        for name, link, id_column in games.LINK_FILTERS:
+            pairs = sqlite_session.execute(select(link.game_id, id_column)).all()
+            links[name] = ([pair[0] for pair in pairs], [pair[1] for pair in pairs])
+        snapshot = CatalogSnapshot(columns, links, games.SORT_COLUMNS)
+
+        # Act
+        from_database = client.get("/games/facets", params=params)
+        mocker.patch.object(games.catalog, "current", return_value=snapshot)
+        from_snapshot = client.get("/games/facets", params=params)
+
+        # Assert
+        assert from_database.status_code == 200
+        assert from_database.json() == from_snapshot.json()
+
+    def test_counts(self, client: TestClient, facet_session):
+        # Act
+        response = client.get("/games/facets")
+
+        # Assert
+        assert response.json() == {
+            "total": 10,
+            "mechanic": [{"value": 2, "count": 10}, {"value": 1, "count": 6}],
+            "category": [{"value": 10, "count": 10}],
+            "players": [
+                {"value": 2, "count": 3},
+                {"value": 3, "count": 2},
+                {"value": 4, "count": 1},
+            ],
+        }
+
+
+class TestGameDetailEndpoints:
+    @pytest.fixture
+    def detail_session(self, sqlite_session, mocker: MockerFixture):
+        """Async session stand-in answering queries from the SQLite session"""
+        session = mocker.AsyncMock()
+        session.scalars.side_effect = lambda query: sqlite_session.scalars(query)
+        session.execute.side_effect = lambda query: sqlite_session.execute(query)
+        mock_db = mocker.patch.object(games, "db")
+        mock_db.get_session.return_value.__aenter__.return_value = session
+        return session
+
+    def test_game(self, client: TestClient, detail_session):
+        # Act
+        response = client.get("/games/1")
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["title"] == "Game 1"
+        assert [mechanic["name"] for mechanic in body["mechanics"]] == [
+            "Dice Rolling",
+            "Hand Management",
+        ]
+        assert body["designers"] == [{"id": 20, "name": "Klaus Teuber"}]
+
+    def test_games_pages_into_null_tail(
+        self, client: TestClient, detail_session, sqlite_session
+    ):
+        # Arrange
+        sqlite_session.execute(
+            update(games.models.GameDetails)
+            .where(games.models.GameDetails.game_id.in_([2, 5]))
+            .values(popularity=None)
+        )
+        pages = []
+        cursor = None
+
+        # Act
+        while True:
+            params = {"limit": 3, "fields": "game_id"}
+            if cursor is not None:
+                params["cursor"] = cursor
+            body = client.get("/games", params=params).json()
+            pages.append([game["game_id"] for game in body["items"]])
+            if (cursor := body["next_cursor"]) is None:
+                break
+
+        # Assert
+        assert pages == [[10, 9, 8], [7, 6, 4], [3, 1, 5], [2]]
+
+    def test_game_not_found(self, client: TestClient, detail_session):
+        # Act
+        response = client.get("/games/999")
+
+        # Assert
+        assert response.status_code == 404
+
+    def test_games_with_links(self, client: TestClient, detail_session):
+        # Act
+        first = client.get("/games/details", params={"limit": 3})
+        second = client.get(
+            "/games/details", params={"limit": 3, "cursor": first.json()["next_cursor"]}
+        )
+
+        # Assert
+        assert first.status_code == 200
+        assert [game["game_id"] for game in first.json()["items"]] == [10, 9, 8]
+        assert [game["game_id"] for game in second.json()["items"]] == [7, 6, 5]
+        assert all(len(game["mechanics"]) == 2 for game in first.json()["items"])
+
+    def test_game_served_from_document(
+        self, client: TestClient, detail_session, sqlite_session
+    ):
+        # Arrange
+        sqlite_session.execute(
+            text(
+                "INSERT INTO game_documents (game_id, document, updated_at) "
+                """VALUES (1, '{"game_id": 1, "title": "From document"}', 0)"""
+            )
+        )
+
+        # Act
+        response = client.get("/games/1")
+
+        # Assert
+        assert response.json() == {"game_id": 1, "title": "From document"}
+        detail_session.scalars.assert_not_called()
+
+    def test_games_with_links_mixes_documents(
+        self, client: TestClient, detail_session, sqlite_session
+    ):
+        # Arrange
+        sqlite_session.execute(
+            text(
+                "INSERT INTO game_documents (game_id, document, updated_at) "
+                """VALUES (9, '{"game_id": 9, "title": "From document"}', 0)"""
+            )
+        )
+
+        # Act
+        response = client.get("/games/details", params={"limit": 2})
+
+        # Assert
+        items = response.json()["items"]
+        assert items[0]["title"] == "Game 10"
+        assert len(items[0]["mechanics"]) == 2
+        assert items[1] == {"game_id": 9, "title": "From document"}
+        assert detail_session.scalars.call_count == 1
+
+
+class TestSimilarGames:
+    @pytest.fixture
+    def similar_session(self, sqlite_session, mocker: MockerFixture):
+        """Async session stand-in answering queries from the SQLite session"""
+        models = games.models
+        sqlite_session.add_all(
+            [
+                models.GameSimilarity(game_id=1, rank=1, similar_game_id=5, score=0.9),
+                models.GameSimilarity(game_id=1, rank=2, similar_game_id=3, score=0.7),
+                models.GameSimilarity(game_id=1, rank=3, similar_game_id=8, score=0.4),
+                models.GameSimilarity(game_id=2, rank=1, similar_game_id=1, score=0.8),
+            ]
+        )
+        sqlite_session.commit()
+        session = mocker.AsyncMock()
+        session.execute.side_effect = lambda query: sqlite_session.execute(query)
+        session.get.side_effect = lambda model, key: sqlite_session.get(model, key)
+        mock_db = mocker.patch.object(games, "db")
+        mock_db.get_session.return_value.__aenter__.return_value = session
+        return session
+
+    def test_similar_games(self, client: TestClient, similar_session):
+        # Act
+        response = client.get(
+            "/games/1/similar", params={"limit": 2, "fields": "title"}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["items"] == [
+            {"game_id": 5, "title": "Game 5", "score": 0.9},
+            {"game_id": 3, "title": "Game 3", "score": 0.7},
+        ]
+        similar_session.get.assert_not_called()
+
+    def test_similar_games_none_computed(self, client: TestClient, similar_session):
+        # Act
+        response = client.get("/games/4/similar")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["items"] == []
+
+    @pytest.mark.parametrize(
+        "path, expected_status",
+        [
+            ("/games/999/similar", 404),
+            ("/games/0/similar", 422),
+            ("/games/1/similar?limit=1000", 422),
+            ("/games/1/similar?fields=rank", 400),
+        ],
+        ids=["unknown_game", "invalid_id", "limit_too_large", "unknown_field"],
+    )
+    def test_similar_games_errors(
+        self, client: TestClient, similar_session, path, expected_status
+    ):
+        # Act
+        response = client.get(path)
+
+        # Assert
+        assert response.status_code == expected_status
+
+
+class TestGamesBatch:
+    @pytest.fixture
+    def batch_session(self, mocker: MockerFixture):
+        rows = [
+            {"game_id": 1, "document": '{"game_id": 1}'},
+            {"game_id": 2, "document": None},
+            {"game_id": 4, "document": '{"game_id": 4}'},
+        ]
+
+        async def mappings():
+            for row in rows:
+                yield row
+
+        session = mocker.AsyncMock()
+        session.stream.return_value.mappings = mappings
+        mock_db = mocker.patch.object(games, "db")
+        mock_db.get_session.return_value.__aenter__.return_value = session
+        mocker.patch.object(
+            games,
+            "assemble_documents",
+            mocker.AsyncMock(return_value={2: '{"game_id": 2, "assembled": true}'}),
+        )
+        return session
+
+    def test_games_batch(self, client: TestClient, batch_session):
+        # Act
+        response = client.post("/games/batch", json={"ids": [4, 3, 2, 1, 4]})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {
+            "items": [
+                {"game_id": 1},
+                {"game_id": 4},
+                {"game_id": 2, "assembled": True},
+            ],
+            "missing": [3],
+        }
+        query = batch_session.stream.call_args.args[0]
+        compiled = query.compile(dialect=postgresql.dialect())
+        assert "game_details.game_id = ANY (%(ids)s::INTEGER[])" in str(compiled)
+        assert compiled.params["ids"] == [1, 2, 3, 4]
+        games.assemble_documents.assert_awaited_once_with(batch_session, [2])
+
+    @pytest.mark.parametrize(
+        "body",
+        [{"ids": []}, {"ids": list(range(config.api_max_batch_size + 1))}, {}],
+        ids=["error_empty", "error_too_many_ids", "error_missing_ids"],
+    )
+    def test_games_batch_error_cases(self, body, client: TestClient, batch_session):
+        # Act
+        response = client.post("/games/batch", json=body)
+
+        # Assert
+        assert response.status_code == 422
+        batch_session.stream.assert_not_called()
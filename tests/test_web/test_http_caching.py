@@ -0,0 +1,104 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from services.web.data_version import DataVersionTracker
+from services.web.http_caching import add_http_caching, etag_matches
+
+
+@pytest.fixture
+def tracker() -> DataVersionTracker:
+    return DataVersionTracker()
+
+
+@pytest.fixture
+def client(tracker: DataVersionTracker) -> TestClient:
+    app = FastAPI()
+    app.state.calls = 0
+
+    @app.get("/games")
+    async def games():
+        app.state.calls += 1
+        return {"items": []}
+
+    @app.get("/metrics")
+    async def metrics():
+        return {}
+
+    add_http_caching(app, tracker, max_age=60, excluded_paths={"/metrics"})
+    return TestClient(app)
+
+
+class TestEtagMatches:
+    @pytest.mark.parametrize(
+        "if_none_match, expected",
+        [
+            ('W/"v1"', True),
+            ('"v1"', True),
+            ('"v0", W/"v1"', True),
+            ("*", True),
+            ('W/"v0"', False),
+        ],
+        ids=["weak", "strong", "list", "wildcard", "mismatch"],
+    )
+    def test_etag_matches(self, if_none_match: str, expected: bool):
+        assert etag_matches(if_none_match, 'W/"v1"') is expected
+
+
+class TestConditionalGet:
+    def test_no_data_version(self, client: TestClient):
+        # Act
+        response = client.get("/games")
+
+        # Assert
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+    def test_sets_validators(self, client: TestClient, tracker: DataVersionTracker):
+        # Arrange
+        tracker.version = "v1"
+
+        # Act
+        response = client.get("/games")
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["etag"] == 'W/"v1"'
+        assert response.headers["cache-control"] == "public, max-age=60"
+
+    def test_not_modified_skips_route(
+        self, client: TestClient, tracker: DataVersionTracker
+    ):
+        # Arrange
+        tracker.version = "v1"
+
+        # Act
+        response = client.get("/games", headers={"If-None-Match": 'W/"v1"'})
+
+        # Assert
+        assert response.status_code == 304
+        assert response.headers["etag"] == 'W/"v1"'
+        assert client.app.state.calls == 0  # type: ignore[attr-defined]
+
+    def test_stale_etag(self, client: TestClient, tracker: DataVersionTracker):
+        # Arrange
+        tracker.version = "v2"
+
+        # Act
+        response = client.get("/games", headers={"If-None-Match": 'W/"v1"'})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.headers["etag"] == 'W/"v2"'
+
+    def test_excluded_path(self, client: TestClient, tracker: DataVersionTracker):
+        # Arrange
+        tracker.version = "v1"
+
+        # Act
+        response = client.get("/metrics", headers={"If-None-Match": 'W/"v1"'})
+
+        # Assert
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+        assert "cache-control" not in response.headers
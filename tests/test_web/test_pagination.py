@@ -0,0 +1,243 @@
+import asyncio
+
+import pytest
+from fastapi import HTTPException
+from pytest_mock import MockerFixture
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+
+from services.web.db.models import GameDetails
+from services.web.pagination import (
+    decode_cursor,
+    encode_cursor,
+    estimate_query_rows,
+    estimate_row_count,
+    fetch_keyset_rows,
+    keyset_filters,
+    keyset_order_by,
+    keyset_queries,
+)
+
+
+def _compile(clause) -> str:
+    return str(
+        clause.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+    )
+
+
+class TestCursor:
+    @pytest.mark.parametrize(
+        "value, value_type, key",
+        [(7.5, float, 174430), (8, float, 1), (None, float, 12), ("Catan", str, 13)],
+        ids=[
+            "happy_path_float",
+            "happy_path_integral_float",
+            "edge_case_null_value",
+            "happy_path_string",
+        ],
+    )
+    def test_cursor_round_trip(self, value, value_type, key):
+        # Act
+        token = encode_cursor("bayes_rating", "desc", value, key)
+
+        # Assert
+        assert "=" not in token
+        assert decode_cursor(token, "bayes_rating", "desc", value_type) == (value, key)
+
+    @pytest.mark.parametrize(
+        "token",
+        [
+            "not-base64!",
+            encode_cursor("bayes_rating", "desc", 1.0, 1)[:-3],
+            encode_cursor("popularity", "desc", 1.0, 1),
+            encode_cursor("bayes_rating", "asc", 1.0, 1),
+            encode_cursor("bayes_rating", "desc", "7.5", 1),
+            encode_cursor("bayes_rating", "desc", [7.5], 1),
+            encode_cursor("bayes_rating", "desc", True, 1),
+            encode_cursor("bayes_rating", "desc", 7.5, "1"),
+            encode_cursor("bayes_rating", "desc", 7.5, 1.5),
+            encode_cursor("bayes_rating", "desc", 7.5, None),
+        ],
+        ids=[
+            "error_invalid_token",
+            "error_truncated_token",
+            "error_other_sort",
+            "error_other_order",
+            "error_string_value",
+            "error_list_value",
+            "error_bool_value",
+            "error_string_key",
+            "error_float_key",
+            "error_null_key",
+        ],
+    )
+    def test_decode_cursor_error_cases(self, token: str):
+        with pytest.raises(HTTPException) as e:
+            decode_cursor(token, "bayes_rating", "desc", float)
+        assert e.value.status_code == 400
+
+
+class TestKeysetClauses:
+    @pytest.mark.parametrize(
+        "sort_column, order, expected_sql",
+        [
+            (
+                GameDetails.popularity,
+                "desc",
+                "game_details.popularity DESC NULLS LAST, game_details.game_id DESC",
+            ),
+            (
+                GameDetails.bayes_rating,
+                "asc",
+                "game_details.bayes_rating ASC NULLS FIRST, game_details.game_id ASC",
+            ),
+            (GameDetails.game_id, "desc", "game_details.game_id DESC"),
+        ],
+        ids=["popularity_desc", "bayes_rating_asc", "game_id_desc"],
+    )
+    def test_keyset_order_by(self, sort_column, order, expected_sql):
+        # Act
+        clauses = keyset_order_by(sort_column, GameDetails.game_id, order)
+
+        # Assert
+        assert ", ".join(_compile(clause) for clause in clauses) == expected_sql
+
+    @pytest.mark.parametrize(
+        "sort_column, order, value, key, expected_sql",
+        [
+            (
+                GameDetails.popularity,
+                "desc",
+                5.5,
+                10,
+                [
+                    "(game_details.popularity, game_details.game_id) < (5.5, 10)",
+                    "game_details.popularity IS NULL",
+                ],
+            ),
+            (
+                GameDetails.popularity,
+                "asc",
+                5.5,
+                10,
+                [
+                    "(game_details.popularity, game_details.game_id) > (5.5, 10)",
+                    "game_details.popularity IS NULL",
+                ],
+            ),
+            (
+                GameDetails.popularity,
+                "desc",
+                None,
+                10,
+                ["game_details.popularity IS NULL AND game_details.game_id < 10"],
+            ),
+            (GameDetails.game_id, "asc", 10, 10, ["game_details.game_id > 10"]),
+        ],
+        ids=["desc", "asc", "null_value", "primary_key_sort"],
+    )
+    def test_keyset_filters(self, sort_column, order, value, key, expected_sql):
+        # Act
+        clauses = keyset_filters(sort_column, GameDetails.game_id, order, value, key)
+
+        # Assert
+        assert [_compile(clause) for clause in clauses] == expected_sql
+
+    @pytest.mark.parametrize(
+        "sort_column, expected_sql",
+        [
+            (
+                GameDetails.popularity,
+                [
+                    "game_details.popularity IS NOT NULL",
+                    "game_details.popularity IS NULL",
+                ],
+            ),
+            (GameDetails.game_id, [None]),
+        ],
+        ids=["sort_column", "primary_key_sort"],
+    )
+    def test_keyset_queries_first_page(self, sort_column, expected_sql):
+        # Arrange
+        query = select(GameDetails.game_id)
+
+        # Act
+        queries = keyset_queries(query, sort_column, GameDetails.game_id, "desc", None)
+
+        # Assert
+        assert [
+            None if q.whereclause is None else _compile(q.whereclause) for q in queries
+        ] == expected_sql
+
+
+class TestFetchKeysetRows:
+    @pytest.mark.parametrize(
+        "ranges, limit, expected_rows, expected_limits",
+        [
+            ([[1, 2, 3], [4]], 3, [1, 2, 3], [3]),
+            ([[1], [4, 5, 6]], 3, [1, 4, 5], [3, 2]),
+            ([[], []], 3, [], [3, 3]),
+        ],
+        ids=["first_range_fills_page", "continues_into_null_tail", "edge_case_empty"],
+    )
+    def test_fetch_keyset_rows(self, ranges, limit, expected_rows, expected_limits):
+        # Arrange
+        queries = [select(GameDetails.game_id) for _ in ranges]
+        remaining = list(ranges)
+        limits = []
+
+        async def fetch(session, query):
+            limits.append(query._limit)
+            return remaining.pop(0)[: query._limit]
+
+        # Act
+        rows = asyncio.run(fetch_keyset_rows(None, queries, limit, fetch=fetch))
+
+        # Assert
+        assert rows == expected_rows
+        assert limits == expected_limits
+
+
+class TestEstimateRowCount:
+    @pytest.mark.parametrize(
+        "reltuples, expected",
+        [(1500.0, 1500), (-1.0, None), (None, None)],
+        ids=["happy_path", "edge_case_never_analyzed", "edge_case_missing_table"],
+    )
+    def test_estimate_row_count(self, reltuples, expected, mocker: MockerFixture):
+        # Arrange
+        session = mocker.AsyncMock()
+        session.execute.return_value = mocker.MagicMock()
+        session.execute.return_value.scalar.return_value = reltuples
+
+        # Act / Assert
+        assert asyncio.run(estimate_row_count(session, "game_details")) == expected
+
+
+class TestEstimateQueryRows:
+    @pytest.mark.parametrize(
+        "plan, expected",
+        [
+            ([{"Plan": {"Plan Rows": 420}}], 420),
+            ('[{"Plan": {"Plan Rows": 7}}]', 7),
+            ([{"Plan": {}}], None),
+        ],
+        ids=["happy_path", "happy_path_json_text", "edge_case_no_estimate"],
+    )
+    def test_estimate_query_rows(self, plan, expected, mocker: MockerFixture):
+        # Arrange
+        session = mocker.AsyncMock()
+        session.execute.return_value = mocker.MagicMock()
+        session.execute.return_value.scalar.return_value = plan
+        query = select(GameDetails.game_id).where(GameDetails.min_players <= 2)
+
+        # Act
+        result = asyncio.run(estimate_query_rows(session, query))
+
+        # Assert
+        assert result == expected
+        statement = str(session.execute.call_args.args[0])
+        assert statement.startswith("EXPLAIN (FORMAT JSON) SELECT game_details.game_id")
+        assert "game_details.min_players <= 2" in statement
@@ -0,0 +1,102 @@
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from services.web.db.models import GameDetails, GameMechanicLink
+from services.web.schemas import (
+    GAME_FIELD_GROUPS,
+    GameDetailsSchema,
+    GameMechanicLinkSchema,
+    GamesPage,
+    render_json,
+    resolve_fields,
+    schema_columns,
+    sparse_schema,
+)
+
+
+class TestSchemaColumns:
+    def test_schema_columns(self):
+        # Act
+        columns = schema_columns(GameMechanicLink, GameMechanicLinkSchema)
+
+        # Assert
+        assert columns == [GameMechanicLink.game_id, GameMechanicLink.mechanic_id]
+
+    def test_schemas_match_table_columns(self):
+        # Act
+        columns = schema_columns(GameDetails, GameDetailsSchema)
+
+        # Assert
+        assert [column.name for column in columns] == [
+            column.name
+            for column in GameDetails.__table__.columns
+            if column.name != "search_vector"
+        ]
+
+
+class TestResolveFields:
+    @pytest.mark.parametrize(
+        "fields, expected",
+        [
+            (None, tuple(GameDetailsSchema.model_fields)),
+            ("max_players,title", ("game_id", "title", "max_players")),
+            ("summary", GAME_FIELD_GROUPS["summary"]),
+            (
+                "stats, title,",
+                ("game_id", "title", *GAME_FIELD_GROUPS["stats"][1:]),
+            ),
+        ],
+        ids=["default", "fields", "group", "group_and_field"],
+    )
+    def test_resolve_fields(self, fields, expected):
+        # Act
+        result = resolve_fields(
+            fields, GameDetailsSchema, GAME_FIELD_GROUPS, required=("game_id",)
+        )
+
+        # Assert
+        assert result == expected
+
+    def test_resolve_fields_unknown(self):
+        # Act & Assert
+        with pytest.raises(HTTPException) as e:
+            resolve_fields("title,secret", GameDetailsSchema, GAME_FIELD_GROUPS)
+        assert e.value.status_code == 400
+
+
+class TestSparseSchema:
+    def test_sparse_schema(self):
+        # Act
+        schema = sparse_schema(GameDetailsSchema, ("game_id", "title"))
+
+        # Assert
+        assert list(schema.model_fields) == ["game_id", "title"]
+        assert schema is sparse_schema(GameDetailsSchema, ("game_id", "title"))
+        assert (
+            sparse_schema(GameDetailsSchema, tuple(GameDetailsSchema.model_fields))
+            is GameDetailsSchema
+        )
+
+
+class TestRenderJson:
+    def test_render_json(self):
+        # Arrange
+        page = GamesPage.model_validate(
+            {
+                "items": [{"game_id": 1, "title": "Catan", "description": ""}],
+                "next_cursor": "abc",
+            }
+        )
+
+        # Act
+        body = render_json(page)
+
+        # Assert
+        assert isinstance(body, bytes)
+        decoded = json.loads(body)
+        assert decoded["items"][0]["title"] == "Catan"
+        assert decoded["items"][0]["bayes_rating"] is None
+        assert decoded["next_cursor"] == "abc"
+        assert decoded["total_estimate"] is None
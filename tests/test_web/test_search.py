@@ -0,0 +1,93 @@
+from types import ModuleType
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.dialects import postgresql
+
+from services.web.pagination import encode_cursor
+from services.web.routers import search
+from tests.test_web.conftest import compile_query
+
+
+def _result(game_id: int, rank: float, popularity: float) -> dict:
+    return {
+        "game_id": game_id,
+        "title": f"Game {game_id}",
+        "description": "",
+        "search_rank": rank,
+        "search_popularity": popularity,
+    }
+
+
+@pytest.fixture
+def router_module() -> ModuleType:
+    return search
+
+
+class TestSearchEndpoint:
+    def test_search_first_page(self, client: TestClient, mock_session):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = [
+            _result(1, 0.9, 5.0),
+            _result(2, 0.5, 7.0),
+            _result(3, 0.5, 6.0),
+        ]
+
+        # Act
+        response = client.get("/search", params={"q": "space opera", "limit": 2})
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert [game["game_id"] for game in body["items"]] == [1, 2]
+        assert "search_rank" not in body["items"][0]
+        assert body["next_cursor"] == encode_cursor("relevance", "desc", [0.5, 7.0], 2)
+        sql = compile_query(mock_session.execute.call_args.args[0], literal_binds=False)
+        assert "game_details.search_vector @@ websearch_to_tsquery(" in sql
+        assert (
+            "ORDER BY ts_rank_cd(game_details.search_vector, websearch_to_tsquery("
+            in sql
+        )
+
+    def test_search_next_page(self, client: TestClient, mock_session):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = []
+        cursor = encode_cursor("relevance", "desc", [0.5, float("-inf")], 2)
+
+        # Act
+        response = client.get("/search", params={"q": "catan", "cursor": cursor})
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json()["next_cursor"] is None
+        query = mock_session.execute.call_args.args[0]
+        compiled = query.compile(dialect=postgresql.dialect())
+        assert "game_details.game_id) < (" in str(compiled)
+        assert float("-inf") in compiled.params.values()
+
+    @pytest.mark.parametrize(
+        "params",
+        [
+            {},
+            {"q": ""},
+            {"q": "catan", "cursor": encode_cursor("popularity", "desc", 1.0, 1)},
+            {"q": "catan", "cursor": encode_cursor("relevance", "desc", 1.0, 1)},
+            {"q": "catan", "cursor": encode_cursor("relevance", "desc", ["a", 1], 1)},
+            {"q": "catan", "cursor": encode_cursor("relevance", "desc", [0.5, 1], "1")},
+        ],
+        ids=[
+            "error_missing_query",
+            "error_empty_query",
+            "error_cursor_for_other_sort",
+            "error_malformed_cursor",
+            "error_tampered_cursor_value",
+            "error_tampered_cursor_key",
+        ],
+    )
+    def test_search_error_cases(self, params, client: TestClient, mock_session):
+        # Act
+        response = client.get("/search", params=params)
+
+        # Assert
+        assert response.status_code in (400, 422)
+        mock_session.execute.assert_not_called()
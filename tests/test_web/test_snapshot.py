@@ -0,0 +1,325 @@
+import asyncio
+import math
+from pathlib import Path
+
+import numpy as np
+import pytest
+from pytest_mock import MockerFixture
+
+from services.common.snapshot_file import (
+    StringColumn,
+    snapshot_file_path,
+    write_snapshot_file,
+)
+from services.web import snapshot as snapshot_module
+from services.web.filters import GameFilters
+from services.web.schemas import GameDetailsSchema
+from services.web.snapshot import (
+    CatalogSnapshot,
+    CatalogSnapshotLoader,
+    pack_bits,
+    unpack_bits,
+)
+
+SORT_KEYS = ("game_id", "bayes_rating", "year_published")
+
+# game_id, bayes_rating, year_published, min_players, max_players, min_age
+GAMES = [
+    (5, 7.5, 2017, 1, 4, 14),
+    (1, 6.0, 1995, 3, 4, 10),
+    (3, None, 2020, 2, 2, None),
+    (2, 7.5, None, 2, 6, 12),
+    (4, 8.2, 2005, 2, 5, 13),
+]
+
+LINKS = {
+    "mechanic": ([5, 1, 4, 5, 2], [10, 10, 10, 11, 11]),
+    "category": ([1, 3], [20, 20]),
+    "designer": ([5, 4, 999], [30, 30, 30]),
+    "artist": ([], []),
+    "publisher": ([2], [40]),
+}
+
+
+def _columns() -> dict[str, list]:
+    columns = {
+        name: [game[i] for game in GAMES]
+        for i, name in enumerate(
+            [
+                "game_id",
+                "bayes_rating",
+                "year_published",
+                "min_players",
+                "max_players",
+                "min_age",
+            ]
+        )
+    }
+    columns["title"] = [f"Game {game[0]}" for game in GAMES]
+    return columns
+
+
+@pytest.fixture
+def snapshot() -> CatalogSnapshot:
+    return CatalogSnapshot(_columns(), LINKS, SORT_KEYS)
+
+
+def _write_file(path: Path) -> None:
+    """Write the test games to a snapshot file, sorted like the pipeline writes them."""
+    columns = _columns()
+    order = np.argsort(columns["game_id"])
+    file_columns = {
+        field: np.array([columns.get(field, [None] * len(GAMES))[i] for i in order])
+        for field in GameDetailsSchema.model_fields
+        if field not in ("title", "description")
+    }
+    file_columns = {
+        field: values.astype(np.float64) for field, values in file_columns.items()
+    }
+    file_columns["title"] = StringColumn.from_values(columns["title"][i] for i in order)
+    file_columns["description"] = StringColumn.from_values([""] * len(GAMES))
+    write_snapshot_file(path, file_columns, LINKS)
+
+
+def _game_ids(snapshot: CatalogSnapshot, positions) -> list[int]:
+    return [row["game_id"] for row in snapshot.rows(positions, ["game_id"])]
+
+
+class TestBits:
+    @pytest.mark.parametrize(
+        "length", [0, 1, 64, 130], ids=["empty", "one", "word", "words"]
+    )
+    def test_round_trip(self, length):
+        # Arrange
+        members = np.random.default_rng(0).random(length) < 0.5
+
+        # Act
+        words = pack_bits(members)
+
+        # Assert
+        assert words.dtype == np.uint64
+        assert len(words) == math.ceil(length / 64)
+        np.testing.assert_array_equal(unpack_bits(words, length), members)
+
+
+class TestCatalogSnapshotMatch:
+    @pytest.mark.parametrize(
+        "filters, expected",
+        [
+            (GameFilters(), [1, 2, 3, 4, 5]),
+            (GameFilters(rating_min=7.5), [2, 4, 5]),
+            (GameFilters(year_min=2000, year_max=2017), [4, 5]),
+            (GameFilters(players=5), [2, 4]),
+            (GameFilters(age=12), [1, 2]),
+            (GameFilters(mechanic=(10,)), [1, 4, 5]),
+            (GameFilters(mechanic=(10, 11)), [5]),
+            (GameFilters(mechanic=(10, 99)), []),
+            (GameFilters(category=(20,), players=3), [1]),
+            (GameFilters(designer=(30,)), [4, 5]),
+            (GameFilters(publisher=(40,), mechanic=(11,)), [2]),
+            (GameFilters(artist=(50,)), []),
+        ],
+        ids=[
+            "no_filters",
+            "range_excludes_null",
+            "year_range",
+            "players",
+            "age_excludes_null",
+            "bitset_link",
+            "bitset_links_all_required",
+            "unknown_bitset_link",
+            "bitset_and_range",
+            "position_link",
+            "position_and_bitset_links",
+            "unknown_position_link",
+        ],
+    )
+    def test_match(self, snapshot: CatalogSnapshot, filters, expected):
+        # Act
+        mask = snapshot.match(filters)
+
+        # Assert
+        assert _game_ids(snapshot, np.flatnonzero(mask)) == expected
+
+
+class TestCatalogSnapshotQuery:
+    @pytest.mark.parametrize(
+        "sort, order, expected",
+        [
+            ("bayes_rating", "desc", [4, 5, 2, 1, 3]),
+            ("bayes_rating", "asc", [1, 2, 5, 4, 3]),
+            ("year_published", "desc", [3, 5, 4, 1, 2]),
+            ("game_id", "desc", [5, 4, 3, 2, 1]),
+            ("game_id", "asc", [1, 2, 3, 4, 5]),
+        ],
+        ids=["desc_nulls_last", "asc_nulls_last", "null_year", "key_desc", "key_asc"],
+    )
+    def test_order(self, snapshot: CatalogSnapshot, sort, order, expected):
+        # Act
+        positions, total = snapshot.query(GameFilters(), sort, order, None, 10)
+
+        # Assert
+        assert _game_ids(snapshot, positions) == expected
+        assert total == 5
+
+    @pytest.mark.parametrize(
+        "sort, order",
+        [("bayes_rating", "desc"), ("bayes_rating", "asc"), ("game_id", "desc")],
+        ids=["desc", "asc", "key"],
+    )
+    def test_pages(self, snapshot: CatalogSnapshot, sort, order):
+        # Arrange
+        expected, _ = snapshot.query(GameFilters(), sort, order, None, 10)
+        pages, position = [], None
+
+        # Act
+        while True:
+            positions, total = snapshot.query(GameFilters(), sort, order, position, 2)
+            if len(positions) == 0:
+                break
+            pages.extend(_game_ids(snapshot, positions))
+            last = snapshot.rows(positions[-1:], [sort, "game_id"])[0]
+            position = (last[sort], last["game_id"])
+
+        # Assert
+        assert pages == _game_ids(snapshot, expected)
+        assert total == 5
+
+    def test_limit_and_total(self, snapshot: CatalogSnapshot):
+        # Act
+        positions, total = snapshot.query(
+            GameFilters(mechanic=(10,)), "game_id", "asc", None, 2
+        )
+
+        # Assert
+        assert _game_ids(snapshot, positions) == [1, 4]
+        assert total == 3
+
+
+class TestCatalogSnapshotFacets:
+    @pytest.mark.parametrize(
+        "filters, expected",
+        [
+            (
+                GameFilters(),
+                (
+                    5,
+                    {
+                        "mechanic": [(10, 3), (11, 2)],
+                        "category": [(20, 2)],
+                        "players": [(1, 1), (2, 4), (3, 4), (4, 4), (5, 2), (6, 1)],
+                    },
+                ),
+            ),
+            (
+                GameFilters(mechanic=(10,)),
+                (
+                    3,
+                    {
+                        "mechanic": [(10, 3), (11, 1)],
+                        "category": [(20, 1)],
+                        "players": [(1, 1), (2, 2), (3, 3), (4, 3), (5, 1)],
+                    },
+                ),
+            ),
+            (
+                GameFilters(players=6, year_min=2000),
+                (0, {"mechanic": [], "category": [], "players": []}),
+            ),
+        ],
+        ids=["no_filters", "link_filter", "no_match"],
+    )
+    def test_facets(self, snapshot: CatalogSnapshot, filters, expected):
+        # Act
+        facets = snapshot.facets(filters)
+
+        # Assert
+        assert facets == expected
+
+
+class TestCatalogSnapshotRows:
+    def test_rows(self, snapshot: CatalogSnapshot):
+        # Act
+        rows = snapshot.rows(
+            np.array([2, 1]), ["game_id", "title", "bayes_rating", "min_age"]
+        )
+
+        # Assert
+        assert rows == [
+            {"game_id": 3, "title": "Game 3", "bayes_rating": None, "min_age": None},
+            {"game_id": 2, "title": "Game 2", "bayes_rating": 7.5, "min_age": 12},
+        ]
+        assert isinstance(rows[1]["game_id"], int)
+
+
+class TestCatalogSnapshotFromFile:
+    def test_matches_snapshot_from_rows(self, snapshot: CatalogSnapshot, tmp_path):
+        # Arrange
+        path = tmp_path / "v1.snapshot"
+        _write_file(path)
+        filters = GameFilters(mechanic=(10,), designer=(30,))
+
+        # Act
+        mapped = CatalogSnapshot.from_file(path, SORT_KEYS)
+
+        # Assert
+        assert not mapped.columns["bayes_rating"].flags.owndata
+        for sort, order in [("bayes_rating", "desc"), ("year_published", "asc")]:
+            expected, _ = snapshot.query(GameFilters(), sort, order, None, 10)
+            positions, _ = mapped.query(GameFilters(), sort, order, None, 10)
+            assert mapped.rows(positions, ["game_id", "title", sort]) == snapshot.rows(
+                expected, ["game_id", "title", sort]
+            )
+        assert _game_ids(mapped, np.flatnonzero(mapped.match(filters))) == [4, 5]
+
+    def test_missing_columns(self, tmp_path):
+        # Arrange
+        path = tmp_path / "v1.snapshot"
+        write_snapshot_file(path, {"game_id": np.array([1.0])}, {})
+
+        # Act / Assert
+        with pytest.raises(ValueError, match="lacks columns"):
+            CatalogSnapshot.from_file(path, SORT_KEYS)
+
+
+class TestCatalogSnapshotLoader:
+    @pytest.fixture
+    def db(self, mocker: MockerFixture):
+        db = mocker.MagicMock()
+        session = mocker.AsyncMock()
+        session.execute.return_value = mocker.MagicMock()
+        session.execute.return_value.all.return_value = []
+        db.get_session.return_value.__aenter__.return_value = session
+        return db
+
+    def test_maps_snapshot_file(self, mocker: MockerFixture, db, tmp_path):
+        # Arrange
+        mocker.patch.object(snapshot_module.config, "snapshot_path", tmp_path)
+        _write_file(snapshot_file_path(tmp_path, "v1"))
+        loader = CatalogSnapshotLoader(db, mocker.MagicMock(), sort_keys=SORT_KEYS)
+
+        # Act
+        asyncio.run(loader.on_version_change("v1"))
+
+        # Assert
+        assert len(loader.value) == len(GAMES)
+        db.get_session.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "contents", [None, b"not a snapshot"], ids=["no_file", "invalid_file"]
+    )
+    def test_falls_back_to_database(
+        self, mocker: MockerFixture, db, tmp_path, contents
+    ):
+        # Arrange
+        mocker.patch.object(snapshot_module.config, "snapshot_path", tmp_path)
+        if contents is not None:
+            snapshot_file_path(tmp_path, "v1").write_bytes(contents)
+        loader = CatalogSnapshotLoader(db, mocker.MagicMock(), sort_keys=SORT_KEYS)
+
+        # Act
+        asyncio.run(loader.on_version_change("v1"))
+
+        # Assert
+        assert len(loader.value) == 0
+        db.get_session.assert_called_once()
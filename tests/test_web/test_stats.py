@@ -0,0 +1,161 @@
+from types import ModuleType
+
+import pytest
+from fastapi.testclient import TestClient
+
+from services.web.pagination import encode_cursor
+from services.web.routers import stats
+from tests.test_web.conftest import compile_query
+
+
+def _entity(entity_id: int, game_count: int) -> dict:
+    return {
+        "id": entity_id,
+        "name": f"Mechanic {entity_id}",
+        "game_count": game_count,
+        "mean_rating": 7.0,
+        "median_rating": 7.1,
+        "mean_weight": None,
+        "median_weight": None,
+        "mean_playing_time": 60.0,
+        "median_playing_time": 45.0,
+        "mean_popularity": 1.5,
+    }
+
+
+@pytest.fixture
+def router_module() -> ModuleType:
+    return stats
+
+
+class TestEntityStats:
+    def test_entity_stats_first_page(self, client: TestClient, mock_session):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = [
+            _entity(1, 30),
+            _entity(2, 20),
+            _entity(3, 10),
+        ]
+
+        # Act
+        response = client.get("/stats/mechanics", params={"limit": 2, "min_games": 5})
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["items"][0] == _entity(1, 30)
+        assert [item["id"] for item in body["items"]] == [1, 2]
+        assert body["next_cursor"] == encode_cursor("game_count", "desc", 20, 2)
+        sql = compile_query(mock_session.execute.call_args.args[0])
+        assert "FROM mechanic_stats" in sql
+        assert "mechanic_stats.game_count >= 5" in sql
+        assert (
+            "ORDER BY mechanic_stats.game_count DESC NULLS LAST, "
+            "mechanic_stats.mechanic_id DESC" in sql
+        )
+
+    def test_entity_stats_next_page(self, client: TestClient, mock_session):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = []
+        cursor = encode_cursor("mean_rating", "asc", 6.5, 12)
+
+        # Act
+        response = client.get(
+            "/stats/designers",
+            params={"sort": "mean_rating", "order": "asc", "cursor": cursor},
+        )
+
+        # Assert
+        assert response.status_code == 200
+        assert response.json() == {
+            "items": [],
+            "next_cursor": None,
+            "total_estimate": None,
+            "total_is_estimate": None,
+        }
+        range_sql, tail_sql = [
+            compile_query(call.args[0]) for call in mock_session.execute.call_args_list
+        ]
+        assert "FROM designer_stats" in range_sql
+        assert (
+            "WHERE designer_stats.game_count >= 1 AND (designer_stats.mean_rating, "
+            "designer_stats.designer_id) > (6.5, 12) ORDER BY" in range_sql
+        )
+        assert (
+            "WHERE designer_stats.game_count >= 1 AND designer_stats.mean_rating IS NULL "
+            "ORDER BY" in tail_sql
+        )
+
+    def test_entity_stats_tampered_cursor(self, client: TestClient, mock_session):
+        # Arrange
+        cursor = encode_cursor("mean_rating", "asc", "6.5; DROP", 12)
+
+        # Act
+        response = client.get(
+            "/stats/designers",
+            params={"sort": "mean_rating", "order": "asc", "cursor": cursor},
+        )
+
+        # Assert
+        assert response.status_code == 400
+        mock_session.execute.assert_not_called()
+
+    @pytest.mark.parametrize(
+        "path, params",
+        [
+            ("/stats/games", {}),
+            ("/stats/mechanics", {"sort": "title"}),
+            ("/stats/mechanics", {"min_games": 0}),
+        ],
+        ids=["unknown_entity", "unknown_sort", "min_games_too_small"],
+    )
+    def test_entity_stats_invalid_parameters(
+        self, client: TestClient, mock_session, path, params
+    ):
+        # Act
+        response = client.get(path, params=params)
+
+        # Assert
+        assert response.status_code == 422
+        mock_session.execute.assert_not_called()
+
+
+class TestYearStats:
+    def test_year_stats(self, client: TestClient, mock_session):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = [
+            {"year_published": 2020, "game_count": 5000},
+            {"year_published": 2019, "game_count": 4800},
+        ]
+
+        # Act
+        response = client.get(
+            "/stats/years", params={"year_min": 2000, "year_max": 2020, "limit": 1}
+        )
+
+        # Assert
+        assert response.status_code == 200
+        body = response.json()
+        assert body["items"][0]["year_published"] == 2020
+        assert body["items"][0]["mean_rating"] is None
+        assert body["next_cursor"] == encode_cursor(
+            "year_published", "desc", 2020, 2020
+        )
+        sql = compile_query(mock_session.execute.call_args.args[0])
+        assert "FROM year_stats" in sql
+        assert "year_stats.year_published >= 2000" in sql
+        assert "year_stats.year_published <= 2020" in sql
+        assert "ORDER BY year_stats.year_published DESC" in sql
+
+    def test_year_stats_next_page(self, client: TestClient, mock_session):
+        # Arrange
+        mock_session.execute.return_value.mappings.return_value.all.return_value = []
+        cursor = encode_cursor("year_published", "desc", 2020, 2020)
+
+        # Act
+        response = client.get("/stats/years", params={"cursor": cursor})
+
+        # Assert
+        assert response.status_code == 200
+        sql = compile_query(mock_session.execute.call_args.args[0])
+        assert "year_stats.year_published < 2020" in sql